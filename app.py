@@ -1,64 +1,55 @@
-import customtkinter as ctk
+from core.startup_profile import get_startup_profile
+startup = get_startup_profile()
+
 import threading
 import logging
+import argparse
 import sys
 import os
 import ctypes
-import json
 
-from gui.dashboard import Dashboard
-from core.usb_monitor import USBMonitor
-from core.reporter import Reporter
+with startup.phase("import: gui"):
+    import customtkinter as ctk
+    from gui.dashboard import Dashboard
+from core.config import load_config
+
+# The monitor (usb_monitor, watchdog, the platform backend) and the control
+# API client are imported only by the mode that needs them
 
 ctk.set_appearance_mode("Dark")
 ctk.set_default_color_theme("blue")
 
-def load_config():
-    config_path = os.path.join("config", "settings.json")
-    default_config = {
-        "settings": {
-            "log_level": "INFO",
-            "report_file": "reports/final_usb_audit_report.txt",
-            "audit_log": "logs/usb_events.log",
-             "file_log": "logs/file_activity.log"
-        },
-        "allowlist": {"allowed_devices": []},
-        "blocklist": {"blocked_devices": []}
-    }
-    
-    if os.path.exists(config_path):
-        try:
-            with open(config_path, 'r') as f:
-                loaded = json.load(f)
-                # Merge with defaults
-                if "settings" in loaded:
-                    default_config["settings"].update(loaded["settings"])
-                return default_config
-        except Exception as e:
-            print(f"Error loading config: {e}")
-            
-    return default_config
+BACKEND_POLL_MS = 50
 
 def setup_logging(settings):
-    log_dir = "logs"
-    os.makedirs(log_dir, exist_ok=True)
+    from core.log_pipeline import configure_logging
+    os.makedirs("logs", exist_ok=True)
     
-    log_file = settings.get("audit_log", "logs/usb_events.log")
-    level_str = settings.get("log_level", "INFO")
-    level = getattr(logging, level_str.upper(), logging.INFO)
-    
-    # Configure root logger
-    logging.basicConfig(
-        level=level,
-        format='%(asctime)s - %(levelname)s - %(message)s',
-        handlers=[
-            logging.FileHandler(log_file),
-            logging.StreamHandler(sys.stdout)
-        ]
-    )
+    # All loggers go through one bounded queue; a background listener writes
+    # the usb_events / file_activity / alerts files and the console in batches
+    return configure_logging(settings)
+
+def connect_daemon(address=None):
+    """
+    Control API client of a running daemon (python -m core.daemon), or None
+    when no daemon is listening. Anything else (a key we can't read, failed
+    authentication) raises: falling back to an embedded monitor would run a
+    second one next to the daemon, on the same policy files and devices.
+    """
+    with startup.phase("connect to daemon"):
+        from core.control_api import ControlClient, daemon_listening
+        try:
+            return ControlClient(address)
+        except ConnectionRefusedError:
+            return None # stale socket, nothing listening
+        except FileNotFoundError:
+            # No socket / pipe, or no key file: only fine if no daemon is there either
+            if daemon_listening(address):
+                raise
+            return None
 
 class App(ctk.CTk):
-    def __init__(self):
+    def __init__(self, client=None):
         super().__init__()
 
         self.title("USB Security Framework - Dashboard")
@@ -70,37 +61,75 @@ class App(ctk.CTk):
         except: pass
         
         # Backend Setup
-        self.config = load_config()
-        setup_logging(self.config["settings"])
-        
-        report_file = self.config["settings"].get("report_file", "reports/final_usb_audit_report.txt")
-        self.reporter = Reporter(report_file)
-        self.monitor = USBMonitor(self.config, self.reporter)
-        
-        # Start Backend Thread
-        self.start_backend()
+        with startup.phase("config"):
+            self.config = load_config()
+        self.embedded = client is None
+        self.monitor = None
+        self.backend_ready = threading.Event()
+        if self.embedded:
+            # No daemon: run the monitor in this process, as before
+            with startup.phase("logging"):
+                self.log_pipeline = setup_logging(self.config["settings"])
+            
+            # Start Backend Thread: the window comes up while the monitor loads and scans
+            threading.Thread(target=self.start_backend, name="backend-start", daemon=True).start()
+        else:
+            # Thin client: the daemon owns the monitor, the policy and the log files
+            from core.control_api import RemoteMonitor
+            logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+            self.log_pipeline = None
+            self.monitor = RemoteMonitor(client)
+            logging.info(f"GUI: Attached to daemon at {client.address}")
 
         # UI Layout
-        self.dashboard = Dashboard(self, self.monitor)
-        self.dashboard.pack(fill="both", expand=True)
+        with startup.phase("build dashboard"):
+            self.dashboard = Dashboard(self, self.monitor, self.config["settings"])
+            self.dashboard.pack(fill="both", expand=True)
+        # Runs once the main loop is up, i.e. when the window is on screen
+        self.after_idle(lambda: startup.mark("window shown"))
+        if self.embedded:
+            self.after(BACKEND_POLL_MS, self.poll_backend)
 
         # Handle Close
         self.protocol("WM_DELETE_WINDOW", self.on_close)
 
     def start_backend(self):
-        logging.info("GUI: Starting Backend Monitor...")
-        # Run monitor.start() (which spawns its own threads)
-        # But monitor.start() just sets running=True and launches threads. 
-        # We don't need a separate thread for start(), acts instantly.
+        """Loads, builds and starts the in-process monitor off the Tk thread."""
         try:
-            self.monitor.start()
+            with startup.phase("import: monitor"):
+                from core.usb_monitor import USBMonitor
+                from core.reporter import Reporter
+            with startup.phase("monitor: construct"):
+                report_file = self.config["settings"].get("report_file", "reports/final_usb_audit_report.txt")
+                self.reporter = Reporter(report_file)
+                monitor = USBMonitor(self.config, self.reporter)
+            logging.info("GUI: Starting Backend Monitor...")
+            # monitor.start() only launches threads; the startup scan runs in the background
+            with startup.phase("monitor: start"):
+                monitor.start()
+            self.monitor = monitor
         except Exception as e:
             logging.error(f"Failed to start backend: {e}")
+        finally:
+            self.backend_ready.set()
+
+    def poll_backend(self):
+        if not self.backend_ready.is_set():
+            self.after(BACKEND_POLL_MS, self.poll_backend)
+        elif self.monitor:
+            self.dashboard.attach_monitor(self.monitor)
 
     def on_close(self):
         logging.info("GUI: Closing application...")
-        if self.monitor:
-            self.monitor.stop()
+        self.dashboard.device_list.stop()
+        if not self.embedded:
+            # Leave the daemon running; just hang up
+            self.monitor.close()
+        else:
+            self.backend_ready.wait(5)
+            if self.monitor:
+                self.monitor.stop()
+            self.log_pipeline.stop()
         self.destroy()
         sys.exit(0)
 
@@ -112,5 +141,19 @@ if __name__ == "__main__":
              # We can show a popup if we want, but console is fine for now since we launch via shell
     except: pass
     
-    app = App()
+    parser = argparse.ArgumentParser(description="USB Security Framework dashboard")
+    parser.add_argument("--embedded", action="store_true", help="run the monitor in this process even if a daemon is running")
+    parser.add_argument("--address", default=None, help="control API address of the daemon")
+    args = parser.parse_args()
+
+    client = None
+    if not args.embedded:
+        try:
+            client = connect_daemon(args.address or load_config()["settings"].get("control_address"))
+        except Exception as e:
+            logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+            logging.error(f"A monitor daemon is running but this dashboard can't connect to it: {e!r}. "
+                          f"Run it as the daemon's user, or pass --embedded to run a separate monitor anyway.")
+            sys.exit(1)
+    app = App(client)
     app.mainloop()
@@ -0,0 +1,43 @@
+"""
+Benchmark: threads used and shutdown time of FileAuditor with many audited
+drives (temporary directories stand in for USB volumes).
+
+Run from the project root:
+    python -m benchmarks.bench_audit_shutdown [drives]
+"""
+import sys
+import time
+import logging
+import tempfile
+import threading
+
+from core.file_auditor import FileAuditor
+
+
+class NullReporter:
+    drive_devices = {}
+
+    def update_stat(self, key, increment=1, **dimensions):
+        pass
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.CRITICAL)
+    drives = int(sys.argv[1]) if len(sys.argv) > 1 else 32
+
+    with tempfile.TemporaryDirectory() as tmp:
+        baseline = threading.active_count()
+        auditor = FileAuditor(NullReporter())
+        start = time.perf_counter()
+        for i in range(drives):
+            auditor.start_auditing(f"D{i}:", tempfile.mkdtemp(dir=tmp))
+        started = time.perf_counter() - start
+        threads = threading.active_count() - baseline
+
+        start = time.perf_counter()
+        auditor.stop_all()
+        stopped = time.perf_counter() - start
+
+    print(f"{drives} drives: start {started * 1000:.0f} ms, {threads} threads "
+          f"({threads / drives:.1f} per drive), stop_all {stopped * 1000:.0f} ms, "
+          f"{threading.active_count() - baseline} threads left")
@@ -0,0 +1,90 @@
+"""
+Benchmark: reading the attached-device list. The previous
+get_all_attached_devices enumerated every USBSTOR entity through the backend
+on each call (a WMI round trip); DeviceInventory answers from an immutable
+snapshot kept current by device events. Also measures how long an arrival
+or a status change takes to show up in the snapshot (the simulator delivers
+events from its watcher thread without delay; on WMI arrivals come with
+Win32_DeviceChangeEvent, while status changes wait for the WITHIN 1 polling
+of __InstanceOperationEvent), and the cost of a reconciliation sweep.
+
+Run from the project root:
+    python -m benchmarks.bench_device_inventory [devices] [enumerate_ms]
+"""
+import sys
+import time
+
+from core.backends.simulator import SimulatedEventSource
+from core.device_inventory import DeviceInventory
+
+
+class SlowEnumeration(SimulatedEventSource):
+    """Simulator whose full enumeration costs as much as a WMI query."""
+
+    def __init__(self, enumerate_ms):
+        super().__init__()
+        self.enumerate_ms = enumerate_ms
+
+    def enumerate_attached(self):
+        time.sleep(self.enumerate_ms / 1000)
+        return super().enumerate_attached()
+
+
+def device_id(i):
+    return f"USBSTOR\\DISK&VEN_KINGSTON&PROD_DT{i % 9}&REV_1.00\\SN{i:08X}&0"
+
+
+def wait_for(predicate, timeout=5.0):
+    start = time.perf_counter()
+    while not predicate():
+        if time.perf_counter() - start > timeout:
+            return None
+        time.sleep(0.0001)
+    return time.perf_counter() - start
+
+
+if __name__ == "__main__":
+    devices = int(sys.argv[1]) if len(sys.argv) > 1 else 32
+    enumerate_ms = float(sys.argv[2]) if len(sys.argv) > 2 else 150
+
+    backend = SlowEnumeration(enumerate_ms)
+    for i in range(devices):
+        backend.attach(device_id(i), name=f"Kingston DT{i % 9}")
+
+    reads = 20
+    start = time.perf_counter()
+    for _ in range(reads):
+        backend.enumerate_attached()
+    old_ms = (time.perf_counter() - start) / reads * 1000
+
+    inventory = DeviceInventory(backend)
+    inventory.start()
+    inventory.wait_ready()
+    reads = 1_000_000
+    start = time.perf_counter()
+    for _ in range(reads):
+        inventory.snapshot()
+    new_us = (time.perf_counter() - start) / reads * 1e6
+    print(f"{devices} attached devices, {enumerate_ms:.0f} ms enumeration")
+    print(f"  read  old (enumerate per call) {old_ms:8.1f} ms | inventory snapshot {new_us:6.3f} us")
+
+    arrival = []
+    change = []
+    for n in range(200):
+        new_id = device_id(devices + n)
+        backend.attach(new_id, name="Late Stick")
+        arrival.append(wait_for(lambda: inventory.get(new_id) is not None))
+        backend.disable_device(new_id)
+        change.append(wait_for(lambda: inventory.get(new_id)["status_raw"] == "Error"))
+        backend.detach(device_id=new_id)
+    arrival.sort()
+    change.sort()
+    print(f"  arrival -> snapshot p50 {arrival[100] * 1e6:6.1f} us, max {arrival[-1] * 1e6:6.1f} us | "
+          f"status change p50 {change[100] * 1e6:6.1f} us")
+
+    start = time.perf_counter()
+    repairs = inventory.reconcile()
+    print(f"  reconciliation sweep {(time.perf_counter() - start) * 1000:.1f} ms ({repairs} repairs), "
+          f"every {inventory.reconcile_interval:.0f} s instead of every dashboard refresh")
+    print(f"  {inventory.stats()}")
+    inventory.stop()
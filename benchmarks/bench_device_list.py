@@ -0,0 +1,119 @@
+"""
+Benchmark: UI-thread work per device-list refresh. The previous dashboard
+ran the attached-device query on the Tk thread and destroyed and rebuilt
+every card; the view model runs the query on its own thread, diffs by
+serial and touches only the cards on the current page that changed.
+No Tk here: widget work is counted in cards (each card is 7 widgets).
+
+Run from the project root:
+    python -m benchmarks.bench_device_list [allowlist_size] [query_ms]
+"""
+import sys
+import time
+import random
+
+from gui.device_model import build_device_rows, diff_rows, DeviceListModel
+
+PAGE_SIZE = 25
+WIDGETS_PER_CARD = 7
+
+
+class FakeBackend:
+    def __init__(self, attached, query_ms):
+        self.attached = attached
+        self.query_ms = query_ms
+
+    def thread_init(self): pass
+    def thread_exit(self): pass
+
+    def enumerate_attached(self):
+        time.sleep(self.query_ms / 1000) # WMI Win32_DiskDrive round trip
+        return list(self.attached)
+
+
+class FakePolicy:
+    def __init__(self, allowed, blocked):
+        self.allowed = allowed
+        self.blocked = blocked
+
+    def allowed_devices(self): return [dict(d) for d in self.allowed]
+    def blocked_devices(self): return [dict(d) for d in self.blocked]
+
+
+class FakeMonitor:
+    def __init__(self, size, query_ms, seed=5):
+        rng = random.Random(seed)
+        allowed = [{'serial_number': f"SN{i:08X}", 'device_name': f"Vendor {i % 17} Flash Disk",
+                    'device_id': f"USBSTOR\\DISK&VEN_V{i % 17}&PROD_FLASH\\SN{i:08X}&0"} for i in range(size)]
+        blocked = [{'serial_number': f"BL{i:08X}", 'device_name': "Unknown Disk",
+                    'device_id': f"USBSTOR\\DISK&VEN_X&PROD_Y\\BL{i:08X}&0"} for i in range(size // 50)]
+        self.policy_store = FakePolicy(allowed, blocked)
+        self.attached = [{'serial_number': d['serial_number']} for d in rng.sample(allowed, min(6, size))]
+        self.active_drives = {f"{chr(ord('E') + n)}:": dict(allowed[n], drive=f"{chr(ord('E') + n)}:") for n in range(min(4, size))}
+        self.backend = FakeBackend(self.attached, query_ms)
+
+    def get_all_attached_devices(self):
+        return self.backend.enumerate_attached()
+
+
+def old_refresh(monitor):
+    """Tk-thread time of the previous refresh_devices_ui, minus the widget calls; returns cards rebuilt."""
+    rows = build_device_rows(monitor.active_drives.copy(), monitor.policy_store.blocked_devices(),
+                             monitor.policy_store.allowed_devices(), monitor.get_all_attached_devices())
+    return len(rows)
+
+
+def page_ops(old, new, page=0):
+    """Cards created / updated / destroyed on one page after a diff."""
+    start = page * PAGE_SIZE
+    old_keys = {r['key']: r for r in old[start:start + PAGE_SIZE]}
+    new_page = new[start:start + PAGE_SIZE]
+    _, changed, _ = diff_rows(list(old_keys.values()), new_page)
+    created = sum(1 for r in new_page if r['key'] not in old_keys)
+    destroyed = len(old_keys.keys() - {r['key'] for r in new_page})
+    return created, len(changed), destroyed
+
+
+if __name__ == "__main__":
+    size = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    query_ms = float(sys.argv[2]) if len(sys.argv) > 2 else 300
+    monitor = FakeMonitor(size, query_ms)
+
+    start = time.perf_counter()
+    cards = old_refresh(monitor)
+    old_ms = (time.perf_counter() - start) * 1000
+    print(f"{size:,}-device allowlist, {query_ms:.0f} ms attached-device query")
+    print(f"  old  : Tk thread blocked {old_ms:7.1f} ms (before widgets), then {cards:,} cards "
+          f"= {cards * WIDGETS_PER_CARD:,} widgets destroyed and recreated every refresh")
+
+    # Model: one device plugged in between refreshes
+    model = DeviceListModel(monitor)
+    model.request_refresh()
+    while (first := model.poll()) is None:
+        time.sleep(0.005)
+    monitor.attached.append({'serial_number': monitor.policy_store.allowed[-1]['serial_number']})
+    start = time.perf_counter()
+    model.request_refresh()
+    ui_ms = (time.perf_counter() - start) * 1000
+    t0 = time.perf_counter()
+    while (second := model.poll()) is None:
+        time.sleep(0.001)
+    worker_ms = (time.perf_counter() - t0) * 1000
+    _, added, changed, removed = second
+    created, updated, destroyed = page_ops(first[0], second[0])
+
+    start = time.perf_counter()
+    for _ in range(20):
+        diff_rows(first[0], second[0])
+    diff_ms = (time.perf_counter() - start) / 20 * 1000
+    print(f"  model: Tk thread {ui_ms:7.3f} ms to request; result after {worker_ms:.0f} ms on the worker "
+          f"(diff of {size:,} rows {diff_ms:.1f} ms)")
+    print(f"         diff: {len(added)} added, {len(changed)} changed, {len(removed)} removed; "
+          f"page 1: {created} created, {updated} updated, {destroyed} destroyed "
+          f"(cards alive: at most {PAGE_SIZE})")
+
+    # Steady state: nothing changed, nothing is posted to the UI
+    model.request_refresh()
+    time.sleep(query_ms / 1000 + 0.2)
+    print(f"  idle refresh posts to the UI: {model.poll() is not None}")
+    model.stop()
@@ -0,0 +1,106 @@
+"""
+Benchmark: work done per GUI tick when file activity floods in, comparing
+the previous dashboard (tail the log file every 2 s and insert everything
+new) with the event bus (drain at most MAX_EVENTS_PER_FRAME events every
+DRAIN_INTERVAL_MS). No Tk here: a tick is the work done before the widget
+insert, which takes time proportional to the text handed to it.
+
+Run from the project root:
+    python -m benchmarks.bench_event_bus [events_per_second] [seconds]
+"""
+import os
+import sys
+import time
+import tempfile
+import threading
+
+from core.event_bus import EventBus, EventQueue
+
+DRAIN_INTERVAL_MS = 50
+MAX_EVENTS_PER_FRAME = 200
+
+
+def line(i):
+    return f"Event: MODIFIED | Path: E:\\Projects\\p{i % 200}\\doc{i}.docx | Size: {i * 37} bytes | Hash: PENDING"
+
+
+def produce(rate, seconds, sink):
+    """Calls sink(i) `rate` times a second for `seconds`; returns per-call latencies."""
+    latencies = []
+    start = time.perf_counter()
+    total = int(rate * seconds)
+    for i in range(total):
+        target = start + i / rate
+        while time.perf_counter() < target:
+            time.sleep(0.0005)
+        t = time.perf_counter()
+        sink(i)
+        latencies.append(time.perf_counter() - t)
+    return latencies
+
+
+def tail_ticks(rate, seconds):
+    """Old dashboard: every 2 s, read everything new from the log and split it into lines."""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "file_activity.log")
+        out = open(path, "w", buffering=1)
+        ticks = []
+        done = threading.Event()
+
+        def tk_loop():
+            pos = 0
+            while not done.wait(2.0):
+                t = time.perf_counter()
+                with open(path, "r") as f:
+                    f.seek(pos)
+                    text = f.read()
+                    pos = f.tell()
+                lines = text.splitlines()
+                ticks.append((time.perf_counter() - t, len(lines), len(text)))
+
+        thread = threading.Thread(target=tk_loop)
+        thread.start()
+        latencies = produce(rate, seconds, lambda i: (out.write(line(i) + "\n"), out.flush()))
+        done.set()
+        thread.join()
+        out.close()
+    return ticks, latencies
+
+
+def bus_ticks(rate, seconds):
+    bus = EventBus()
+    events = EventQueue(bus, maxlen=10000)
+    ticks = []
+    done = threading.Event()
+
+    def tk_loop():
+        while not done.wait(DRAIN_INTERVAL_MS / 1000):
+            t = time.perf_counter()
+            batch = events.drain(MAX_EVENTS_PER_FRAME)
+            text = "".join(f"{e['ts']:.0f} - {e['level']} - {e['message']}\n" for e in batch)
+            ticks.append((time.perf_counter() - t, len(batch), len(text)))
+
+    thread = threading.Thread(target=tk_loop)
+    thread.start()
+    latencies = produce(rate, seconds, lambda i: bus.publish("file", line(i)))
+    done.set()
+    thread.join()
+    return ticks, latencies, events.dropped
+
+
+def summary(label, ticks, latencies):
+    latencies.sort()
+    worst = max(ticks, key=lambda t: t[2]) if ticks else (0, 0, 0)
+    print(f"{label:<6} ticks {len(ticks):4d} | worst tick: {worst[1]:7,} lines, {worst[2] / 1024:8.1f} KB, "
+          f"{worst[0] * 1000:6.2f} ms | publish p99 {latencies[int(0.99 * len(latencies))] * 1e6:6.1f} us")
+
+
+if __name__ == "__main__":
+    rate = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    seconds = float(sys.argv[2]) if len(sys.argv) > 2 else 6
+
+    ticks, latencies = tail_ticks(rate, seconds)
+    summary("tail", ticks, latencies)
+    ticks, latencies, dropped = bus_ticks(rate, seconds)
+    summary("bus", ticks, latencies)
+    print(f"bus: {dropped:,} events dropped by the bounded queue (shown as a 'skipped' line)")
@@ -0,0 +1,79 @@
+"""
+Benchmark: query latency of the EventStore on synthetic audit events
+(default 10M events spread over 30 days, hourly segments).
+
+Indexed queries (serial, path prefix) are compared with the type-only query
+that has to decode every record in its time range, which is what grepping
+the old free-text logs amounted to.
+
+Run from the project root:
+    python -m benchmarks.bench_event_store [events] [days]
+"""
+import os
+import sys
+import time
+import random
+import tempfile
+
+from core.event_store import EventStore
+
+FILE_TYPES = ("CREATED", "MODIFIED", "MODIFIED", "DELETED", "MOVED", "HASHED", "HASHED")
+
+
+def populate(store, events, days, devices=500, seed=7):
+    rng = random.Random(seed)
+    serials = [f"SN{i:08X}" for i in range(devices)]
+    start = time.time() - days * 86400
+    step = days * 86400 / events
+    for i in range(events):
+        d = rng.randrange(devices)
+        drive = f"{chr(ord('E') + d % 8)}:"
+        roll = rng.random()
+        if roll < 0.001:
+            store.append("BLOCK", serial=serials[d], drive=drive, detail="Not in allowlist", ts=start + i * step)
+            continue
+        if roll < 0.003:
+            store.append("INSERTION", serial=serials[d], drive=drive, ts=start + i * step)
+            continue
+        path = f"{drive}\\Projects\\p{rng.randrange(200)}\\doc{rng.randrange(5000)}.docx"
+        event_type = rng.choice(FILE_TYPES)
+        store.append(event_type, serial=serials[d], drive=drive, path=path,
+                     dest=path + ".bak" if event_type == "MOVED" else "",
+                     size=rng.randrange(1 << 24), file_hash="%064x" % rng.getrandbits(256) if event_type == "HASHED" else "",
+                     ts=start + i * step)
+    return start, serials
+
+
+def timed(label, store, **query):
+    for run in ("cold", "warm"):
+        if run == "cold":
+            store.index_cache.clear()
+        begin = time.perf_counter()
+        count = sum(1 for _ in store.query(**query))
+        elapsed = time.perf_counter() - begin
+        print(f"  {label:<34} {run}: {elapsed * 1000:9.1f} ms  ({count:,} rows)")
+
+
+if __name__ == "__main__":
+    events = int(sys.argv[1]) if len(sys.argv) > 1 else 10_000_000
+    days = int(sys.argv[2]) if len(sys.argv) > 2 else 30
+
+    with tempfile.TemporaryDirectory() as tmp:
+        store = EventStore(os.path.join(tmp, "events"))
+        begin = time.perf_counter()
+        start, serials = populate(store, events, days)
+        store.close()
+        elapsed = time.perf_counter() - begin
+        stats = store.stats()
+        print(f"{events:,} events in {elapsed:.1f} s ({events / elapsed:,.0f} ev/s), "
+              f"{stats['segments']} segments, {stats['bytes'] / 2**20:,.0f} MB")
+
+        day = start + (days // 2) * 86400
+        store = EventStore(os.path.join(tmp, "events"))
+        timed("serial, first 100", store, serial=serials[17], limit=100)
+        timed("serial, one day", store, serial=serials[17], start=day, end=day + 86400)
+        timed("serial, all time", store, serial=serials[17])
+        timed("path prefix, all time", store, path_prefix="E:\\Projects\\p42\\")
+        timed("serial + path prefix", store, serial=serials[16], path_prefix="E:\\Projects\\p42\\")
+        timed("type=BLOCK (scan), one day", store, event_type="BLOCK", start=day, end=day + 86400)
+        timed("type=BLOCK (scan), all time", store, event_type="BLOCK")
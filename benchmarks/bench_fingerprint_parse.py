@@ -0,0 +1,174 @@
+"""
+Micro-benchmark: PnP device ID parsing and fingerprints, the old
+split-based parser and per-call fingerprint dicts versus the precompiled,
+cached regex parser and interned Fingerprint values.
+
+The corpus mixes the ID shapes Windows reports for removable storage:
+USB\\VID_&PID_ (with serial, and composite &MI_xx interfaces with generated
+instance IDs), USBSTOR, UASPSTOR (mixed case) and SCSI (UAS). "cold" parses
+every ID once with an empty cache; "warm" re-parses a small working set, as
+the inventory sweep and repeated arrivals do. Also reports memory per
+fingerprint, set/dict key cost and how many IDs the two parsers disagree on.
+
+Run from the project root:
+    python -m benchmarks.bench_fingerprint_parse [ids]
+"""
+import sys
+import time
+import random
+import logging
+
+from core.device_identifier import DeviceIdentifier, Fingerprint, _parse, _intern
+
+VENDORS = [
+    ("0781", "SANDISK", "CRUZER_BLADE"), ("0951", "KINGSTON", "DATATRAVELER_3.0"),
+    ("04E8", "SAMSUNG", "PORTABLE_SSD_T5"), ("1058", "WD", "MY_PASSPORT_25E2"),
+    ("0BC2", "SEAGATE", "EXPANSION_HDD"), ("0480", "TOSHIBA", "EXTERNAL_USB_3.0"),
+    ("05DC", "LEXAR", "JUMPDRIVE"), ("154B", "PNY", "USB_2.0_FD"),
+    ("18A5", "VERBATIM", "STORE_N_GO"), ("8564", "JETFLASH", "TRANSCEND_32GB"),
+]
+
+
+def make_ids(count, seed=7):
+    rng = random.Random(seed)
+    ids = []
+    for i in range(count):
+        vid, ven, prod = rng.choice(VENDORS)
+        pid = f"{rng.randrange(0x10000):04X}"
+        serial = f"{rng.getrandbits(64):016X}{i:04X}"
+        generated = f"{rng.randrange(1, 9)}&{rng.getrandbits(28):07X}&0&{rng.randrange(10000):04d}"
+        shape = i % 6
+        if shape == 0:
+            ids.append(f"USB\\VID_{vid}&PID_{pid}\\{serial}")
+        elif shape == 1:
+            ids.append(f"USB\\VID_{vid}&PID_{pid}&MI_0{rng.randrange(3)}\\{generated}")
+        elif shape in (2, 3):
+            ids.append(f"USBSTOR\\DISK&VEN_{ven}&PROD_{prod}&REV_{rng.randrange(10)}.00\\{serial}&0")
+        elif shape == 4:
+            ids.append(f"UASPSTOR\\Disk&Ven_{ven.title()}&Prod_{prod.title()}&Rev_0\\{serial}&{rng.randrange(2)}")
+        else:
+            ids.append(f"SCSI\\DISK&VEN_{ven}&PROD_{prod}\\{generated}")
+    return ids
+
+
+def legacy_parse(pnp_device_id):
+    """Replica of the split-based parse_device_id this module replaced."""
+    fingerprint = {"VendorID": "UNKNOWN", "ProductID": "UNKNOWN", "SerialNumber": "UNKNOWN",
+                   "DeviceID": pnp_device_id}
+    try:
+        if pnp_device_id.startswith("USBSTOR"):
+            parts = pnp_device_id.split('\\')
+            if len(parts) >= 3:
+                props = parts[1]
+                serial = parts[2]
+                if "&" in serial:
+                    serial = serial.split("&")[0]
+                fingerprint["SerialNumber"] = serial
+                if "VEN_" in props:
+                    fingerprint["VendorID"] = props.split("VEN_")[1].split("&")[0]
+                if "PROD_" in props:
+                    fingerprint["ProductID"] = props.split("PROD_")[1].split("&")[0]
+            return fingerprint
+        if pnp_device_id.startswith("USB"):
+            parts = pnp_device_id.split('\\')
+            if len(parts) >= 2:
+                vid_pid = parts[1]
+                serial = parts[2] if len(parts) > 2 else "UNKNOWN"
+                if "VID_" in vid_pid and "PID_" in vid_pid:
+                    fingerprint["VendorID"] = vid_pid.split("VID_")[1].split("&")[0]
+                    fingerprint["ProductID"] = vid_pid.split("PID_")[1]
+                fingerprint["SerialNumber"] = serial
+            return fingerprint
+    except Exception as e:
+        logging.error(f"Error parsing Device ID {pnp_device_id}: {e}")
+    return fingerprint
+
+
+def legacy_fingerprint(info):
+    return {
+        "vendor_id": info.get("VendorID", "UNKNOWN"),
+        "product_id": info.get("ProductID", "UNKNOWN"),
+        "serial_number": info.get("SerialNumber", "UNKNOWN"),
+        "device_name": info.get("DeviceName", "Unknown Device"),
+        "device_id": info.get("DeviceID", "UNKNOWN"),
+    }
+
+
+def new_fingerprint(pnp_id):
+    return DeviceIdentifier.fingerprint_from_id(pnp_id)
+
+
+def old_fingerprint(pnp_id):
+    return legacy_fingerprint(legacy_parse(pnp_id))
+
+
+def per_call_us(fn, ids):
+    t0 = time.perf_counter()
+    for pnp_id in ids:
+        fn(pnp_id)
+    return (time.perf_counter() - t0) / len(ids) * 1e6
+
+
+def clear_caches():
+    _parse.cache_clear()
+    _intern.cache_clear()
+
+
+def deep_size(fingerprint):
+    # Field strings are shared by both forms; count the container only
+    return sys.getsizeof(fingerprint)
+
+
+def run(count):
+    ids = make_ids(count)
+    working_set = ids[:200]
+    rng = random.Random(1)
+    warm = [rng.choice(working_set) for _ in range(count)]
+
+    print(f"{count} distinct PnP IDs, warm set of {len(working_set)} IDs re-parsed {count} times")
+    clear_caches()
+    old_cold = per_call_us(old_fingerprint, ids)
+    new_cold = per_call_us(new_fingerprint, ids)
+    print(f"  cold  parse+fingerprint | split {old_cold:6.2f} us | regex+intern {new_cold:6.2f} us")
+    clear_caches()
+    per_call_us(new_fingerprint, working_set)
+    old_warm = per_call_us(old_fingerprint, warm)
+    new_warm = per_call_us(new_fingerprint, warm)
+    print(f"  warm  parse+fingerprint | split {old_warm:6.2f} us | regex+intern {new_warm:6.2f} us")
+
+    # Memory: the same device seen repeatedly (arrival, volume, sweeps)
+    old_fps = [old_fingerprint(pnp_id) for pnp_id in warm]
+    new_fps = [new_fingerprint(pnp_id) for pnp_id in warm]
+    old_bytes = sum(deep_size(fp) for fp in old_fps)
+    new_bytes = sum(deep_size(fp) for fp in {id(fp): fp for fp in new_fps}.values())
+    print(f"  memory for {len(warm)} fingerprints | dicts {old_bytes / 1024:8.1f} KiB | "
+          f"interned {new_bytes / 1024:6.1f} KiB ({deep_size(new_fps[0])} B each, "
+          f"{len({id(fp) for fp in new_fps})} instances)")
+
+    # Keying: dicts are unhashable, the old code keyed on the serial string
+    t0 = time.perf_counter()
+    seen = set()
+    for fp in old_fps:
+        seen.add((fp["serial_number"], fp["device_id"]))
+    old_key = (time.perf_counter() - t0) / len(old_fps) * 1e6
+    t0 = time.perf_counter()
+    seen = set()
+    for fp in new_fps:
+        seen.add(fp)
+    new_key = (time.perf_counter() - t0) / len(new_fps) * 1e6
+    print(f"  set insert | dict -> (serial, device_id) {old_key:5.3f} us | Fingerprint {new_key:5.3f} us")
+
+    # Compatibility with the old parser on the shapes it understood
+    differ = {}
+    for pnp_id in ids:
+        old = legacy_parse(pnp_id)
+        new = DeviceIdentifier.parse_device_id(pnp_id)
+        if old != new:
+            shape = pnp_id.split("\\")[0].upper() + ("&MI_" if "&MI_" in pnp_id else "")
+            differ[shape] = differ.get(shape, 0) + 1
+    print(f"  differs from the old parser: {sum(differ.values())}/{len(ids)} "
+          f"{dict(sorted(differ.items()))} (new shapes and composite PIDs; all else identical)")
+
+
+if __name__ == "__main__":
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 60_000)
@@ -0,0 +1,86 @@
+"""
+Micro-benchmark: transfer attribution cost per monitor tick, legacy per-drive
+process_iter/open_files scans vs. one shared OpenHandleIndex refresh.
+
+Run from the project root:
+    python -m benchmarks.bench_handle_index [drives] [open_files]
+
+Every process on the host is treated as a target app (a busy workstation),
+and this process holds `open_files` files spread over `drives` fake volumes.
+"""
+import os
+import sys
+import time
+import tempfile
+
+import psutil
+
+from core.handle_index import OpenHandleIndex
+
+
+def legacy_tick(roots, target_apps):
+    """What the old code did per tick: a full scan per drive plus open_files() again for destinations."""
+    for root in roots:
+        found = {}
+        for proc in psutil.process_iter(['pid', 'name']):
+            try:
+                if (proc.info['name'] or '').lower() not in target_apps:
+                    continue
+                files = [f.path for f in proc.open_files() if f.path.startswith(root)]
+                if files:
+                    found[proc.info['pid']] = proc
+            except Exception:
+                continue
+        for proc in found.values():
+            try:
+                [f.path for f in proc.open_files() if not f.path.startswith(root)]
+            except Exception:
+                pass
+
+
+def index_tick(index, volumes):
+    index.refresh(force=True)
+    for volume in volumes:
+        procs = index.files_on(volume)
+        for pid in procs:
+            index.files_off(pid, volume)
+
+
+def timed(fn, rounds=20):
+    start = time.perf_counter()
+    for _ in range(rounds):
+        fn()
+    return (time.perf_counter() - start) / rounds * 1000
+
+
+if __name__ == "__main__":
+    drives = int(sys.argv[1]) if len(sys.argv) > 1 else 4
+    per_drive = (int(sys.argv[2]) if len(sys.argv) > 2 else 200) // drives
+
+    target_apps = set()
+    for proc in psutil.process_iter(['name']):
+        if proc.info['name']:
+            target_apps.add(proc.info['name'].lower())
+
+    with tempfile.TemporaryDirectory() as tmp:
+        roots, handles = [], []
+        for d in range(drives):
+            root = os.path.join(tmp, f"vol{d}") + os.sep
+            os.makedirs(root)
+            roots.append(root)
+            handles += [open(os.path.join(root, f"f{i}"), "wb") for i in range(per_drive)]
+
+        index = OpenHandleIndex(target_apps=target_apps)
+        volumes = [f"V{d}:" for d in range(drives)]
+        for volume, root in zip(volumes, roots):
+            index.add_volume(volume, root)
+        index.refresh(force=True)
+
+        legacy = timed(lambda: legacy_tick(roots, target_apps))
+        shared = timed(lambda: index_tick(index, volumes))
+        for h in handles:
+            h.close()
+
+    print(f"{len(target_apps)} target apps, {drives} drives, {per_drive * drives} open files")
+    print(f"legacy per-drive scans : {legacy:8.2f} ms/tick (x10 per burst in the old loop)")
+    print(f"shared handle index    : {shared:8.2f} ms/tick")
@@ -0,0 +1,68 @@
+"""
+Benchmark: re-hashing a folder of unchanged files (e.g. the same stick
+reconnected) with and without the persistent HashCache.
+
+Run from the project root:
+    python -m benchmarks.bench_hash_cache [files] [size_kb]
+"""
+import os
+import sys
+import time
+import tempfile
+
+from core.hash_cache import HashCache
+from core.hashing_service import HashingService
+
+
+VOLUME_KEY = "BENCHSERIAL/1234-ABCD"
+
+
+def hash_all(paths, service, cache):
+    """Hashes like HashingService._hash_job does: cache lookup first, store on miss."""
+    read = 0
+    for path in paths:
+        st = os.stat(path)
+        key = (VOLUME_KEY, os.path.basename(path), st.st_size, st.st_mtime_ns)
+        if cache and cache.lookup(*key):
+            continue
+        digest = service.hash_file(path)
+        read += st.st_size
+        if cache:
+            cache.store(*key, digest)
+    return read
+
+
+if __name__ == "__main__":
+    files = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    size_kb = int(sys.argv[2]) if len(sys.argv) > 2 else 256
+
+    with tempfile.TemporaryDirectory() as tmp:
+        paths = []
+        block = os.urandom(size_kb * 1024)
+        for i in range(files):
+            path = os.path.join(tmp, f"file{i:05d}.bin")
+            with open(path, "wb") as f:
+                f.write(block)
+            paths.append(path)
+
+        service = HashingService(lambda *args: None)
+        cache = HashCache(os.path.join(tmp, "hash_cache.db"))
+
+        for label, c in (("no cache        ", None), ("cold cache      ", cache), ("warm cache      ", cache)):
+            start = time.perf_counter()
+            read = hash_all(paths, service, c)
+            elapsed = time.perf_counter() - start
+            print(f"{label}: {elapsed:6.2f} s, {read // (1024 * 1024):6d} MB read from disk")
+
+        # Renames: the hash follows the file without re-reading it
+        start = time.perf_counter()
+        for path in paths:
+            name = os.path.basename(path)
+            cache.move(VOLUME_KEY, name, name + ".moved")
+        renamed = [p + ".moved" for p in paths]
+        for p in paths:
+            os.rename(p, p + ".moved")
+        read = hash_all(renamed, service, cache)
+        print(f"after rename    : {time.perf_counter() - start:6.2f} s, {read // (1024 * 1024):6d} MB read from disk")
+        print(cache.stats())
+        cache.close()
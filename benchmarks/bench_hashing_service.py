@@ -0,0 +1,65 @@
+"""
+Benchmark: hashing work caused by one growing file, the old synchronous
+4 KB re-hash on every modification vs. the debounced HashingService.
+
+Run from the project root:
+    python -m benchmarks.bench_hashing_service [size_mb] [chunk_mb]
+
+The file grows by `chunk_mb` per modification event, as a copy onto a
+USB stick would.
+"""
+import os
+import sys
+import time
+import hashlib
+import tempfile
+
+from core.hashing_service import HashingService
+
+
+def legacy_hash(path):
+    sha256_hash = hashlib.sha256()
+    with open(path, "rb") as f:
+        for byte_block in iter(lambda: f.read(4096), b""):
+            sha256_hash.update(byte_block)
+    return sha256_hash.hexdigest()
+
+
+def grow(path, size_mb, chunk_mb, on_modified):
+    """Writes the file chunk by chunk; returns total seconds spent inside on_modified."""
+    block = os.urandom(chunk_mb * 1024 * 1024)
+    spent = 0.0
+    with open(path, "wb") as f:
+        for _ in range(size_mb // chunk_mb):
+            f.write(block)
+            f.flush()
+            start = time.perf_counter()
+            on_modified(path)
+            spent += time.perf_counter() - start
+    return spent
+
+
+if __name__ == "__main__":
+    size_mb = int(sys.argv[1]) if len(sys.argv) > 1 else 256
+    chunk_mb = int(sys.argv[2]) if len(sys.argv) > 2 else 8
+    events = size_mb // chunk_mb
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "growing.bin")
+
+        blocked = grow(path, size_mb, chunk_mb, legacy_hash)
+        print(f"legacy : {events} events, {blocked:6.2f} s blocking the watchdog thread, "
+              f"{events * (events + 1) // 2 * chunk_mb} MB hashed")
+
+        done = []
+        service = HashingService(lambda *args: done.append(args), quiet_period=0.5)
+        service.start()
+        start = time.perf_counter()
+        blocked = grow(path, size_mb, chunk_mb, service.submit)
+        service.wait_idle()
+        total = time.perf_counter() - start
+        stats = service.stats()
+        service.stop()
+        print(f"service: {events} events, {blocked * 1000:6.2f} ms blocking the watchdog thread, "
+              f"{stats['bytes_hashed'] // (1024 * 1024)} MB hashed ({stats['hashed']} hash, "
+              f"{stats['coalesced']} coalesced), result after {total:.2f} s incl. {service.quiet_period} s quiet period")
@@ -0,0 +1,125 @@
+"""
+Harness + benchmark for the insertion pipeline.
+
+Feeds synthetic Win32_VolumeChangeEvent objects through a fake WMI event source
+into pump_volume_events(), exactly as USBMonitor.monitor_loop does, with handlers
+that sleep like the real WMI resolution and PowerShell enforcement. Checks that
+events for the same drive letter are never reordered and reports the time until
+the last drive of a hub is handled, inline vs. pipelined.
+
+Run from the project root:
+    python -m benchmarks.bench_insertion_pipeline
+"""
+import time
+import random
+import threading
+from collections import deque, defaultdict
+
+from core.insertion_pipeline import InsertionPipeline, EVENT_INSERT, EVENT_REMOVE, pump_volume_events
+
+
+class FakeVolumeEvent:
+    def __init__(self, event_type, drive_name):
+        self.EventType = event_type
+        self.DriveName = drive_name
+
+
+class FakeWmiWatcher:
+    """Mimics SWbemEventSource.NextEvent: returns queued events or raises 'Timed out'."""
+
+    def __init__(self, events):
+        self.events = deque(events)
+
+    def NextEvent(self, timeout_ms):
+        if not self.events:
+            time.sleep(min(timeout_ms, 10) / 1000.0)
+            raise Exception("Timed out")
+        return self.events.popleft()
+
+
+def hub_trace(drives, cycles):
+    """Every drive inserted, then removed, `cycles` times; drives interleaved."""
+    events = []
+    for _ in range(cycles):
+        for d in drives:
+            events.append(FakeVolumeEvent(EVENT_INSERT, d))
+        for d in drives:
+            events.append(FakeVolumeEvent(EVENT_REMOVE, d))
+    return events
+
+
+class RecordingHandlers:
+    def __init__(self, insert_cost, remove_cost):
+        self.insert_cost = insert_cost
+        self.remove_cost = remove_cost
+        self.lock = threading.Lock()
+        self.seen = defaultdict(list)
+        self.finished_at = {}
+
+    def on_insert(self, drive):
+        # sleep(1)-free stand-in: WMI resolution + enforcement, with jitter
+        time.sleep(self.insert_cost * random.uniform(0.5, 1.5))
+        with self.lock:
+            self.seen[drive].append(EVENT_INSERT)
+            # First insert per drive = time-to-handle for the initial hub plug-in
+            self.finished_at.setdefault(drive, time.perf_counter())
+
+    def on_remove(self, drive):
+        time.sleep(self.remove_cost)
+        with self.lock:
+            self.seen[drive].append(EVENT_REMOVE)
+
+    def check_ordering(self, drives, cycles):
+        expected = [EVENT_INSERT, EVENT_REMOVE] * cycles
+        return all(self.seen[d] == expected for d in drives)
+
+
+def run_inline(drives, insert_cost, remove_cost):
+    handlers = RecordingHandlers(insert_cost, remove_cost)
+    start = time.perf_counter()
+    for event in hub_trace(drives, 1):
+        if event.EventType == EVENT_INSERT:
+            handlers.on_insert(event.DriveName)
+        else:
+            handlers.on_remove(event.DriveName)
+    return max(handlers.finished_at.values()) - start
+
+
+def run_pipeline(drives, cycles, insert_cost, remove_cost, workers):
+    handlers = RecordingHandlers(insert_cost, remove_cost)
+    pipeline = InsertionPipeline(handlers.on_insert, handlers.on_remove, workers=workers)
+    pipeline.start()
+
+    watcher = FakeWmiWatcher(hub_trace(drives, cycles))
+    running = threading.Event()
+    running.set()
+    pump = threading.Thread(target=pump_volume_events,
+                            args=(watcher, pipeline, running.is_set, 100), daemon=True)
+    start = time.perf_counter()
+    pump.start()
+
+    while watcher.events:
+        time.sleep(0.001)
+    pipeline.join()
+    first_plug = max(handlers.finished_at.values()) - start
+    running.clear()
+    pump.join()
+
+    stats = pipeline.stats()
+    pipeline.stop()
+    return first_plug, handlers.check_ordering(drives, cycles), stats
+
+
+if __name__ == "__main__":
+    drives = [f"{chr(ord('E') + i)}:" for i in range(8)]
+    insert_cost, remove_cost = 0.4, 0.01
+
+    inline = run_inline(drives, insert_cost, remove_cost)
+    print(f"Inline (old monitor_loop): last of {len(drives)} drives handled after {inline:.2f} s")
+
+    for workers in (2, 4, 8):
+        first_plug, ordered, stats = run_pipeline(drives, 3, insert_cost, remove_cost, workers)
+        wait = stats['stages']['queue_wait']
+        print(f"Pipeline workers={workers}: last of {len(drives)} drives handled after {first_plug:.2f} s | "
+              f"max depth {stats['max_queue_depth']} | queue_wait p95 {wait['p95_ms']:.1f} ms | "
+              f"per-drive ordering {'OK' if ordered else 'VIOLATED'}")
@@ -0,0 +1,74 @@
+"""
+Benchmark: the LogBuffer behind the dashboard's virtualized log views.
+Appends a day's worth of file-activity lines into a capped ring, then times
+filter searches (index-backed fields vs. free text) and the cost of building
+one visible window. Runs headless (no Tk).
+
+Run from the project root:
+    python -m benchmarks.bench_log_view [lines] [max_lines]
+"""
+import sys
+import time
+import random
+import tracemalloc
+
+from gui.log_buffer import LogBuffer, LogFilter
+
+TYPES = ("CREATED", "MODIFIED", "MODIFIED", "DELETED", "MOVED", "HASHED")
+
+
+def fill(buffer, lines, seed=3):
+    rng = random.Random(seed)
+    for i in range(lines):
+        d = rng.randrange(40)
+        drive = f"{chr(ord('E') + d % 8)}:"
+        event_type = rng.choice(TYPES)
+        buffer.append(1.7e9 + i * 0.1, "WARNING" if i % 997 == 0 else "INFO",
+                      f"Event: {event_type} | Path: {drive}\\Projects\\p{rng.randrange(200)}\\doc{i}.docx | Size: {i * 37} bytes",
+                      drive, f"SN{d:08X}", event_type)
+
+
+def window(buffer, top, height=40):
+    """What LogView.render formats for one frame."""
+    lines = []
+    for seq in range(top, top + height):
+        entry = buffer.get(seq)
+        if entry is not None:
+            lines.append(f"{time.strftime('%H:%M:%S', time.localtime(entry.ts))} - {entry.level} - {entry.message}\n")
+    return "".join(lines)
+
+
+if __name__ == "__main__":
+    lines = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    max_lines = int(sys.argv[2]) if len(sys.argv) > 2 else 100_000
+
+    buffer = LogBuffer(max_lines)
+    start = time.perf_counter()
+    fill(buffer, lines)
+    elapsed = time.perf_counter() - start
+
+    # Memory in a separate run: tracemalloc slows every allocation down
+    tracemalloc.start()
+    full = LogBuffer(max_lines)
+    fill(full, max_lines * 2)
+    current, _ = tracemalloc.get_traced_memory()
+    del full
+    tracemalloc.stop()
+    print(f"{lines:,} appends into a {max_lines:,}-line ring: {elapsed:.2f} s "
+          f"({elapsed / lines * 1e6:.1f} us/line), {len(buffer):,} retained, {current / 2**20:.0f} MB when full")
+
+    for label, log_filter in (
+            ("serial", LogFilter(serial="SN00000011")),
+            ("drive + type", LogFilter(drive="F:", event_type="deleted")),
+            ("text", LogFilter(text="\\p42\\")),
+            ("text (cached lowercase)", LogFilter(text="\\p42\\")),
+            ("serial + text", LogFilter(text="\\p42\\", serial="SN00000011"))):
+        start = time.perf_counter()
+        matches, upto = buffer.search(log_filter)
+        print(f"  search {label:<24} {(time.perf_counter() - start) * 1000:7.1f} ms  ({len(matches):,} matches)")
+
+    start = time.perf_counter()
+    for top in range(buffer.first_seq, buffer.next_seq - 40, max(1, len(buffer) // 1000)):
+        window(buffer, top)
+    frames = len(range(buffer.first_seq, buffer.next_seq - 40, max(1, len(buffer) // 1000)))
+    print(f"  visible window (40 rows) {(time.perf_counter() - start) / frames * 1e6:7.1f} us per frame")
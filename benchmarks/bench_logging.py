@@ -0,0 +1,104 @@
+"""
+Benchmark: per-call latency of logging.getLogger("file_activity").info()
+from several threads, with the previous basicConfig setup (FileHandler +
+StreamHandler, a flush per line under the handler lock) and with the queued
+pipeline from core.log_pipeline. stdout is sent to os.devnull for both.
+
+Run from the project root:
+    python -m benchmarks.bench_logging [threads] [calls_per_thread]
+"""
+import os
+import sys
+import time
+import logging
+import tempfile
+import threading
+
+from core.log_pipeline import configure_logging
+
+
+def reset_root():
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+        handler.close()
+
+
+def legacy_setup(log_dir):
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(levelname)s - %(message)s',
+        handlers=[
+            logging.FileHandler(os.path.join(log_dir, "usb_events.log")),
+            logging.StreamHandler(sys.stdout)
+        ],
+        force=True,
+    )
+
+
+def hammer(threads, calls):
+    """Returns sorted per-call latencies (seconds) across all threads."""
+    log = logging.getLogger("file_activity")
+    results = []
+    barrier = threading.Barrier(threads)
+
+    def worker(n):
+        latencies = []
+        barrier.wait()
+        for i in range(calls):
+            start = time.perf_counter()
+            log.info(f"Event: MODIFIED | Path: E:\\Projects\\p{n}\\doc{i}.docx | Size: {i * 37} bytes | Hash: PENDING")
+            latencies.append(time.perf_counter() - start)
+        results.append(latencies)
+
+    workers = [threading.Thread(target=worker, args=(n,)) for n in range(threads)]
+    for t in workers:
+        t.start()
+    for t in workers:
+        t.join()
+    return sorted(x for r in results for x in r)
+
+
+def report(label, latencies, wall):
+    pct = lambda p: latencies[min(len(latencies) - 1, int(p * len(latencies)))] * 1e6
+    print(f"{label:<10} p50 {pct(0.50):7.1f} us | p99 {pct(0.99):8.1f} us | max {latencies[-1] * 1e3:7.2f} ms | "
+          f"{len(latencies) / wall:,.0f} calls/s")
+
+
+if __name__ == "__main__":
+    threads = int(sys.argv[1]) if len(sys.argv) > 1 else 4
+    calls = int(sys.argv[2]) if len(sys.argv) > 2 else 20000
+
+    real_stdout = sys.stdout
+    with tempfile.TemporaryDirectory() as tmp, open(os.devnull, "w") as devnull:
+        sys.stdout = devnull
+        try:
+            legacy_setup(tmp)
+            start = time.perf_counter()
+            legacy = hammer(threads, calls)
+            legacy_wall = time.perf_counter() - start
+            reset_root()
+
+            for queue_size in (100000, 1000):
+                pipeline = configure_logging({
+                    "log_usb_events": os.path.join(tmp, "q_usb_events.log"),
+                    "log_file_activity": os.path.join(tmp, f"q_file_activity_{queue_size}.log"),
+                    "log_alerts": os.path.join(tmp, "q_alerts.log"),
+                    "log_queue_size": queue_size,
+                })
+                start = time.perf_counter()
+                queued = hammer(threads, calls)
+                queued_wall = time.perf_counter() - start
+                pipeline.stop()
+                stats = pipeline.stats()
+                with open(os.path.join(tmp, f"q_file_activity_{queue_size}.log"), encoding="utf-8") as f:
+                    written = sum(1 for _ in f)
+                sys.stdout = real_stdout
+                if queue_size == 100000:
+                    print(f"{threads} threads x {calls} calls")
+                    report("basicConfig", legacy, legacy_wall)
+                report(f"queue={queue_size}", queued, queued_wall)
+                print(f"{'':<10} written {written:,} | dropped {stats['dropped']:,}")
+                sys.stdout = devnull
+        finally:
+            sys.stdout = real_stdout
@@ -0,0 +1,79 @@
+"""
+Contention benchmark: N producer threads hammer update_stat concurrently.
+Compares the old unlocked dict (`stats[key] += 1`) with the sharded
+MetricsRegistry behind Reporter: increments lost and throughput, while a
+reader keeps taking snapshots.
+
+Whether the unlocked dict actually loses increments depends on the
+interpreter (a read-modify-write that is not atomic: older CPythons and
+free-threaded builds lose counts, CPython 3.11+ with the GIL rarely does);
+the sharded counters have a single writer per shard and are exact anywhere.
+
+Run from the project root:
+    python -m benchmarks.bench_metrics_contention [threads] [increments_per_thread]
+"""
+import sys
+import time
+import threading
+
+from core.reporter import Reporter
+
+
+class LegacyStats:
+    """The pre-metrics Reporter.update_stat."""
+
+    def __init__(self):
+        self.stats = {"files_modified": 0}
+
+    def update_stat(self, key, increment=1, **dimensions):
+        if key in self.stats:
+            self.stats[key] += increment
+
+
+def hammer(reporter, threads, per_thread):
+    barrier = threading.Barrier(threads + 1)
+
+    def produce(i):
+        barrier.wait()
+        for _ in range(per_thread):
+            reporter.update_stat("files_modified", drive=f"D{i % 4}:")
+
+    workers = [threading.Thread(target=produce, args=(i,)) for i in range(threads)]
+    for w in workers:
+        w.start()
+    barrier.wait()
+    start = time.perf_counter()
+    for w in workers:
+        w.join()
+    return time.perf_counter() - start
+
+
+def reader(reporter, stop, reads):
+    while not stop.is_set():
+        reporter.stats
+        reads[0] += 1
+
+
+if __name__ == "__main__":
+    threads = int(sys.argv[1]) if len(sys.argv) > 1 else 16
+    per_thread = int(sys.argv[2]) if len(sys.argv) > 2 else 100000
+    expected = threads * per_thread
+
+    legacy = LegacyStats()
+    elapsed = hammer(legacy, threads, per_thread)
+    lost = expected - legacy.stats["files_modified"]
+    print(f"legacy dict : {expected / elapsed:12,.0f} inc/s, lost {lost} of {expected}")
+
+    reporter = Reporter("reports/bench.txt")
+    stop, reads = threading.Event(), [0]
+    snapshotter = threading.Thread(target=reader, args=(reporter, stop, reads))
+    snapshotter.start() # a dashboard polling stats the whole time
+    elapsed = hammer(reporter, threads, per_thread)
+    stop.set()
+    snapshotter.join()
+    snap = reporter.get_metrics_snapshot()
+    got = snap["totals"]["files_modified"]
+    per_drive = sum(d["files_modified"] for d in snap["by_drive"].values())
+    print(f"metrics     : {expected / elapsed:12,.0f} inc/s, lost {expected - got} of {expected} "
+          f"(per-drive sum {per_drive}), {reads[0]} concurrent snapshots")
+    print(f"last minute bucket: {snap['per_minute']['files_modified'][-1][1]}")
@@ -0,0 +1,78 @@
+"""
+Benchmark: time-to-block for unknown sticks, fixed mount-settle sleep
+(the old handle_insertion: sleep 1 s, then resolve once) versus probing the
+volume -> device mapping with exponential backoff.
+
+The simulator backend keeps each new volume unresolvable for `mount_ms`, as
+Windows does until LogicalDisk -> partition -> disk drive is published.
+Percentiles come from the reporter's time_to_block histogram (interpolated
+within buckets), i.e. what the final report shows. Pre-mount blocking on
+device arrival is switched off so the volume path is measured.
+
+Run from the project root:
+    python -m benchmarks.bench_mount_readiness [sticks]
+"""
+import os
+import sys
+import time
+import logging
+import tempfile
+
+from core.event_bus import EventBus, set_event_bus
+from core.reporter import Reporter
+from core.usb_monitor import USBMonitor
+from core.insertion_pipeline import EVENT_INSERT
+from core.backends.simulator import SimulatedEventSource
+
+MOUNT_MS = (5, 50, 250, 1500)
+SETTLE = 1.0
+
+
+class FixedSettle(SimulatedEventSource):
+    """The old behaviour: one sleep, one resolution attempt."""
+
+    def probe_volume(self, volume):
+        time.sleep(SETTLE)
+        return self.resolve_volume(volume)
+
+
+def run(backend_cls, sticks, mount_latency):
+    set_event_bus(EventBus())
+    backend = backend_cls(mount_latency=mount_latency, resolve_latency=0.002)
+    reporter = Reporter(os.path.join("reports", "bench.txt"))
+    monitor = USBMonitor({"settings": {"insertion_workers": sticks}}, reporter, backend=backend)
+    # Volume path only (what backends without device events rely on)
+    monitor.inventory.listeners.remove(monitor.on_inventory_change)
+    monitor.start()
+    monitor.scan_thread.join()
+
+    for i in range(sticks):
+        volume = f"{chr(ord('E') + i)}:"
+        backend.attach(f"USBSTOR\\DISK&VEN_SIM&PROD_STICK&REV_1.00\\MNT{i:04d}&0", volume)
+        monitor.pipeline.submit(EVENT_INSERT, volume)
+    monitor.pipeline.join(timeout=30)
+    monitor.stop()
+    return reporter.get_metrics_snapshot()["latencies"].get("time_to_block"), backend.counters['disabled']
+
+
+if __name__ == "__main__":
+    sticks = int(sys.argv[1]) if len(sys.argv) > 1 else 8
+    logging.disable(logging.WARNING) # unauthorized-device alerts
+
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as tmp:
+        os.chdir(tmp) # policy files and event store stay out of the tree
+        try:
+            print(f"{sticks} unknown sticks inserted at once; time to block (ms)")
+            print(f"{'mount':>7} | {'fixed 1 s sleep':^30} | {'backoff probe':^30}")
+            for mount_ms in MOUNT_MS:
+                cells = []
+                for backend_cls in (FixedSettle, SimulatedEventSource):
+                    h, blocked = run(backend_cls, sticks, mount_ms / 1000)
+                    if h:
+                        cells.append(f"p50 {h['p50_ms']:5.0f} p99 {h['p99_ms']:5.0f} {blocked:2d}/{sticks} blocked")
+                    else:
+                        cells.append(f"{'none resolved':>20}  0/{sticks} blocked")
+                print(f"{mount_ms:5d}ms | {cells[0]:>30} | {cells[1]:>30}")
+        finally:
+            os.chdir(cwd)
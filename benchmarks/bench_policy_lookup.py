@@ -0,0 +1,99 @@
+"""
+Micro-benchmark: policy lookup latency, indexed PolicyEngine vs. the old
+reload-and-linear-scan in USBMonitor.is_allowed, plus the cost of one
+allow/block toggle through the PolicyStore journal.
+
+Run from the project root:
+    python -m benchmarks.bench_policy_lookup
+"""
+import os
+import json
+import time
+import random
+import tempfile
+
+from core.policy_store import PolicyStore
+from core.policy_engine import PolicyEngine
+
+
+def make_entries(count, prefix):
+    return [{
+        "vendor_id": f"VEN{i % 97:04d}",
+        "product_id": f"PROD{i % 13:04d}",
+        "serial_number": f"{prefix}{i:08d}",
+        "device_name": f"Bench Device {i}",
+        "device_id": f"USBSTOR\\DISK&VEN_V&PROD_P&REV_1.00\\{prefix}{i:08d}&0",
+    } for i in range(count)]
+
+
+def linear_scan(allow_path, block_path, fingerprint):
+    """Replica of the pre-PolicyEngine is_allowed(): reload both files, then scan."""
+    with open(allow_path, "r") as f:
+        allowed_list = json.load(f).get("allowed_devices", [])
+    with open(block_path, "r") as f:
+        blocked_list = json.load(f).get("blocked_devices", [])
+
+    serial = fingerprint.get("serial_number")
+    for dev in blocked_list:
+        if dev.get("serial_number") == serial:
+            return False, "BLOCKED_BY_POLICY"
+    for dev in allowed_list:
+        if dev.get("serial_number") == serial:
+            return True, "ALLOWED"
+    return False, "UNKNOWN_DEVICE"
+
+
+def time_lookups(fn, fingerprints):
+    samples = []
+    for fp in fingerprints:
+        t0 = time.perf_counter()
+        fn(fp)
+        samples.append(time.perf_counter() - t0)
+    samples.sort()
+    return samples[len(samples) // 2], samples[int(len(samples) * 0.99) - 1]
+
+
+def run(size, lookups):
+    with tempfile.TemporaryDirectory() as tmp:
+        allow_path = os.path.join(tmp, "allowlist.json")
+        block_path = os.path.join(tmp, "blocklist.json")
+        with open(allow_path, "w") as f:
+            json.dump({"allowed_devices": make_entries(size, "A")}, f, indent=4)
+        with open(block_path, "w") as f:
+            json.dump({"blocked_devices": make_entries(size, "B")}, f, indent=4)
+
+        # Mix of hits in either list and misses
+        serials = ([f"A{random.randrange(size):08d}" for _ in range(lookups // 3)]
+                   + [f"B{random.randrange(size):08d}" for _ in range(lookups // 3)]
+                   + [f"MISS{i}" for i in range(lookups - 2 * (lookups // 3))])
+        random.shuffle(serials)
+        fingerprints = [{"serial_number": s} for s in serials]
+
+        t0 = time.perf_counter()
+        store = PolicyStore(config_dir=tmp)
+        engine = PolicyEngine(store)
+        engine.refresh()
+        build = time.perf_counter() - t0
+
+        idx_p50, idx_p99 = time_lookups(engine.evaluate, fingerprints)
+        # Linear scan is slow at 100k; a handful of samples is enough
+        lin_p50, lin_p99 = time_lookups(lambda fp: linear_scan(allow_path, block_path, fp),
+                                        fingerprints[:max(5, lookups // 200)])
+
+        # Toggle cost: one journal append instead of rewriting both files
+        t0 = time.perf_counter()
+        toggles = 200
+        for i in range(toggles):
+            store.block({"serial_number": f"A{i:08d}"})
+        toggle = (time.perf_counter() - t0) / toggles
+        store.close()
+
+        print(f"{size:>7} entries/list | load+index {build * 1e3:8.1f} ms | "
+              f"indexed p50 {idx_p50 * 1e6:7.1f} us p99 {idx_p99 * 1e6:7.1f} us | "
+              f"linear p50 {lin_p50 * 1e3:8.1f} ms p99 {lin_p99 * 1e3:8.1f} ms | "
+              f"toggle {toggle * 1e3:6.2f} ms")
+
+
+if __name__ == "__main__":
+    for size in (10_000, 100_000):
+        run(size, lookups=3000)
@@ -0,0 +1,93 @@
+"""
+Benchmark: blocking unknown sticks on PnP device arrival (pre-mount)
+versus on the volume event (the filesystem is already mounted by then).
+
+Each simulated stick appears as a device first and gets its volume
+`mount_ms` later, when the volume event is delivered; a few sticks are
+unformatted and never get a volume. Reports time from device arrival to
+block, how many sticks had a mounted volume before they were blocked, and
+how many were never blocked.
+
+Run from the project root:
+    python -m benchmarks.bench_premount_block [sticks] [unformatted] [mount_ms]
+"""
+import os
+import sys
+import time
+import logging
+import tempfile
+import threading
+
+from core.event_bus import EventBus, EventQueue, set_event_bus
+from core.reporter import Reporter
+from core.usb_monitor import USBMonitor
+from core.insertion_pipeline import EVENT_INSERT
+from core.backends.simulator import SimulatedEventSource
+
+
+def run(sticks, unformatted, mount_latency, pre_mount):
+    bus = EventBus()
+    set_event_bus(bus)
+    events = EventQueue(bus, topics=("usb",))
+    backend = SimulatedEventSource(resolve_latency=0.01, enforce_latency=0.02)
+    monitor = USBMonitor({"settings": {"insertion_workers": 4}}, Reporter(os.path.join("reports", "bench.txt")),
+                         backend=backend)
+    if not pre_mount:
+        monitor.inventory.listeners.remove(monitor.on_inventory_change) # volume events only
+    monitor.start()
+    monitor.scan_thread.join()
+
+    arrived, mounted = {}, {}
+    timers = []
+    for i in range(sticks + unformatted):
+        serial = f"PRE{i:04d}"
+        device_id = f"USBSTOR\\DISK&VEN_SIM&PROD_STICK&REV_1.00\\{serial}&0"
+        volume = f"{chr(ord('E') + i)}:" if i < sticks else None
+        arrived[serial] = time.perf_counter()
+        backend.attach(device_id) # PnP entity first
+        if volume:
+            def mount(device_id=device_id, volume=volume, serial=serial):
+                backend.attach(device_id, volume) # same device, now with its volume
+                mounted[serial] = time.perf_counter()
+                monitor.pipeline.submit(EVENT_INSERT, volume)
+            timer = threading.Timer(mount_latency, mount)
+            timer.start()
+            timers.append(timer)
+
+    blocked = {}
+    deadline = time.perf_counter() + mount_latency + 5
+    while len(blocked) < sticks + unformatted and time.perf_counter() < deadline:
+        for event in events.drain(100):
+            if event.get("event_type") == "BLOCK":
+                blocked.setdefault(event.get("serial"), time.perf_counter())
+        time.sleep(0.001)
+    for timer in timers:
+        timer.join()
+    monitor.stop()
+
+    latencies = sorted((blocked[s] - arrived[s]) * 1000 for s in blocked)
+    exposed = sum(1 for s, t in mounted.items() if s not in blocked or blocked[s] > t)
+    return latencies, exposed, sticks + unformatted - len(blocked)
+
+
+if __name__ == "__main__":
+    sticks = int(sys.argv[1]) if len(sys.argv) > 1 else 8
+    unformatted = int(sys.argv[2]) if len(sys.argv) > 2 else 2
+    mount_ms = float(sys.argv[3]) if len(sys.argv) > 3 else 300
+    logging.disable(logging.WARNING) # unauthorized-device alerts
+
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as tmp:
+        os.chdir(tmp) # policy files and event store stay out of the tree
+        try:
+            print(f"{sticks} unknown sticks (volume mounts {mount_ms:.0f} ms after arrival) + {unformatted} unformatted")
+            for label, pre_mount in (("on volume event", False), ("on device arrival", True)):
+                latencies, exposed, missed = run(sticks, unformatted, mount_ms / 1000, pre_mount)
+                if latencies:
+                    p50 = latencies[len(latencies) // 2]
+                    print(f"  {label:<18} arrival->block p50 {p50:6.0f} ms max {latencies[-1]:6.0f} ms | "
+                          f"mounted before block {exposed}/{sticks} | never blocked {missed}")
+                else:
+                    print(f"  {label:<18} nothing blocked")
+        finally:
+            os.chdir(cwd)
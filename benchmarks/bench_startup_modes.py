@@ -0,0 +1,98 @@
+"""
+Benchmark: start-up time and resident memory of the headless daemon
+(python -m core.daemon) versus the dashboard's import stacks: embedded
+(app.py running USBMonitor in-process, customtkinter included) and thin
+client (app.py attached to a daemon over the control API).
+
+The daemon is timed from spawn until its control API answers "status".
+The dashboard modes are measured as the processes that import each stack,
+because showing a window needs a display. Each process runs in a scratch
+directory with the simulator backend.
+
+Run from the project root:
+    python -m benchmarks.bench_startup_modes [runs]
+"""
+import os
+import sys
+import time
+import tempfile
+import subprocess
+
+import psutil
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+STACKS = {
+    "embedded GUI": "import customtkinter, gui.dashboard, core.usb_monitor, core.log_pipeline",
+    "thin client": "import customtkinter, gui.dashboard, core.control_api",
+    "embedded (no Tk)": "import core.usb_monitor, core.log_pipeline",
+    "thin client (no Tk)": "import core.control_api",
+}
+
+
+def env():
+    e = dict(os.environ)
+    e["PYTHONPATH"] = ROOT + os.pathsep + e.get("PYTHONPATH", "")
+    return e
+
+
+def time_daemon(workdir):
+    from core.control_api import ControlClient, load_authkey
+
+    start = time.perf_counter()
+    proc = subprocess.Popen([sys.executable, "-m", "core.daemon", "--backend", "simulator"], cwd=workdir, env=env(),
+                            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    address = os.path.join(workdir, "run", "control.sock") if sys.platform != "win32" else None
+    client = None
+    try:
+        while client is None:
+            if proc.poll() is not None:
+                raise RuntimeError("daemon exited during start-up")
+            try:
+                client = ControlClient(address, authkey=load_authkey(os.path.join(workdir, "run", "control.key")))
+                client.call("status")
+            except Exception:
+                client = None
+                time.sleep(0.005)
+        ready = time.perf_counter() - start
+        time.sleep(1.0) # let the start-up threads settle
+        rss = psutil.Process(proc.pid).memory_info().rss
+        client.call("daemon.shutdown")
+        client.close()
+        proc.wait(timeout=10)
+        return ready, rss
+    finally:
+        if proc.poll() is None:
+            proc.kill()
+
+
+def time_stack(code, workdir):
+    script = f"import time, psutil; t = time.perf_counter(); {code}; " \
+             f"print(time.perf_counter() - t, psutil.Process().memory_info().rss)"
+    start = time.perf_counter()
+    result = subprocess.run([sys.executable, "-c", script], cwd=workdir, env=env(), capture_output=True, text=True)
+    total = time.perf_counter() - start
+    if result.returncode != 0:
+        return None
+    imports, rss = result.stdout.split()
+    return total, float(imports), int(rss)
+
+
+if __name__ == "__main__":
+    runs = int(sys.argv[1]) if len(sys.argv) > 1 else 3
+
+    with tempfile.TemporaryDirectory() as workdir:
+        results = [time_daemon(workdir) for _ in range(runs)]
+        ready = sorted(r[0] for r in results)[runs // 2]
+        rss = sorted(r[1] for r in results)[runs // 2]
+        print(f"{'daemon (API ready)':<22} {ready * 1000:7.0f} ms {rss / 2**20:7.1f} MB RSS")
+
+        for label, code in STACKS.items():
+            samples = [time_stack(code, workdir) for _ in range(runs)]
+            if None in samples:
+                print(f"{label:<22} skipped (customtkinter not installed)")
+                continue
+            total = sorted(s[0] for s in samples)[runs // 2]
+            imports = sorted(s[1] for s in samples)[runs // 2]
+            rss = sorted(s[2] for s in samples)[runs // 2]
+            print(f"{label:<22} {total * 1000:7.0f} ms {rss / 2**20:7.1f} MB RSS  (imports {imports * 1000:.0f} ms)")
@@ -0,0 +1,81 @@
+"""
+Benchmark: start-up with USB sticks already attached. Previously the
+window waited for the startup scan; now USBMonitor.start() returns at once,
+the scan runs in the background and each stick's verdict reaches the event
+bus as soon as it resolves. The simulator backend is given WMI-like
+latencies (enumeration, resolution). The startup profile report is printed
+at the end.
+
+Run from the project root:
+    python -m benchmarks.bench_startup_scan [sticks] [enumerate_ms] [resolve_ms]
+"""
+import os
+import sys
+import time
+import tempfile
+
+from core.startup_profile import StartupProfile, set_startup_profile, get_startup_profile
+from core.event_bus import EventBus, EventQueue, set_event_bus
+from core.reporter import Reporter
+from core.usb_monitor import USBMonitor
+from core.backends.simulator import SimulatedEventSource
+
+VERDICTS = ("ALLOWED", "BLOCK", "BLOCK_FAILED")
+
+
+class SlowVolumes(SimulatedEventSource):
+    def __init__(self, enumerate_latency, **kwargs):
+        super().__init__(**kwargs)
+        self.enumerate_latency = enumerate_latency
+
+    def enumerate_volumes(self):
+        time.sleep(self.enumerate_latency) # Win32_LogicalDisk query
+        return super().enumerate_volumes()
+
+
+def run(sticks, enumerate_latency, resolve_latency, inline):
+    set_startup_profile(StartupProfile())
+    bus = EventBus()
+    set_event_bus(bus)
+    events = EventQueue(bus, topics=("usb",))
+
+    backend = SlowVolumes(enumerate_latency, resolve_latency=resolve_latency)
+    for i in range(sticks):
+        backend.attach(f"USBSTOR\\DISK&VEN_SIM&PROD_BOOT&REV_1.00\\BOOT{i:04d}&0", f"{chr(ord('E') + i)}:", f"Boot Stick {i}")
+    monitor = USBMonitor({"settings": {"insertion_workers": 4}}, Reporter(os.path.join("reports", "bench.txt")),
+                         backend=backend)
+
+    start = time.perf_counter()
+    monitor.start()
+    if inline:
+        monitor.scan_thread.join() # the window used to wait for this
+    returned = time.perf_counter() - start
+
+    verdicts = []
+    while len(verdicts) < sticks and time.perf_counter() - start < 30:
+        for event in events.drain(100):
+            if event.get("event_type") in VERDICTS:
+                verdicts.append(time.perf_counter() - start)
+        time.sleep(0.001)
+    monitor.stop()
+    return returned, verdicts
+
+
+if __name__ == "__main__":
+    sticks = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    enumerate_latency = float(sys.argv[2]) / 1000 if len(sys.argv) > 2 else 0.3
+    resolve_latency = float(sys.argv[3]) / 1000 if len(sys.argv) > 3 else 0.4
+
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as tmp:
+        os.chdir(tmp) # policy files, logs and event store stay out of the tree
+        try:
+            print(f"{sticks} sticks attached at start-up, {enumerate_latency * 1000:.0f} ms enumeration, "
+                  f"{resolve_latency * 1000:.0f} ms resolution")
+            for label, inline in (("scan waited for (before)", True), ("background scan", False)):
+                returned, verdicts = run(sticks, enumerate_latency, resolve_latency, inline)
+                print(f"  {label:<25} window can show after {returned * 1000:6.0f} ms | first verdict "
+                      f"{verdicts[0] * 1000:6.0f} ms | all {len(verdicts)} {verdicts[-1] * 1000:6.0f} ms")
+            print(get_startup_profile().report())
+        finally:
+            os.chdir(cwd)
@@ -0,0 +1,78 @@
+"""
+Benchmark: time-to-block per device, old per-call process spawning vs. a
+persistent enforcement session with batching.
+
+Runs anywhere: the enforcement backend is a StubEnforcer whose latency models
+each strategy. The old path is modelled with a 300 ms PowerShell cold start
+(the low end of what we see on endpoints) per spawn; the process spawn cost of
+this machine is printed for reference.
+
+Run from the project root:
+    python -m benchmarks.bench_time_to_block
+"""
+import sys
+import time
+import logging
+import threading
+import subprocess
+
+from core.enforcement import StubEnforcer, CoalescingEnforcer, set_enforcer
+from core.usb_blocker import USBBlocker
+
+
+POWERSHELL_COLD_START = 0.3
+
+
+def calibrate_spawn(samples=10):
+    start = time.perf_counter()
+    for _ in range(samples):
+        subprocess.run([sys.executable, "-S", "-c", "pass"], capture_output=True)
+    return (time.perf_counter() - start) / samples
+
+
+def block_concurrently(devices):
+    """Blocks each device from its own thread (like the insertion workers) and returns per-device latency."""
+    latencies = [0.0] * len(devices)
+    start = time.perf_counter()
+
+    def worker(index, device_id):
+        USBBlocker.block_device(device_id)
+        latencies[index] = time.perf_counter() - start
+
+    threads = [threading.Thread(target=worker, args=(i, d)) for i, d in enumerate(devices)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return sorted(latencies)
+
+
+def report(label, latencies):
+    p50 = latencies[len(latencies) // 2]
+    print(f"{label:<44} p50 {p50 * 1000:8.1f} ms | last device {latencies[-1] * 1000:8.1f} ms")
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.CRITICAL)
+    print(f"Bare process spawn on this machine: {calibrate_spawn() * 1000:.1f} ms")
+    spawn = POWERSHELL_COLD_START
+    print(f"Modelled PowerShell cold start: {spawn * 1000:.0f} ms\n")
+
+    pipe_round_trip = 0.002
+    per_device = 0.015 # Disable-PnpDevice work inside the host
+
+    for hub_size in (1, 4, 8):
+        devices = [f"USBSTOR\\DISK&VEN_SIM&PROD_BENCH&REV_1.00\\SERIAL{i:04d}&0" for i in range(hub_size)]
+        print(f"--- {hub_size} device(s) ---")
+
+        # Old: a fresh PowerShell per request, independent processes in parallel
+        set_enforcer(StubEnforcer(round_trip=spawn, per_device=per_device))
+        report("per-call PowerShell spawn (old USBBlocker)", block_concurrently(devices))
+
+        # New: one persistent host, one request per device
+        set_enforcer(StubEnforcer(round_trip=pipe_round_trip, per_device=per_device, serial=True))
+        report("persistent session, one request per device", block_concurrently(devices))
+
+        # New: one persistent host with group commit
+        set_enforcer(CoalescingEnforcer(StubEnforcer(round_trip=pipe_round_trip, per_device=per_device, serial=True)))
+        report("persistent session, coalesced batches", block_concurrently(devices))
@@ -0,0 +1,84 @@
+"""
+Benchmark: VolumeInventory baseline scan and reconnect diff on a synthetic
+tree built in tmpfs (/dev/shm when available), with peak Python memory.
+
+tmpfs makes every stat a CPU-bound syscall, so the worker count barely
+matters here; on real USB media the listing workers overlap device latency.
+
+Run from the project root:
+    python -m benchmarks.bench_volume_inventory [files] [files_per_dir]
+"""
+import os
+import sys
+import time
+import random
+import shutil
+import logging
+import tempfile
+import tracemalloc
+
+from core.volume_inventory import VolumeInventory
+
+
+def build_tree(root, files, per_dir):
+    dirs = max(1, files // per_dir)
+    for d in range(dirs):
+        directory = os.path.join(root, f"d{d // 100:03d}", f"sub{d % 100:02d}")
+        os.makedirs(directory, exist_ok=True)
+        for i in range(per_dir):
+            with open(os.path.join(directory, f"file{i:05d}.dat"), "wb") as f:
+                f.write(b"x" * (i % 64))
+    return dirs * per_dir
+
+
+def mutate(root, count):
+    """Adds, removes and rewrites `count` files each, as another machine would."""
+    all_files = [os.path.join(dp, f) for dp, _, fs in os.walk(root) for f in fs]
+    random.seed(1)
+    victims = random.sample(all_files, 2 * count)
+    for path in victims[:count]:
+        os.remove(path)
+    for path in victims[count:]:
+        with open(path, "ab") as f:
+            f.write(b"changed")
+    for i in range(count):
+        with open(os.path.join(root, f"new{i:05d}.dat"), "wb") as f:
+            f.write(b"new")
+
+
+def timed_scan(inventory, serial, root):
+    """Times one scan, then repeats it under tracemalloc for the peak (tracemalloc skews timing)."""
+    result = inventory.scan(serial, root, "BENCH:")
+    tracemalloc.start()
+    inventory.scan(serial + "-mem", root, "BENCH:")
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return result, peak
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.CRITICAL)
+    files = int(sys.argv[1]) if len(sys.argv) > 1 else 200000
+    per_dir = int(sys.argv[2]) if len(sys.argv) > 2 else 200
+    base = "/dev/shm" if os.path.isdir("/dev/shm") else None
+
+    tmp = tempfile.mkdtemp(dir=base)
+    try:
+        root = os.path.join(tmp, "volume")
+        start = time.perf_counter()
+        total = build_tree(root, files, per_dir)
+        print(f"built {total} files in {time.perf_counter() - start:.1f} s under {tmp}")
+
+        for workers in (1, 8):
+            inventory = VolumeInventory(config_dir=os.path.join(tmp, f"inv{workers}"), workers=workers)
+            result, peak = timed_scan(inventory, "BENCHSERIAL", root)
+            size = os.path.getsize(inventory.snapshot_path("BENCHSERIAL"))
+            print(f"workers={workers}: baseline {result['files']} files in {result['seconds']:.2f} s, "
+                  f"snapshot {size / 1024:.0f} KB ({size / result['files']:.1f} B/file), peak {peak / 2**20:.1f} MB")
+
+        mutate(root, 1000)
+        result, peak = timed_scan(inventory, "BENCHSERIAL", root)
+        print(f"reconnect diff: +{result['added']} -{result['removed']} ~{result['changed']} "
+              f"in {result['seconds']:.2f} s, peak {peak / 2**20:.1f} MB")
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
@@ -0,0 +1,25 @@
+import sys
+
+from .base import DeviceEventSource
+
+
+def create_backend(name=None, **kwargs):
+    """
+    Builds a device-event backend by name ("wmi", "udev", "simulator").
+    Defaults to the platform's native backend. Imports are deferred so that
+    Windows-only modules (wmi, pywin32) are never loaded on Linux.
+    """
+    if not name:
+        name = "wmi" if sys.platform == "win32" else "udev"
+
+    if name == "wmi":
+        from .wmi_backend import WMIEventSource
+        return WMIEventSource(**kwargs)
+    if name == "udev":
+        from .udev_backend import UdevEventSource
+        return UdevEventSource(**kwargs)
+    if name == "simulator":
+        from .simulator import SimulatedEventSource
+        return SimulatedEventSource(**kwargs)
+
+    raise ValueError(f"Unknown device backend: {name}")
@@ -0,0 +1,105 @@
+from abc import ABC, abstractmethod
+
+# probe_volume() result: the volume -> device mapping isn't resolvable yet
+VOLUME_PENDING = "pending"
+
+
+class DeviceEventSource(ABC):
+    """
+    Platform backend for USB storage discovery and enforcement.
+
+    A "volume" is whatever the platform uses to name a mounted filesystem
+    ("E:" on Windows, "/dev/sdb1" on Linux). A "device_id" is a PnP-style
+    instance ID that DeviceIdentifier.parse_device_id understands and that
+    disable_device/enable_device accept.
+    """
+
+    name = "base"
+
+    # Seconds a new volume may take to become resolvable / mounted before
+    # the monitor gives up on it (it is probed with backoff, not slept on)
+    mount_ready_timeout = 2.0
+    # Seconds to wait for volume_root() after the device resolved, for
+    # platforms that mount asynchronously (0: volume_root() is final)
+    automount_timeout = 0.0
+
+    def thread_init(self):
+        """Per-thread setup for threads that call into the backend (e.g. COM)."""
+
+    def thread_exit(self):
+        """Per-thread teardown matching thread_init()."""
+
+    def warm_up(self):
+        """Pays one-off start-up costs (e.g. enforcement host) before the first device."""
+
+    @abstractmethod
+    def enumerate_volumes(self):
+        """Returns the removable USB volumes that are currently mounted."""
+
+    @abstractmethod
+    def enumerate_attached(self):
+        """
+        Returns every attached USB storage device, enabled or disabled, as dicts
+        with the parse_device_id keys plus status_raw, device_id, description, name.
+        """
+
+    @abstractmethod
+    def run_event_loop(self, submit, keep_running):
+        """
+        Blocks, calling submit(event_type, volume) with EVENT_INSERT/EVENT_REMOVE
+        for every volume arrival/removal until keep_running() returns False.
+        """
+
+    def watch_attached(self, on_change, keep_running):
+        """
+        Blocks, calling on_change(action, record) for USB storage device
+        arrivals ("add"), status changes ("change") and removals ("remove",
+        the record only needs device_id) until keep_running() returns False.
+        Records look like enumerate_attached() entries. Returns False at once
+        if the backend has no such events (callers then poll enumerate_attached).
+        """
+        return False
+
+    @abstractmethod
+    def resolve_volume(self, volume):
+        """Returns the device_id backing a volume, or None if it isn't USB storage."""
+
+    def probe_volume(self, volume):
+        """
+        One cheap readiness check for a new volume: returns its device_id once
+        the mapping is resolvable, None if it resolved to something that isn't
+        USB storage, or VOLUME_PENDING if the OS hasn't finished yet.
+        Backends that can't tell "not yet" from "not USB" keep the default,
+        which retries until mount_ready_timeout.
+        """
+        return self.resolve_volume(volume) or VOLUME_PENDING
+
+    @abstractmethod
+    def get_device_details(self, device_id):
+        """Returns DeviceID/Name/Description/Service plus the parse_device_id keys."""
+
+    @abstractmethod
+    def disable_device(self, device_id):
+        """Disables (blocks) the device. Returns True on success."""
+
+    @abstractmethod
+    def enable_device(self, device_id):
+        """Re-enables (unblocks) the device. Returns True on success."""
+
+    def volume_root(self, volume):
+        """Filesystem path to audit for a mounted volume, or None."""
+        return None
+
+    def volume_identity(self, volume):
+        """
+        Stable identity of the filesystem on a volume (volume serial / UUID),
+        the same whatever letter, mount point or node it gets; None if unknown.
+        """
+        return None
+
+    def physical_disk(self, volume):
+        """Per-disk counter name for the volume (PhysicalDriveN / sdX), or None."""
+        return None
+
+    def invalidate_volume(self, volume):
+        """Forgets cached state for a volume after it was removed."""
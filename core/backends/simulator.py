@@ -0,0 +1,262 @@
+import json
+import time
+import queue
+import logging
+import threading
+from collections import deque
+
+from .base import DeviceEventSource, VOLUME_PENDING
+from ..device_identifier import DeviceIdentifier
+from ..insertion_pipeline import EVENT_INSERT, EVENT_REMOVE
+
+
+def load_trace(path):
+    """
+    Loads a JSONL event trace. Each line:
+        {"t": 0.25, "action": "add" | "remove", "volume": "E:", "device_id": "USBSTOR\\...", "name": "..."}
+    "t" is seconds since the start of the recording.
+    """
+    records = []
+    with open(path, "r") as f:
+        for line in f:
+            line = line.strip()
+            if line:
+                records.append(json.loads(line))
+    return records
+
+
+def save_trace(path, records):
+    with open(path, "w") as f:
+        for record in records:
+            f.write(json.dumps(record) + "\n")
+
+
+class SimulatedEventSource(DeviceEventSource):
+    """
+    In-memory backend for load tests and profiling without hardware.
+
+    Replays a recorded (or synthetic) trace at `speed` x real time (speed=0
+    means as fast as the pipeline accepts events). Optional per-call latencies
+    model slow WMI resolution and enforcement, and mount_latency how long a
+    new volume stays unresolvable after it appears. Disable/enable only flip
+    the simulated device status.
+    """
+
+    name = "simulator"
+
+    def __init__(self, trace=None, speed=1.0, resolve_latency=0.0, enforce_latency=0.0,
+                 volume_roots=None, mount_latency=0.0):
+        self.trace = list(trace or [])
+        self.speed = speed
+        self.resolve_latency = resolve_latency
+        self.enforce_latency = enforce_latency
+        self.mount_latency = mount_latency
+        self.volume_roots = volume_roots or {} # volume -> directory to audit
+
+        self.lock = threading.Lock()
+        self.devices = {} # device_id -> {'name', 'status'}
+        # volume -> FIFO of device_ids; replay runs ahead of the workers, so a
+        # letter can already be reused while the previous removal is queued
+        self.volumes = {}
+        self.ready_at = {} # volume -> perf_counter() when it becomes resolvable
+        self.replay_done = threading.Event()
+        self.counters = {'events': 0, 'resolved': 0, 'disabled': 0, 'enabled': 0}
+        self.watchers = [] # event queues of running watch_attached() calls
+
+    # --- Simulation control ---
+
+    def attach(self, device_id, volume=None, name="Simulated USB Device"):
+        with self.lock:
+            device = self.devices.setdefault(device_id, {'name': name, 'status': "OK"})
+            device['name'] = name
+            if volume:
+                self.volumes.setdefault(volume, deque()).append(device_id)
+                self.ready_at[volume] = time.perf_counter() + self.mount_latency
+            record = self._record(device_id, device)
+        self._notify("add", record)
+
+    def detach(self, volume=None, device_id=None):
+        removed = None
+        with self.lock:
+            queue = self.volumes.get(volume) if volume else None
+            if queue:
+                device_id = queue.popleft()
+                if not queue:
+                    del self.volumes[volume]
+                    self.ready_at.pop(volume, None)
+            if device_id and not any(device_id in q for q in self.volumes.values()):
+                if self.devices.pop(device_id, None) is not None:
+                    removed = device_id
+        if removed:
+            self._notify("remove", {"device_id": removed})
+
+    def _notify(self, action, record):
+        # Delivered on the watch_attached() thread, as real backends do
+        for events in list(self.watchers):
+            events.put((action, record))
+
+    @staticmethod
+    def _record(device_id, device):
+        details = DeviceIdentifier.parse_device_id(device_id)
+        details["status_raw"] = device['status']
+        details["device_id"] = device_id
+        details["description"] = "Simulated Mass Storage"
+        details["name"] = device['name']
+        return details
+
+    def _apply(self, record):
+        if record.get("action") == "add":
+            self.attach(record.get("device_id"), record.get("volume"),
+                        record.get("name", "Simulated USB Device"))
+            return EVENT_INSERT
+        if record.get("action") == "remove":
+            # Keep the device itself until the removal has been processed, but
+            # report the PnP removal now, as the OS does
+            with self.lock:
+                queue = self.volumes.get(record.get("volume"))
+                device_id = queue[0] if queue else None
+            if device_id:
+                self._notify("remove", {"device_id": device_id})
+            return EVENT_REMOVE
+        return None
+
+    # --- DeviceEventSource ---
+
+    def enumerate_volumes(self):
+        with self.lock:
+            return list(self.volumes.keys())
+
+    def enumerate_attached(self):
+        with self.lock:
+            return [self._record(device_id, device) for device_id, device in self.devices.items()]
+
+    def watch_attached(self, on_change, keep_running):
+        # attach/detach/status changes queue their events for this thread
+        events = queue.SimpleQueue()
+        self.watchers.append(events)
+        try:
+            while keep_running():
+                try:
+                    action, record = events.get(timeout=0.05)
+                except queue.Empty:
+                    continue
+                try:
+                    on_change(action, record)
+                except Exception as e:
+                    logging.error(f"Simulated device watcher failed: {e}")
+        finally:
+            self.watchers.remove(events)
+
+    def run_event_loop(self, submit, keep_running):
+        logging.info(f"Replaying {len(self.trace)} simulated USB events (speed={self.speed})...")
+        start = time.perf_counter()
+
+        for record in self.trace:
+            if not keep_running():
+                break
+            if self.speed:
+                due = start + record.get("t", 0) / self.speed
+                delay = due - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+
+            event_type = self._apply(record)
+            if event_type is None:
+                continue
+            submit(event_type, record.get("volume"))
+            self.counters['events'] += 1
+
+        self.replay_done.set()
+        while keep_running():
+            time.sleep(0.05)
+
+    def resolve_volume(self, volume):
+        if self.resolve_latency:
+            time.sleep(self.resolve_latency)
+        with self.lock:
+            if time.perf_counter() < self.ready_at.get(volume, 0.0):
+                return None # still mounting
+            queue = self.volumes.get(volume)
+            device_id = queue[0] if queue else None
+        if device_id:
+            self.counters['resolved'] += 1
+        return device_id
+
+    def probe_volume(self, volume):
+        with self.lock:
+            ready_at = self.ready_at.get(volume, 0.0)
+        if time.perf_counter() < ready_at:
+            return VOLUME_PENDING
+        return self.resolve_volume(volume)
+
+    def get_device_details(self, device_id):
+        with self.lock:
+            device = self.devices.get(device_id, {})
+        return {
+            "DeviceID": device_id,
+            "Name": device.get('name', "Simulated USB Device"),
+            "Description": "Simulated Mass Storage",
+            "Service": "USBSTOR",
+            **DeviceIdentifier.parse_device_id(device_id)
+        }
+
+    def volume_root(self, volume):
+        return self.volume_roots.get(volume)
+
+    def invalidate_volume(self, volume):
+        self.detach(volume=volume)
+
+    def _set_status(self, device_id, status, counter):
+        if self.enforce_latency:
+            time.sleep(self.enforce_latency)
+        with self.lock:
+            device = self.devices.get(device_id)
+            if device is None:
+                return False
+            device['status'] = status
+            record = self._record(device_id, device)
+        self.counters[counter] += 1
+        self._notify("change", record)
+        return True
+
+    def disable_device(self, device_id):
+        return self._set_status(device_id, "Error", 'disabled')
+
+    def enable_device(self, device_id):
+        return self._set_status(device_id, "OK", 'enabled')
+
+
+class TraceRecorder:
+    """
+    Wraps another backend's run_event_loop and records every event it emits
+    (with the resolved device_id) so the session can be replayed later by
+    SimulatedEventSource.
+    """
+
+    def __init__(self, source, path):
+        self.source = source
+        self.path = path
+        self.records = []
+        self.lock = threading.Lock()
+
+    def run_event_loop(self, submit, keep_running):
+        start = time.perf_counter()
+
+        def recording_submit(event_type, volume):
+            record = {"t": round(time.perf_counter() - start, 4), "volume": volume,
+                      "action": "add" if event_type == EVENT_INSERT else "remove"}
+            if event_type == EVENT_INSERT:
+                record["device_id"] = self.source.resolve_volume(volume)
+            with self.lock:
+                self.records.append(record)
+            return submit(event_type, volume)
+
+        try:
+            self.source.run_event_loop(recording_submit, keep_running)
+        finally:
+            with self.lock:
+                save_trace(self.path, self.records)
+
+    def __getattr__(self, name):
+        # Everything else goes straight to the wrapped backend
+        return getattr(self.source, name)
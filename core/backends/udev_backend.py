@@ -0,0 +1,310 @@
+import os
+import time
+import logging
+import threading
+
+from .base import DeviceEventSource, VOLUME_PENDING
+from ..device_identifier import DeviceIdentifier
+from ..insertion_pipeline import EVENT_INSERT, EVENT_REMOVE
+
+try:
+    import pyudev
+except ImportError:
+    pyudev = None
+
+
+SYS_CLASS_BLOCK = "/sys/class/block"
+DISK_BY_UUID = "/dev/disk/by-uuid"
+
+
+def _read_attr(path, name, default=""):
+    try:
+        with open(os.path.join(path, name), "r") as f:
+            return f.read().strip()
+    except OSError:
+        return default
+
+
+def _write_attr(path, name, value):
+    with open(os.path.join(path, name), "w") as f:
+        f.write(value)
+
+
+class UdevEventSource(DeviceEventSource):
+    """
+    Linux backend: udev (pyudev) block events when available, otherwise a
+    1 s sysfs diff. Volumes are partition device nodes ("/dev/sdb1"); blocking
+    writes 0 to the USB device's sysfs `authorized` attribute.
+
+    Device IDs are synthesised in the Windows "USB\\VID_xxxx&PID_yyyy\\serial"
+    form so DeviceIdentifier and the policy lists work unchanged.
+    """
+
+    name = "udev"
+
+    # The block device is resolvable as soon as it appears; udisks/automount
+    # usually mounts it within automount_timeout (auditing waits for that)
+    mount_ready_timeout = 3.0
+    automount_timeout = 3.0
+
+    def __init__(self, poll_interval=1.0):
+        self.poll_interval = poll_interval
+        self.lock = threading.Lock()
+        self.usb_paths = {} # device_id -> sysfs path of the USB device (kept after deauthorize)
+
+    # --- sysfs helpers ---
+
+    @staticmethod
+    def _block_name(volume):
+        return os.path.basename(volume.rstrip("/"))
+
+    @staticmethod
+    def _usb_device_dir(block_name):
+        """Walks up from /sys/class/block/<name> to the USB device (the dir with idVendor)."""
+        try:
+            path = os.path.realpath(os.path.join(SYS_CLASS_BLOCK, block_name))
+        except OSError:
+            return None
+        if "/usb" not in path:
+            return None
+        while path and path != "/":
+            if os.path.exists(os.path.join(path, "idVendor")):
+                return path
+            path = os.path.dirname(path)
+        return None
+
+    @staticmethod
+    def _device_id_for(usb_dir):
+        vid = _read_attr(usb_dir, "idVendor", "0000").upper()
+        pid = _read_attr(usb_dir, "idProduct", "0000").upper()
+        serial = _read_attr(usb_dir, "serial") or os.path.basename(usb_dir)
+        return f"USB\\VID_{vid}&PID_{pid}\\{serial}"
+
+    def _remember(self, usb_dir):
+        device_id = self._device_id_for(usb_dir)
+        with self.lock:
+            self.usb_paths[device_id] = usb_dir
+        return device_id
+
+    @staticmethod
+    def _is_volume(block_name):
+        # Partitions, or whole disks that carry a filesystem directly (superfloppy)
+        path = os.path.join(SYS_CLASS_BLOCK, block_name)
+        if os.path.exists(os.path.join(path, "partition")):
+            return True
+        has_partitions = any(n.startswith(block_name) and n != block_name
+                             for n in os.listdir(path)) if os.path.isdir(path) else False
+        return os.path.exists(os.path.join(path, "device")) and not has_partitions
+
+    def _usb_volumes(self):
+        volumes = []
+        try:
+            names = sorted(os.listdir(SYS_CLASS_BLOCK))
+        except OSError:
+            return volumes
+        for name in names:
+            if self._is_volume(name) and self._usb_device_dir(name):
+                volumes.append(f"/dev/{name}")
+        return volumes
+
+    @staticmethod
+    def _mounts():
+        mounts = {}
+        try:
+            with open("/proc/mounts", "r") as f:
+                for line in f:
+                    parts = line.split()
+                    if len(parts) >= 2:
+                        # Mount points escape spaces as \040
+                        mounts.setdefault(parts[0], parts[1].replace("\\040", " "))
+        except OSError:
+            pass
+        return mounts
+
+    # --- DeviceEventSource ---
+
+    def enumerate_volumes(self):
+        return self._usb_volumes()
+
+    def enumerate_attached(self):
+        attached = {}
+        for volume in self._usb_volumes():
+            usb_dir = self._usb_device_dir(self._block_name(volume))
+            if usb_dir:
+                self._remember(usb_dir)
+
+        # Include deauthorized devices: their block nodes are gone but sysfs dir remains
+        with self.lock:
+            known = list(self.usb_paths.items())
+
+        for device_id, usb_dir in known:
+            if not os.path.isdir(usb_dir):
+                with self.lock:
+                    self.usb_paths.pop(device_id, None)
+                continue
+            attached[device_id] = self._record(device_id, usb_dir)
+        return list(attached.values())
+
+    @staticmethod
+    def _record(device_id, usb_dir):
+        authorized = _read_attr(usb_dir, "authorized", "1") == "1"
+        details = DeviceIdentifier.parse_device_id(device_id)
+        details["status_raw"] = "OK" if authorized else "Error"
+        details["device_id"] = device_id
+        details["description"] = _read_attr(usb_dir, "manufacturer", "USB Mass Storage")
+        details["name"] = _read_attr(usb_dir, "product", "USB Mass Storage Device")
+        return details
+
+    def watch_attached(self, on_change, keep_running):
+        if pyudev is None:
+            return False
+
+        context = pyudev.Context()
+        monitor = pyudev.Monitor.from_netlink(context)
+        # Storage shows up as block devices; removal and (de)authorization on the USB device
+        monitor.filter_by(subsystem="block")
+        monitor.filter_by(subsystem="usb", device_type="usb_device")
+        monitor.start()
+
+        while keep_running():
+            try:
+                device = monitor.poll(timeout=1)
+                if device is None:
+                    continue
+                if device.subsystem == "block":
+                    if device.action == "add" and device.device_node:
+                        usb_dir = self._usb_device_dir(self._block_name(device.device_node))
+                        if usb_dir:
+                            on_change("add", self._record(self._remember(usb_dir), usb_dir))
+                    continue
+
+                with self.lock:
+                    device_id = next((d for d, p in self.usb_paths.items() if p == device.sys_path), None)
+                if device_id is None:
+                    continue # not a storage device we have seen
+                if device.action == "remove":
+                    with self.lock:
+                        self.usb_paths.pop(device_id, None)
+                    on_change("remove", {"device_id": device_id})
+                elif device.action in ("change", "bind", "unbind"):
+                    on_change("change", self._record(device_id, device.sys_path))
+            except Exception as e:
+                if keep_running():
+                    logging.error(f"Error in udev device watcher: {e}")
+                    time.sleep(1)
+
+    def run_event_loop(self, submit, keep_running):
+        if pyudev is None:
+            logging.info("pyudev not installed, polling sysfs for USB volumes.")
+            return self._poll_loop(submit, keep_running)
+
+        logging.info("Starting USB Monitor Loop (udev)...")
+        context = pyudev.Context()
+        monitor = pyudev.Monitor.from_netlink(context)
+        monitor.filter_by(subsystem="block")
+        monitor.start()
+        # USB volume nodes reported so far (plus those already attached): only
+        # their removals are ours, not loop/dm/internal disks going away
+        known = set(self._usb_volumes())
+
+        while keep_running():
+            try:
+                device = monitor.poll(timeout=1)
+                if device is None:
+                    continue
+                node = device.device_node
+                if not node:
+                    continue
+                if device.action == "add" and self._is_volume(self._block_name(node)) \
+                        and self._usb_device_dir(self._block_name(node)):
+                    known.add(node)
+                    submit(EVENT_INSERT, node)
+                elif device.action == "remove" and node in known:
+                    known.discard(node)
+                    submit(EVENT_REMOVE, node)
+            except Exception as e:
+                if keep_running():
+                    logging.error(f"Error in udev monitor loop: {e}")
+                    time.sleep(1)
+
+    def _poll_loop(self, submit, keep_running):
+        known = set(self._usb_volumes())
+        while keep_running():
+            time.sleep(self.poll_interval)
+            current = set(self._usb_volumes())
+            for volume in sorted(current - known):
+                submit(EVENT_INSERT, volume)
+            for volume in sorted(known - current):
+                submit(EVENT_REMOVE, volume)
+            known = current
+
+    def resolve_volume(self, volume):
+        usb_dir = self._usb_device_dir(self._block_name(volume))
+        if not usb_dir:
+            return None
+        return self._remember(usb_dir)
+
+    def probe_volume(self, volume):
+        # The sysfs node and its /usb parent chain appear together with the
+        # block device, so anything but a missing node is final
+        name = self._block_name(volume)
+        if not os.path.exists(os.path.join(SYS_CLASS_BLOCK, name)):
+            return VOLUME_PENDING
+        usb_dir = self._usb_device_dir(name)
+        return self._remember(usb_dir) if usb_dir else None
+
+    def get_device_details(self, device_id):
+        with self.lock:
+            usb_dir = self.usb_paths.get(device_id)
+        details = DeviceIdentifier.parse_device_id(device_id)
+        if usb_dir:
+            details.update({
+                "DeviceID": device_id,
+                "Name": _read_attr(usb_dir, "product", "USB Mass Storage Device"),
+                "Description": _read_attr(usb_dir, "manufacturer", ""),
+                "Service": "usb-storage",
+                "DeviceName": _read_attr(usb_dir, "product", "Unknown Device")
+            })
+        return details
+
+    def volume_root(self, volume):
+        return self._mounts().get(volume)
+
+    def volume_identity(self, volume):
+        # Filesystem UUID (the volume serial on FAT/exFAT/NTFS), kept by udev as a symlink to the node
+        try:
+            names = os.listdir(DISK_BY_UUID)
+        except OSError:
+            return None
+        node = os.path.realpath(volume)
+        for name in names:
+            if os.path.realpath(os.path.join(DISK_BY_UUID, name)) == node:
+                return name
+        return None
+
+    def physical_disk(self, volume):
+        name = self._block_name(volume)
+        path = os.path.join(SYS_CLASS_BLOCK, name)
+        if os.path.exists(os.path.join(path, "partition")):
+            # /sys/class/block/sdb1 -> .../block/sdb/sdb1
+            return os.path.basename(os.path.dirname(os.path.realpath(path)))
+        return name
+
+    def _set_authorized(self, device_id, value):
+        with self.lock:
+            usb_dir = self.usb_paths.get(device_id)
+        if not usb_dir:
+            logging.error(f"Unknown USB device {device_id}, cannot change authorization.")
+            return False
+        try:
+            _write_attr(usb_dir, "authorized", value)
+            return True
+        except OSError as e:
+            logging.error(f"Failed to write {usb_dir}/authorized: {e}")
+            return False
+
+    def disable_device(self, device_id):
+        return self._set_authorized(device_id, "0")
+
+    def enable_device(self, device_id):
+        return self._set_authorized(device_id, "1")
@@ -0,0 +1,333 @@
+import time
+import logging
+import threading
+
+import wmi
+import pythoncom
+import win32com.client
+
+from .base import DeviceEventSource, VOLUME_PENDING
+from ..device_identifier import DeviceIdentifier
+from ..device_cache import DeviceTopologyCache, physical_drive_name
+from ..insertion_pipeline import pump_volume_events
+from ..usb_blocker import USBBlocker
+from ..enforcement import get_enforcer
+
+_thread_state = threading.local()
+
+# __InstanceOperationEvent subclass -> DeviceInventory action
+PNP_EVENT_ACTIONS = {
+    "__InstanceCreationEvent": "add",
+    "__InstanceModificationEvent": "change",
+    "__InstanceDeletionEvent": "remove",
+}
+
+
+def get_wmi():
+    """
+    Returns this thread's WMI connection, creating it on first use.
+    WMI/COM objects must not cross threads, so each thread keeps its own.
+    """
+    conn = getattr(_thread_state, "wmi", None)
+    if conn is None:
+        conn = wmi.WMI()
+        _thread_state.wmi = conn
+    return conn
+
+
+def reset_wmi():
+    """Drops this thread's cached connection (e.g. after an RPC failure)."""
+    _thread_state.wmi = None
+
+
+class _SinkPipeline:
+    """Adapts a submit(event_type, volume) callable to pump_volume_events()."""
+
+    def __init__(self, submit):
+        self.submit = submit
+
+
+class WMIEventSource(DeviceEventSource):
+    """
+    Windows backend: Win32_VolumeChangeEvent for arrivals/removals, WMI
+    associators for volume -> USBSTOR resolution, PnP disable/enable via USBBlocker.
+    """
+
+    name = "wmi"
+
+    # LogicalDisk -> partition -> disk drive associations usually appear
+    # well within this after Win32_VolumeChangeEvent
+    mount_ready_timeout = 3.0
+
+    def __init__(self, topology=None):
+        # One topology cache shared by PnP resolution and IO drive mapping
+        self.topology = topology or DeviceTopologyCache()
+
+    def thread_init(self):
+        pythoncom.CoInitialize()
+
+    def thread_exit(self):
+        reset_wmi()
+        pythoncom.CoUninitialize()
+
+    def enumerate_volumes(self):
+        try:
+            c = get_wmi()
+            # Find all removable drives (Type 2)
+            return [drive.DeviceID for drive in c.query("SELECT * FROM Win32_LogicalDisk WHERE DriveType=2")]
+        except Exception as e:
+            reset_wmi()
+            logging.error(f"Error enumerating removable drives: {e}")
+            return []
+
+    @staticmethod
+    def _entity_record(ent):
+        details = DeviceIdentifier.parse_device_id(ent.DeviceID)
+        details["status_raw"] = ent.Status # OK, Error, Degraded
+        details["device_id"] = ent.DeviceID
+        details["description"] = ent.Description
+        details["name"] = ent.Name
+        return details
+
+    def enumerate_attached(self):
+        attached = []
+        try:
+            # Reuse this thread's WMI connection
+            c = get_wmi()
+
+            # Query all USB Storage devices (Service='USBSTOR')
+            # This catches devices even if the driver is disabled (Blocked)
+            entities = c.query("SELECT * FROM Win32_PnPEntity WHERE Service='USBSTOR'")
+
+            for ent in entities:
+                 # Parse details
+                 try:
+                     attached.append(self._entity_record(ent))
+                 except: continue
+
+        except Exception as e:
+            reset_wmi()
+            logging.error(f"Error scanning attached devices: {e}")
+
+        return attached
+
+    @staticmethod
+    def _next_event(watcher, timeout_ms):
+        """NextEvent() that returns None on timeout instead of raising."""
+        try:
+            return watcher.NextEvent(timeout_ms)
+        except Exception as e:
+            # -2147209215 is "Timed out"
+            if "Timed out" in str(e) or "-2147209215" in str(e):
+                return None
+            raise
+
+    def watch_attached(self, on_change, keep_running):
+        # Caller has run thread_init() (COM) on this thread
+        try:
+            locator = win32com.client.Dispatch("WbemScripting.SWbemLocator")
+            services = locator.ConnectServer(".", r"root\cimv2")
+            # Arrival, status change (OK <-> Error when disabled) and removal of USB storage entities
+            watcher = services.ExecNotificationQuery(
+                "SELECT * FROM __InstanceOperationEvent WITHIN 1 "
+                "WHERE TargetInstance ISA 'Win32_PnPEntity' AND TargetInstance.Service = 'USBSTOR'")
+            # Intrinsic events above are polled (WITHIN 1); device arrival is
+            # also signalled at once by this extrinsic event, without details
+            arrivals = services.ExecNotificationQuery("SELECT * FROM Win32_DeviceChangeEvent WHERE EventType = 2")
+        except Exception as e:
+            logging.error(f"Cannot subscribe to PnP device events: {e}")
+            return False
+
+        while keep_running():
+            try:
+                if self._next_event(arrivals, 250) is not None:
+                    # Pick up new USBSTOR entities now rather than at the next poll
+                    # (known ones are no-ops for the inventory)
+                    for ent in get_wmi().query("SELECT * FROM Win32_PnPEntity WHERE Service='USBSTOR'"):
+                        on_change("add", self._entity_record(ent))
+                event = self._next_event(watcher, 0)
+                while event is not None:
+                    action = PNP_EVENT_ACTIONS.get(event.Path_.Class)
+                    if action:
+                        on_change(action, self._entity_record(event.TargetInstance))
+                    event = self._next_event(watcher, 0)
+            except Exception as e:
+                if keep_running():
+                    reset_wmi()
+                    logging.error(f"Error in PnP device watcher: {e}")
+                    time.sleep(1)
+
+    def run_event_loop(self, submit, keep_running):
+        logging.info("Starting USB Monitor Loop (Direct COM)...")
+
+        # Initialize COM for this thread
+        pythoncom.CoInitialize()
+
+        try:
+            # Connect to WMI directly via win32com
+            objWMIService = win32com.client.Dispatch("WbemScripting.SWbemLocator")
+            objSWbemServices = objWMIService.ConnectServer(".", r"root\cimv2")
+
+            # Create the event watcher
+            # usage: ExecNotificationQuery(Query, [Flags=0], [Context=None])
+            watcher = objSWbemServices.ExecNotificationQuery("SELECT * FROM Win32_VolumeChangeEvent")
+
+            # Only enqueue here: resolution and enforcement run on the worker pool
+            pump_volume_events(watcher, _SinkPipeline(submit), keep_running)
+
+        except Exception as e:
+             logging.error(f"Fatal COM Error in thread: {e}")
+        finally:
+            pythoncom.CoUninitialize()
+
+    def resolve_volume(self, volume):
+        """
+        Resolves a drive letter (e.g., 'E:') to a PNP Device ID.
+        Known sticks are answered from the topology cache without touching WMI.
+        """
+        device_id = self.probe_volume(volume)
+        return None if device_id == VOLUME_PENDING else device_id
+
+    def probe_volume(self, volume):
+        """
+        Walks LogicalDisk -> partition -> disk drive once. A missing link means
+        Windows hasn't finished publishing the mount yet (VOLUME_PENDING); a
+        fixed disk or a non-USB drive at the end of the walk is final (None).
+        """
+        cached = self.topology.lookup(volume)
+        if cached and cached.get('pnp_id'):
+            return cached['pnp_id']
+
+        drive_letter = volume
+        try:
+            # Reuse this thread's WMI connection
+            c = get_wmi()
+
+            # Clean drive letter
+            drive_letter = drive_letter.rstrip('\\')
+
+            # 1. Get LogicalDisk
+            logical_disks = c.query(f"SELECT * FROM Win32_LogicalDisk WHERE DeviceID='{drive_letter}'")
+            if not logical_disks:
+                return VOLUME_PENDING
+
+            disk = logical_disks[0]
+            # Check if Removable (2)
+            if disk.DriveType != 2:
+                logging.debug(f"Drive {drive_letter} is not removable (Type: {disk.DriveType}). Ignoring.")
+                return None
+
+            # 2. Map via Partitions
+            # This chain is complex in WMI.
+            # Win32_LogicalDisk -> Win32_LogicalDiskToPartition -> Win32_DiskPartition -> Win32_DiskDriveToDiskPartition -> Win32_DiskDrive
+
+            query = f'ASSOCIATORS OF {{Win32_LogicalDisk.DeviceID="{drive_letter}"}} WHERE AssocClass = Win32_LogicalDiskToPartition'
+            partitions = c.query(query)
+
+            if not partitions:
+                return VOLUME_PENDING
+
+            found_drive = False
+            for partition in partitions:
+                query_drive = f'ASSOCIATORS OF {{Win32_DiskPartition.DeviceID="{partition.DeviceID}"}} WHERE AssocClass = Win32_DiskDriveToDiskPartition'
+                drives = c.query(query_drive)
+
+                for drive in drives:
+                    found_drive = True
+                    # We found the physical disk
+                    if "USB" in drive.InterfaceType or "USB" in drive.PNPDeviceID:
+                        # Same walk gives us the PhysicalDriveN index for the IO monitor
+                        self.topology.store(drive_letter, pnp_id=drive.PNPDeviceID,
+                                            physical_drive=physical_drive_name(drive.DeviceID))
+                        return drive.PNPDeviceID
+
+            return None if found_drive else VOLUME_PENDING
+
+        except Exception as e:
+            reset_wmi()
+            logging.error(f"Error resolving device for {drive_letter}: {e}")
+            return None
+
+    def get_device_details(self, device_id):
+        cached = self.topology.details_for(device_id)
+        if cached:
+            return cached
+
+        try:
+            c = get_wmi()
+            # Query Win32_PnPEntity for details
+            # Escape backslashes for WQL
+            wql_id = device_id.replace("\\", "\\\\")
+            entities = c.query(f"SELECT * FROM Win32_PnPEntity WHERE DeviceID='{wql_id}'")
+            if entities:
+                ent = entities[0]
+                details = {
+                    "DeviceID": ent.DeviceID,
+                    "Name": ent.Name,
+                    "Description": ent.Description,
+                    "Service": ent.Service,
+                     # Parse IDs
+                    **DeviceIdentifier.parse_device_id(ent.DeviceID)
+                }
+                self.topology.store_details(device_id, details)
+                return details
+        except Exception as e:
+            reset_wmi()
+            logging.error(f"Error fetching details for {device_id}: {e}")
+
+        return DeviceIdentifier.parse_device_id(device_id)
+
+    def physical_disk(self, volume):
+        """
+        Maps a drive letter (G:) to PhysicalDriveN, from the topology cache
+        when the volume was already resolved, otherwise using WMI.
+        """
+        cached = self.topology.lookup(volume)
+        if cached and cached.get('physical_drive'):
+            return cached['physical_drive']
+
+        try:
+            c = get_wmi()
+            # Win32_LogicalDiskToPartition matches LogicalDisk (G:) to DiskPartition
+            drive_clean = volume.rstrip('\\')
+            query = f'ASSOCIATORS OF {{Win32_LogicalDisk.DeviceID="{drive_clean}"}} WHERE AssocClass = Win32_LogicalDiskToPartition'
+            partitions = c.query(query)
+
+            for part in partitions:
+                # Partition DeviceID is like "Disk #1, Partition #0"
+                # We need the Disk Index #1
+                # Win32_DiskDriveToDiskPartition matches Partition to DiskDrive
+                query_drive = f'ASSOCIATORS OF {{Win32_DiskPartition.DeviceID="{part.DeviceID}"}} WHERE AssocClass = Win32_DiskDriveToDiskPartition'
+                drives = c.query(query_drive)
+                for drive in drives:
+                     # drive.DeviceID is usually "\\.\PHYSICALDRIVE1"
+                     # psutil uses "PhysicalDrive1"
+                     phy_drive = physical_drive_name(drive.DeviceID)
+                     if phy_drive:
+                         self.topology.store(drive_clean, physical_drive=phy_drive)
+                         return phy_drive
+            return None
+        except Exception as e:
+            reset_wmi()
+            logging.error(f"Error mapping {volume} to physical drive: {e}")
+            return None
+
+    def volume_root(self, volume):
+        drive = volume.rstrip('\\')
+        return f"{drive}\\"
+
+    def volume_identity(self, volume):
+        return self.topology.volume_serial(volume)
+
+    def invalidate_volume(self, volume):
+        self.topology.invalidate_drive(volume)
+
+    def warm_up(self):
+        # Start the enforcement host now so the first block doesn't pay its cold start
+        get_enforcer().warm_up()
+
+    def disable_device(self, device_id):
+        return USBBlocker.block_device(device_id)
+
+    def enable_device(self, device_id):
+        return USBBlocker.unblock_device(device_id)
@@ -0,0 +1,29 @@
+import os
+import json
+
+
+def load_config(config_path=os.path.join("config", "settings.json")):
+    default_config = {
+        "settings": {
+            "log_level": "INFO",
+            "report_file": "reports/final_usb_audit_report.txt",
+            "audit_log": "logs/usb_events.log",
+             "file_log": "logs/file_activity.log"
+        },
+        "allowlist": {"allowed_devices": []},
+        "blocklist": {"blocked_devices": []}
+    }
+
+    if os.path.exists(config_path):
+        try:
+            with open(config_path, 'r') as f:
+                loaded = json.load(f)
+                # Merge with defaults; settings.json keeps its keys at the top level
+                default_config["settings"].update({k: v for k, v in loaded.items() if not isinstance(v, dict)})
+                if "settings" in loaded:
+                    default_config["settings"].update(loaded["settings"])
+                return default_config
+        except Exception as e:
+            print(f"Error loading config: {e}")
+
+    return default_config
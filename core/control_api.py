@@ -0,0 +1,478 @@
+import os
+import sys
+import json
+import time
+import logging
+import argparse
+import threading
+from multiprocessing.connection import Listener, Client
+
+from .event_bus import get_event_bus, EventQueue
+from .startup_profile import get_startup_profile
+
+# JSON-RPC 2.0 error codes
+PARSE_ERROR = -32700
+INVALID_REQUEST = -32600
+METHOD_NOT_FOUND = -32601
+INVALID_PARAMS = -32602
+INTERNAL_ERROR = -32603
+
+RUN_DIR = "run"
+EVENT_BATCH = 200
+EVENT_INTERVAL = 0.05
+
+
+def default_address():
+    """Named pipe on Windows, Unix socket elsewhere; settings.json "control_address" overrides."""
+    if sys.platform == "win32":
+        return r"\\.\pipe\usb_security_control"
+    return os.path.join(RUN_DIR, "control.sock")
+
+
+def _restrict_to_owner(path):
+    """
+    Makes path readable by the current user only. POSIX mode bits do that;
+    Windows ignores them, so there the inherited ACL is dropped and replaced
+    by one explicit full-control entry for the current user (icacls).
+    """
+    if sys.platform != "win32":
+        os.chmod(path, 0o600)
+        return
+    import getpass
+    import subprocess
+    user = getpass.getuser()
+    if os.environ.get("USERDOMAIN"):
+        user = f"{os.environ['USERDOMAIN']}\\{user}"
+    flags = getattr(subprocess, "CREATE_NO_WINDOW", 0)
+    for args in (["/reset"], ["/inheritance:r", "/grant:r", f"{user}:F"]):
+        subprocess.run(["icacls", path, *args], capture_output=True, text=True, check=True, creationflags=flags)
+
+
+def _readable_by_others(path):
+    """True if anyone but the current user can read path (POSIX mode bits, or the Windows DACL via icacls)."""
+    if sys.platform != "win32":
+        return bool(os.stat(path).st_mode & 0o077)
+    import getpass
+    import subprocess
+    flags = getattr(subprocess, "CREATE_NO_WINDOW", 0)
+    listing = subprocess.run(["icacls", path], capture_output=True, text=True, check=True, creationflags=flags).stdout
+    user = getpass.getuser().lower()
+    # One ACE per line: "<path> DOMAIN\user:(F)" then "        NT AUTHORITY\SYSTEM:(I)(F)"
+    for line in listing.splitlines():
+        line = line.replace(path, "", 1).strip()
+        if ":(" not in line:
+            continue
+        principal = line.split(":(")[0].lower()
+        if principal.rsplit("\\", 1)[-1] != user:
+            return True
+    return False
+
+
+def load_authkey(path=os.path.join(RUN_DIR, "control.key"), create=False):
+    """
+    Shared secret for the connection handshake (HMAC challenge of
+    multiprocessing.connection). The daemon (create=True) creates it, sets
+    it to be readable by its own user only (mode 0600, or an owner-only DACL
+    on Windows) and refuses to start if that can't be made to hold: anyone
+    who can read the key can allowlist devices. Clients must be able to
+    read it to connect.
+    """
+    if create:
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+            fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+            with os.fdopen(fd, "w") as f:
+                f.write(os.urandom(32).hex())
+        try:
+            _restrict_to_owner(path)
+            exposed = _readable_by_others(path)
+        except Exception as e:
+            raise PermissionError(f"Cannot restrict access to control key {path}: {e}") from e
+        if exposed:
+            raise PermissionError(f"Control key {path} is readable by other users; refusing to start.")
+    with open(path, "r") as f:
+        return f.read().strip().encode()
+
+
+def daemon_listening(address=None):
+    """
+    True if something accepts connections on the control address. Connects
+    without the handshake (the daemon logs a refused connection), so only
+    used to tell "no daemon" from "a daemon we can't authenticate to".
+    """
+    try:
+        Client(address or default_address()).close()
+        return True
+    except (FileNotFoundError, ConnectionRefusedError):
+        return False
+
+
+class ControlError(Exception):
+    def __init__(self, code, message):
+        super().__init__(f"{message} ({code})")
+        self.code = code
+
+
+def _plain(value):
+    """Device records are read-only mappings; JSON wants dicts."""
+    if isinstance(value, dict) or hasattr(value, "keys"):
+        return {k: _plain(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_plain(v) for v in value]
+    return value
+
+
+class ControlServer:
+    """
+    Local JSON-RPC 2.0 control/query API for a running USBMonitor, over a
+    multiprocessing.connection Listener (named pipe / Unix socket) with an
+    authkey handshake. One thread per client; each message is one UTF-8
+    JSON request or response.
+
+    "events.subscribe" turns the connection into a stream: the server then
+    pushes {"method": "events", "params": {"events": [...], "dropped": n}}
+    notifications from the event bus until the client disconnects.
+    """
+
+    def __init__(self, monitor, address=None, authkey=None, on_shutdown=None):
+        self.monitor = monitor
+        self.address = address or default_address()
+        self.authkey = authkey
+        self.on_shutdown = on_shutdown
+        self.started = time.time()
+        self.listener = None
+        self.thread = None
+        self.running = False
+        self.methods = {
+            "status": self.status,
+            "config": lambda: {"settings": self.monitor.config.get("settings", {})},
+            "devices.attached": lambda: _plain(self.monitor.get_all_attached_devices()),
+            "devices.active": lambda: _plain(self.monitor.active_drives.copy()),
+            "policy.allowed": lambda: self.monitor.policy_store.allowed_devices(),
+            "policy.blocked": lambda: self.monitor.policy_store.blocked_devices(),
+            "policy.allow": lambda fingerprint: self.monitor.allow_device(fingerprint),
+            "policy.block": lambda fingerprint: self.monitor.block_device_manual(fingerprint),
+            "device.disable": lambda pnp_id: self.monitor.disable_device(pnp_id),
+            "device.enable": lambda pnp_id: self.monitor.enable_device(pnp_id),
+            "device.block": self.block,
+            "device.unblock": self.unblock,
+            "report.generate": self.generate_report,
+            "monitor.start": lambda: self.monitor.start(),
+            "monitor.stop": lambda: self.monitor.stop(),
+            "daemon.shutdown": self.shutdown,
+        }
+
+    # --- Methods ---
+
+    def status(self):
+        return {
+            "pid": os.getpid(),
+            "uptime": time.time() - self.started,
+            "monitoring": self.monitor.monitoring,
+            "backend": self.monitor.backend.name,
+            "active_drives": sorted(self.monitor.active_drives),
+            "stats": self.monitor.reporter.stats,
+            "inventory": self.monitor.inventory.stats(),
+            "pipeline": self.monitor.get_pipeline_stats(),
+            "startup": get_startup_profile().as_dict(),
+        }
+
+    def block(self, info):
+        """Disables the device and adds it to the blocklist, as the dashboard's Block button."""
+        pnp_id = info.get("pnp_id") or info.get("device_id")
+        if not pnp_id or not self.monitor.disable_device(pnp_id):
+            return False
+        self.monitor.block_device_manual(info)
+        return True
+
+    def unblock(self, info):
+        # Allowlist first, so the monitor doesn't re-block the device as soon as it is enabled
+        pnp_id = info.get("pnp_id") or info.get("device_id")
+        if not pnp_id:
+            return False
+        self.monitor.allow_device(info)
+        return self.monitor.enable_device(pnp_id)
+
+    def generate_report(self):
+        ok = self.monitor.reporter.generate_report()
+        return {"ok": bool(ok), "path": os.path.abspath(self.monitor.reporter.report_path)}
+
+    def shutdown(self):
+        if self.on_shutdown:
+            threading.Thread(target=self.on_shutdown, daemon=True).start()
+        return True
+
+    # --- Transport ---
+
+    def start(self):
+        if sys.platform != "win32":
+            os.makedirs(os.path.dirname(self.address) or ".", exist_ok=True)
+            if os.path.exists(self.address):
+                os.unlink(self.address) # stale socket of a previous run
+        self.listener = Listener(self.address, authkey=self.authkey)
+        if sys.platform != "win32":
+            os.chmod(self.address, 0o600)
+        self.running = True
+        self.thread = threading.Thread(target=self._accept_loop, name="control-accept", daemon=True)
+        self.thread.start()
+        logging.info(f"Control API listening on {self.address}")
+
+    def stop(self):
+        self.running = False
+        if self.listener:
+            try:
+                self.listener.close()
+            except Exception:
+                pass
+            self.listener = None
+
+    def _accept_loop(self):
+        while self.running:
+            try:
+                conn = self.listener.accept()
+            except Exception as e:
+                if self.running:
+                    logging.warning(f"Control API connection refused: {e}")
+                continue
+            threading.Thread(target=self._serve, args=(conn,), name="control-client", daemon=True).start()
+
+    def _serve(self, conn):
+        try:
+            while self.running:
+                try:
+                    raw = conn.recv_bytes()
+                except (EOFError, OSError):
+                    return
+                try:
+                    request = json.loads(raw)
+                except ValueError:
+                    conn.send_bytes(self._error(None, PARSE_ERROR, "Parse error"))
+                    continue
+                if isinstance(request, dict) and request.get("method") == "events.subscribe":
+                    self._stream(conn, request)
+                    return
+                response = self.handle(request)
+                if response is not None:
+                    conn.send_bytes(response)
+        except Exception as e:
+            logging.error(f"Control API client failed: {e}")
+        finally:
+            conn.close()
+
+    @staticmethod
+    def _error(request_id, code, message):
+        return json.dumps({"jsonrpc": "2.0", "id": request_id, "error": {"code": code, "message": message}}).encode()
+
+    def handle(self, request):
+        """Runs one request; returns the encoded response (None for notifications)."""
+        if not isinstance(request, dict) or not isinstance(request.get("method"), str):
+            return self._error(None, INVALID_REQUEST, "Invalid Request")
+        request_id = request.get("id")
+        method = self.methods.get(request["method"])
+        if method is None:
+            return self._error(request_id, METHOD_NOT_FOUND, f"Method not found: {request['method']}")
+        params = request.get("params") or {}
+        try:
+            result = method(*params) if isinstance(params, list) else method(**params)
+        except TypeError as e:
+            return self._error(request_id, INVALID_PARAMS, str(e))
+        except Exception as e:
+            logging.error(f"Control API {request['method']} failed: {e}")
+            return self._error(request_id, INTERNAL_ERROR, str(e))
+        if "id" not in request:
+            return None
+        return json.dumps({"jsonrpc": "2.0", "id": request_id, "result": result}, default=str).encode()
+
+    def _stream(self, conn, request):
+        params = request.get("params") or {}
+        events = EventQueue(get_event_bus(), topics=params.get("topics"), replay=params.get("replay", True))
+        try:
+            conn.send_bytes(json.dumps({"jsonrpc": "2.0", "id": request.get("id"), "result": True}).encode())
+            while self.running:
+                batch = events.drain(EVENT_BATCH)
+                dropped = events.take_dropped()
+                if batch or dropped:
+                    conn.send_bytes(json.dumps({"jsonrpc": "2.0", "method": "events",
+                                                "params": {"events": batch, "dropped": dropped}}, default=str).encode())
+                # Doubles as the pause between batches; a readable conn here means the client hung up
+                if len(batch) < EVENT_BATCH and conn.poll(EVENT_INTERVAL):
+                    conn.recv_bytes()
+        except (EOFError, OSError):
+            pass # client went away
+        finally:
+            events.close()
+
+
+class ControlClient:
+    """
+    Client of ControlServer. call() is safe from several threads (one
+    request in flight at a time on the shared connection); the event stream
+    uses a connection of its own.
+    """
+
+    def __init__(self, address=None, authkey=None):
+        self.address = address or default_address()
+        self.authkey = authkey if authkey is not None else load_authkey()
+        self.lock = threading.Lock()
+        self.next_id = 0
+        self.conn = Client(self.address, authkey=self.authkey)
+
+    def call(self, method, *args, **kwargs):
+        with self.lock:
+            self.next_id += 1
+            request = {"jsonrpc": "2.0", "id": self.next_id, "method": method, "params": list(args) or kwargs}
+            self.conn.send_bytes(json.dumps(request).encode())
+            response = json.loads(self.conn.recv_bytes())
+        if "error" in response:
+            raise ControlError(response["error"].get("code"), response["error"].get("message"))
+        return response.get("result")
+
+    def stream_events(self, callback, topics=None, keep_running=lambda: True):
+        """Blocks, calling callback(events, dropped) for every pushed batch until keep_running() is False or the daemon goes away."""
+        conn = Client(self.address, authkey=self.authkey)
+        try:
+            conn.send_bytes(json.dumps({"jsonrpc": "2.0", "id": 0, "method": "events.subscribe",
+                                        "params": {"topics": topics}}).encode())
+            conn.recv_bytes() # subscription acknowledged
+            while keep_running():
+                if not conn.poll(0.5):
+                    continue
+                message = json.loads(conn.recv_bytes())
+                callback(message["params"]["events"], message["params"].get("dropped", 0))
+        except (EOFError, OSError) as e:
+            if keep_running():
+                logging.error(f"Lost the daemon's event stream: {e}")
+        finally:
+            conn.close()
+
+    def close(self):
+        try:
+            self.conn.close()
+        except Exception:
+            pass
+
+
+class _RemotePolicy:
+    def __init__(self, client):
+        self.client = client
+
+    def allowed_devices(self):
+        return self.client.call("policy.allowed")
+
+    def blocked_devices(self):
+        return self.client.call("policy.blocked")
+
+
+class _RemoteReporter:
+    def __init__(self, client):
+        self.client = client
+        self.report_path = None
+
+    def generate_report(self):
+        result = self.client.call("report.generate")
+        self.report_path = result["path"]
+        return result["ok"]
+
+
+class _RemoteBackend:
+    name = "remote"
+
+    def thread_init(self):
+        """Nothing to set up: the daemon owns the platform backend."""
+
+    def thread_exit(self):
+        pass
+
+
+class RemoteMonitor:
+    """
+    The part of USBMonitor the dashboard uses, forwarded to a daemon over
+    the control API. Live events from the daemon are republished on this
+    process's event bus, so the dashboard consumes them unchanged.
+    """
+
+    def __init__(self, client):
+        self.client = client
+        self.policy_store = _RemotePolicy(client)
+        self.reporter = _RemoteReporter(client)
+        self.backend = _RemoteBackend()
+        self.config = client.call("config")
+        self.running = True
+        self.stream_thread = threading.Thread(target=self._stream, name="control-events", daemon=True)
+        self.stream_thread.start()
+
+    def _stream(self):
+        bus = get_event_bus()
+
+        def republish(events, dropped):
+            for event in events:
+                fields = {k: v for k, v in event.items() if k not in ("topic", "message", "level")}
+                bus.publish(event["topic"], event["message"], event.get("level", "INFO"), **fields)
+            if dropped:
+                bus.publish("file", f"... {dropped} events skipped by the daemon ...", "WARNING")
+
+        self.client.stream_events(republish, topics=["usb", "file", "io"], keep_running=lambda: self.running)
+
+    @property
+    def monitoring(self):
+        return self.client.call("status")["monitoring"]
+
+    @property
+    def active_drives(self):
+        return self.client.call("devices.active")
+
+    def get_all_attached_devices(self):
+        return self.client.call("devices.attached")
+
+    def disable_device(self, pnp_id):
+        return self.client.call("device.disable", pnp_id)
+
+    def enable_device(self, pnp_id):
+        return self.client.call("device.enable", pnp_id)
+
+    def block_device_manual(self, fingerprint):
+        self.client.call("policy.block", fingerprint)
+
+    def allow_device(self, fingerprint):
+        self.client.call("policy.allow", fingerprint)
+
+    def start(self):
+        self.client.call("monitor.start")
+
+    def stop(self):
+        self.client.call("monitor.stop")
+
+    def close(self):
+        self.running = False
+        self.client.close()
+
+
+def main(argv=None):
+    """
+    python -m core.control_api [--address ADDR] <method> [json params]
+    e.g.  python -m core.control_api status
+          python -m core.control_api device.disable '["USBSTOR\\\\DISK&VEN_X&PROD_Y\\\\123&0"]'
+    """
+    parser = argparse.ArgumentParser(prog="python -m core.control_api", description="Query or control a running daemon.")
+    parser.add_argument("--address", default=None)
+    parser.add_argument("method")
+    parser.add_argument("params", nargs="?", default=None, help="JSON list or object")
+    args = parser.parse_args(argv)
+
+    try:
+        client = ControlClient(args.address)
+        params = json.loads(args.params) if args.params else []
+        result = client.call(args.method, *params) if isinstance(params, list) else client.call(args.method, **params)
+    except (OSError, EOFError) as e:
+        print(f"Cannot reach the daemon: {e}", file=sys.stderr)
+        return 1
+    except ControlError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+    print(json.dumps(result, indent=2, default=str))
+    client.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
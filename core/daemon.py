@@ -0,0 +1,88 @@
+"""
+Headless monitor: runs USBMonitor with the control API and no GUI imports.
+
+    python -m core.daemon [--backend wmi|udev|simulator] [--address ADDR]
+
+The dashboard (python app.py) attaches to a running daemon as a thin
+client; `python -m core.control_api status` queries it from a shell.
+"""
+from .startup_profile import get_startup_profile
+startup = get_startup_profile()
+
+import os
+import sys
+import signal
+import logging
+import argparse
+import threading
+
+with startup.phase("import: monitor"):
+    from .config import load_config
+    from .log_pipeline import configure_logging
+    from .reporter import Reporter
+    from .usb_monitor import USBMonitor
+    from .control_api import ControlServer, load_authkey
+
+
+class Daemon:
+    def __init__(self, config, address=None):
+        self.config = config
+        settings = config["settings"]
+        self.stopped = threading.Event()
+        self.reporter = Reporter(settings.get("report_file", "reports/final_usb_audit_report.txt"))
+        self.monitor = USBMonitor(config, self.reporter)
+        self.server = ControlServer(self.monitor, address or settings.get("control_address"),
+                                    authkey=load_authkey(create=True), on_shutdown=self.stop)
+
+    def start(self):
+        # API first: a client can connect (and watch the startup scan) right away
+        self.server.start()
+        startup.mark("control API ready")
+        try:
+            with startup.phase("monitor: start"):
+                self.monitor.start()
+        except Exception as e:
+            logging.error(f"Failed to start backend: {e}")
+
+    def stop(self):
+        if self.stopped.is_set():
+            return
+        logging.info("Daemon: shutting down...")
+        self.server.stop()
+        self.monitor.stop()
+        self.stopped.set()
+
+    def wait(self):
+        # Short waits keep Ctrl+C responsive on Windows
+        while not self.stopped.wait(0.5):
+            pass
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m core.daemon", description="Headless USB monitor with a local control API.")
+    parser.add_argument("--backend", default=None, help="wmi, udev or simulator (default: platform native)")
+    parser.add_argument("--address", default=None, help="named pipe / Unix socket for the control API")
+    args = parser.parse_args(argv)
+
+    with startup.phase("config"):
+        config = load_config()
+    if args.backend:
+        config["settings"]["backend"] = args.backend
+    with startup.phase("logging"):
+        os.makedirs("logs", exist_ok=True)
+        log_pipeline = configure_logging(config["settings"])
+
+    with startup.phase("monitor: construct"):
+        daemon = Daemon(config, args.address)
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        signal.signal(sig, lambda *_: threading.Thread(target=daemon.stop, daemon=True).start())
+    daemon.start()
+    logging.info(f"Daemon ready in {startup.now():.2f} s (pid {os.getpid()}); the startup scan continues in the background")
+
+    daemon.wait()
+    log_pipeline.stop()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
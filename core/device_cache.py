@@ -0,0 +1,250 @@
+import sys
+import time
+import struct
+import logging
+import threading
+from collections import OrderedDict
+
+def physical_drive_name(raw_id):
+    """
+    Converts a Win32_DiskDrive.DeviceID ("\\\\.\\PHYSICALDRIVE1") to the name
+    psutil uses ("PhysicalDrive1"). Returns None for anything else.
+    """
+    if raw_id and "PHYSICALDRIVE" in raw_id.upper():
+        index = raw_id.upper().split("PHYSICALDRIVE")[1]
+        return f"PhysicalDrive{index}"
+    return None
+
+
+# --- Win32 volume identity (no WMI round-trip) ---
+
+_DRIVE_REMOVABLE = 2
+_IOCTL_STORAGE_GET_DEVICE_NUMBER = 0x2D1080
+_IOCTL_STORAGE_QUERY_PROPERTY = 0x2D1400
+_OPEN_EXISTING = 3
+_FILE_SHARE_READ_WRITE = 0x1 | 0x2
+
+
+def _read_descriptor_string(buf, offset):
+    if not offset or offset >= len(buf):
+        return ""
+    end = buf.find(b"\x00", offset)
+    return buf[offset:end if end != -1 else len(buf)].decode("ascii", "ignore").strip()
+
+
+def query_volume_identity(drive_letter):
+    """
+    Reads (volume_serial, hardware_identity, physical_drive) for a mounted volume
+    with direct Win32 calls. Returns None if unavailable (non-Windows, access denied,
+    not removable). The hardware identity (vendor/product/serial from the storage
+    descriptor) is what stops a cloned volume serial from matching a cached device.
+    """
+    if sys.platform != "win32":
+        return None
+
+    import ctypes
+    from ctypes import wintypes
+
+    kernel32 = ctypes.windll.kernel32
+    drive = drive_letter.rstrip('\\')
+    root = f"{drive}\\"
+
+    if kernel32.GetDriveTypeW(root) != _DRIVE_REMOVABLE:
+        return None
+
+    serial = wintypes.DWORD(0)
+    if not kernel32.GetVolumeInformationW(root, None, 0, ctypes.byref(serial), None, None, None, 0):
+        return None
+
+    kernel32.CreateFileW.restype = wintypes.HANDLE
+    handle = kernel32.CreateFileW(f"\\\\.\\{drive}", 0, _FILE_SHARE_READ_WRITE, None, _OPEN_EXISTING, 0, None)
+    if not handle or handle == wintypes.HANDLE(-1).value:
+        return None
+
+    try:
+        returned = wintypes.DWORD(0)
+
+        # STORAGE_DEVICE_NUMBER { DeviceType, DeviceNumber, PartitionNumber }
+        number_buf = ctypes.create_string_buffer(12)
+        physical_drive = None
+        if kernel32.DeviceIoControl(handle, _IOCTL_STORAGE_GET_DEVICE_NUMBER, None, 0,
+                                    number_buf, len(number_buf), ctypes.byref(returned), None):
+            physical_drive = f"PhysicalDrive{struct.unpack_from('<III', number_buf.raw)[1]}"
+
+        # STORAGE_PROPERTY_QUERY { PropertyId=StorageDeviceProperty, QueryType=PropertyStandardQuery }
+        query = struct.pack("<II4x", 0, 0)
+        desc_buf = ctypes.create_string_buffer(1024)
+        if not kernel32.DeviceIoControl(handle, _IOCTL_STORAGE_QUERY_PROPERTY, query, len(query),
+                                        desc_buf, len(desc_buf), ctypes.byref(returned), None):
+            return None
+
+        raw = desc_buf.raw
+        vendor_off, product_off, _rev_off, serial_off = struct.unpack_from("<IIII", raw, 12)
+        identity = (_read_descriptor_string(raw, vendor_off),
+                    _read_descriptor_string(raw, product_off),
+                    _read_descriptor_string(raw, serial_off))
+        if not identity[2]:
+            # Without a hardware serial we can't tell clones apart: don't cache by volume
+            return None
+
+        return (f"{serial.value:08X}", identity, physical_drive)
+    except Exception as e:
+        logging.debug(f"Volume identity query failed for {drive_letter}: {e}")
+        return None
+    finally:
+        kernel32.CloseHandle(handle)
+
+
+class DeviceTopologyCache:
+    """
+    Shared drive-letter/volume -> device topology cache.
+
+    Each entry holds the USBSTOR pnp_id, the PhysicalDriveN index and the
+    Win32_PnPEntity details. Entries are reachable by drive letter (while
+    mounted) and by volume identity (volume serial + hardware descriptor), so a
+    known stick re-inserted on any letter is resolved without WMI queries.
+    Bounded by max_entries (LRU) and ttl seconds.
+    """
+
+    def __init__(self, max_entries=256, ttl=3600):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.lock = threading.Lock()
+        self.entries = OrderedDict() # entry key -> entry dict (LRU order)
+        self.by_drive = {}           # "E:" -> entry key
+        self.by_pnp = {}             # pnp_id -> entry key
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def _drive_key(drive_letter):
+        return drive_letter.rstrip('\\').upper()
+
+    def _expired(self, entry):
+        return self.ttl and (time.monotonic() - entry['stored_at']) > self.ttl
+
+    def _drop(self, key):
+        entry = self.entries.pop(key, None)
+        if entry is None:
+            return
+        for drive, k in list(self.by_drive.items()):
+            if k == key:
+                del self.by_drive[drive]
+        if entry.get('pnp_id') and self.by_pnp.get(entry['pnp_id']) == key:
+            del self.by_pnp[entry['pnp_id']]
+
+    def _get(self, key):
+        entry = self.entries.get(key)
+        if entry is None:
+            return None
+        if self._expired(entry):
+            self._drop(key)
+            return None
+        self.entries.move_to_end(key)
+        return entry
+
+    def lookup(self, drive_letter):
+        """
+        Returns a copy of the cached entry for a mounted drive, or None.
+        Falls back to the volume identity for drives not seen under this letter yet.
+        """
+        drive = self._drive_key(drive_letter)
+        with self.lock:
+            key = self.by_drive.get(drive)
+            entry = self._get(key) if key is not None else None
+            if entry is not None:
+                self.hits += 1
+                return dict(entry)
+
+        identity = query_volume_identity(drive)
+        with self.lock:
+            entry = self._get(identity[:2]) if identity else None
+            if entry is None:
+                self.misses += 1
+                return None
+
+            # Re-insertion of a known stick: rebind letter, refresh disk index
+            self.by_drive[drive] = identity[:2]
+            if identity[2]:
+                entry['physical_drive'] = identity[2]
+            self.hits += 1
+            return dict(entry)
+
+    def store(self, drive_letter, **fields):
+        """Merges fields (pnp_id, physical_drive, details) into the drive's entry."""
+        drive = self._drive_key(drive_letter)
+        with self.lock:
+            key = self.by_drive.get(drive)
+            known = key is not None and self._get(key) is not None
+        # The Win32 query stays outside the lock; only a drive not seen yet needs it
+        identity = None if known else query_volume_identity(drive)
+
+        with self.lock:
+            key = self.by_drive.get(drive)
+            entry = self._get(key) if key is not None else None
+            if entry is None:
+                # Volume identity when available, otherwise only addressable by letter
+                key = identity[:2] if identity else ("drive", drive)
+                entry = self._get(key) or {'stored_at': time.monotonic()}
+                self.entries[key] = entry
+                self.by_drive[drive] = key
+            entry.update({k: v for k, v in fields.items() if v is not None})
+            if entry.get('pnp_id'):
+                self.by_pnp[entry['pnp_id']] = key
+            while len(self.entries) > self.max_entries:
+                self._drop(next(iter(self.entries)))
+
+    def volume_serial(self, drive_letter):
+        """The volume serial of a mounted drive, from its cached identity when it has one."""
+        drive = self._drive_key(drive_letter)
+        with self.lock:
+            key = self.by_drive.get(drive)
+        if key is not None and key[0] != "drive":
+            return key[0]
+        identity = query_volume_identity(drive)
+        return identity[0] if identity else None
+
+    def details_for(self, pnp_id):
+        with self.lock:
+            key = self.by_pnp.get(pnp_id)
+            entry = self._get(key) if key is not None else None
+            if entry and entry.get('details'):
+                self.hits += 1
+                return dict(entry['details'])
+            self.misses += 1
+            return None
+
+    def store_details(self, pnp_id, details):
+        with self.lock:
+            key = self.by_pnp.get(pnp_id)
+            entry = self._get(key) if key is not None else None
+            if entry is not None:
+                entry['details'] = dict(details)
+
+    def invalidate_drive(self, drive_letter):
+        """
+        Called on removal. The letter may be reused by another device and the
+        PhysicalDriveN index is reassigned on re-insertion, so both are dropped.
+        pnp_id/details stay cached under the volume identity.
+        """
+        drive = self._drive_key(drive_letter)
+        with self.lock:
+            key = self.by_drive.pop(drive, None)
+            entry = self.entries.get(key) if key is not None else None
+            if entry is None:
+                return
+            entry.pop('physical_drive', None)
+            if key[0] == "drive":
+                # Letter-only entry: nothing identifies it once unmounted
+                self._drop(key)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.by_drive.clear()
+            self.by_pnp.clear()
+
+    def stats(self):
+        with self.lock:
+            return {'entries': len(self.entries), 'mounted': len(self.by_drive),
+                    'hits': self.hits, 'misses': self.misses}
@@ -0,0 +1,57 @@
+import threading
+
+# Verdicts (the same names as the event types published for them)
+ALLOWED = "ALLOWED"
+BLOCKED = "BLOCK"
+BLOCK_FAILED = "BLOCK_FAILED"
+
+_PENDING = object()
+
+
+class DecisionTable:
+    """
+    Policy verdict per attached device_id, shared by the two paths that can
+    see a new device: PnP arrival (before any volume exists) and volume
+    mount. Whichever claims a device first evaluates it; the other waits for
+    and reuses its verdict, so a device is counted, alerted on and blocked
+    once, and later volumes of it (more partitions, more LUNs) only attach
+    auditing.
+    """
+
+    def __init__(self):
+        self.cond = threading.Condition()
+        self.entries = {} # device_id -> _PENDING or (verdict, fingerprint)
+
+    def claim(self, device_id, timeout=5.0):
+        """
+        Returns (True, None) if the caller must evaluate device_id (and then
+        call settle), or (False, (verdict, fingerprint)) with the other
+        path's verdict. A failed block is handed out again so it is retried.
+        """
+        with self.cond:
+            if self.entries.get(device_id) is _PENDING:
+                self.cond.wait_for(lambda: self.entries.get(device_id) is not _PENDING, timeout)
+            entry = self.entries.get(device_id)
+            if entry is None or entry is _PENDING or entry[0] == BLOCK_FAILED:
+                # Unseen, forgotten meanwhile, or the other path is stuck: evaluate
+                self.entries[device_id] = _PENDING
+                return True, None
+            return False, entry
+
+    def settle(self, device_id, verdict, fingerprint=None):
+        with self.cond:
+            self.entries[device_id] = (verdict, fingerprint)
+            self.cond.notify_all()
+
+    def get(self, device_id):
+        entry = self.entries.get(device_id)
+        return None if entry is _PENDING else entry
+
+    def forget(self, device_id):
+        """Drops the verdict (device removed or re-enabled), waking anyone waiting on it."""
+        with self.cond:
+            if self.entries.pop(device_id, None) is not None:
+                self.cond.notify_all()
+
+    def __len__(self):
+        return len(self.entries)
@@ -1,4 +1,133 @@
+import re
 import logging
+from functools import lru_cache
+from collections.abc import Mapping
+
+# One pass over a PnP instance ID:
+#   USBSTOR\DISK&VEN_SANDISK&PROD_DUAL_DRIVE&REV_1.00\4C531001591110115041&0
+#   UASPSTOR\Disk&Ven_Samsung&Prod_Portable_SSD_T5&Rev_0\0123456789ABCDEF&0
+#   SCSI\DISK&VEN_SAMSUNG&PROD_PORTABLE_SSD_T5\7&2A0E7F3&0&000000
+#   USB\VID_0781&PID_5581\4C530001080813117524
+#   USB\VID_0781&PID_5581&MI_00\6&1A2B3C4D&0&0000
+_DEVICE_ID_RE = re.compile(r"""
+    (?:
+        (?P<stor>USBSTOR|UASPSTOR|SCSI)\\
+        (?:[^\\]*?VEN_(?P<ven>[^&\\]*))?
+        (?:[^\\]*?PROD_(?P<prod>[^&\\]*))?
+        [^\\]*\\
+        (?P<serial>[^&\\]*)(?P<suffix>[^\\]*)
+    |
+        USB\\
+        (?:VID_(?P<vid>[^&\\]*)&PID_(?P<pid>[^&\\]*))?
+        [^\\]*
+        (?:\\(?P<instance>[^\\]*))?
+    )
+""", re.IGNORECASE | re.VERBOSE)
+
+
+@lru_cache(maxsize=8192)
+def _parse(pnp_device_id):
+    """(vendor_id, product_id, serial_number) of a PnP ID; cached per raw ID string."""
+    match = _DEVICE_ID_RE.match(pnp_device_id)
+    if match is None:
+        return ("UNKNOWN", "UNKNOWN", "UNKNOWN")
+    stor, ven, prod, serial, suffix, vid, pid, instance = match.groups("UNKNOWN")
+    if stor != "UNKNOWN":
+        # USBSTOR / UASPSTOR append "&<lun>" to the device serial. SCSI (UAS
+        # behind a SCSI port driver) carries no serial, only a port path, so
+        # the whole instance is the identity
+        if stor.upper() == "SCSI":
+            serial += suffix
+        return (ven, prod, serial)
+    return (vid, pid, instance)
+
+class Fingerprint(Mapping):
+    """
+    Immutable identity of a USB storage device. Compact (__slots__), hashable
+    and interned: Fingerprint.of() returns one shared instance per distinct
+    value, so fingerprints can key dicts and sets and usually compare by
+    identity. Also a read-only mapping with the keys of the old fingerprint
+    dict (fp["serial_number"], fp.get(...), dict(fp), JSON), so code that takes
+    either a fingerprint or a policy entry keeps working.
+    """
+
+    FIELDS = ("vendor_id", "product_id", "serial_number", "device_name", "device_id")
+    __slots__ = FIELDS + ("_hash",)
+
+    def __init__(self, vendor_id="UNKNOWN", product_id="UNKNOWN", serial_number="UNKNOWN",
+                 device_name="Unknown Device", device_id="UNKNOWN"):
+        set_field = object.__setattr__ # __setattr__ below refuses
+        set_field(self, "vendor_id", vendor_id)
+        set_field(self, "product_id", product_id)
+        set_field(self, "serial_number", serial_number)
+        set_field(self, "device_name", device_name)
+        set_field(self, "device_id", device_id)
+        set_field(self, "_hash", hash((vendor_id, product_id, serial_number, device_name, device_id)))
+
+    @staticmethod
+    def of(vendor_id="UNKNOWN", product_id="UNKNOWN", serial_number="UNKNOWN",
+           device_name="Unknown Device", device_id="UNKNOWN"):
+        """The interned Fingerprint for these values."""
+        return _intern(vendor_id, product_id, serial_number, device_name, device_id)
+
+    def _values(self):
+        return (self.vendor_id, self.product_id, self.serial_number, self.device_name, self.device_id)
+
+    def __setattr__(self, name, value):
+        raise AttributeError("Fingerprint is immutable")
+
+    def __delattr__(self, name):
+        raise AttributeError("Fingerprint is immutable")
+
+    def __reduce__(self):
+        return (Fingerprint.of, self._values())
+
+    # --- Mapping ---
+
+    def __getitem__(self, key):
+        if key in self.FIELDS:
+            return getattr(self, key)
+        raise KeyError(key)
+
+    def __iter__(self):
+        return iter(self.FIELDS)
+
+    def __len__(self):
+        return len(self.FIELDS)
+
+    def __contains__(self, key):
+        return key in self.FIELDS
+
+    # --- Value semantics ---
+
+    def __hash__(self):
+        return self._hash
+
+    def __eq__(self, other):
+        if self is other:
+            return True
+        if isinstance(other, Fingerprint):
+            return self._hash == other._hash and self._values() == other._values()
+        if isinstance(other, Mapping):
+            return dict(self) == dict(other)
+        return NotImplemented
+
+    def __ne__(self, other):
+        result = self.__eq__(other)
+        return result if result is NotImplemented else not result
+
+    def __repr__(self):
+        return "Fingerprint(" + ", ".join(f"{name}={getattr(self, name)!r}" for name in self.FIELDS) + ")"
+
+    def __str__(self):
+        # Log lines keep the old dict rendering
+        return str(dict(self))
+
+
+@lru_cache(maxsize=4096)
+def _intern(vendor_id, product_id, serial_number, device_name, device_id):
+    return Fingerprint(vendor_id, product_id, serial_number, device_name, device_id)
+
 
 class DeviceIdentifier:
     """
@@ -8,22 +137,36 @@ class DeviceIdentifier:
     @staticmethod
     def get_device_fingerprint(device_info):
         """
-        Generates a dictionary fingerprint from the device info.
-        
+        Generates the fingerprint of a device from its info.
+
         Args:
             device_info (dict): Dictionary containing raw device data.
                                 Expected keys: VendorID, ProductID, SerialNumber, DeviceName, DeviceID.
-        
+
         Returns:
-            dict: Structured fingerprint.
+            Fingerprint: Interned, read-only (a mapping with the old dict keys).
         """
-        return {
-            "vendor_id": device_info.get("VendorID", "UNKNOWN"),
-            "product_id": device_info.get("ProductID", "UNKNOWN"),
-            "serial_number": device_info.get("SerialNumber", "UNKNOWN"),
-            "device_name": device_info.get("DeviceName", "Unknown Device"),
-            "device_id": device_info.get("DeviceID", "UNKNOWN")
-        }
+        return Fingerprint.of(
+            device_info.get("VendorID", "UNKNOWN"),
+            device_info.get("ProductID", "UNKNOWN"),
+            device_info.get("SerialNumber", "UNKNOWN"),
+            device_info.get("DeviceName", "Unknown Device"),
+            device_info.get("DeviceID", "UNKNOWN")
+        )
+
+    @staticmethod
+    def fingerprint_from_id(pnp_device_id, device_name="Unknown Device"):
+        """Fingerprint straight from a PnP ID, without building the parse_device_id dict."""
+        vendor_id, product_id, serial = DeviceIdentifier._parse_fields(pnp_device_id)
+        return Fingerprint.of(vendor_id, product_id, serial, device_name, pnp_device_id)
+
+    @staticmethod
+    def _parse_fields(pnp_device_id):
+        try:
+            return _parse(pnp_device_id)
+        except Exception as e:
+            logging.error(f"Error parsing Device ID {pnp_device_id}: {e}")
+            return ("UNKNOWN", "UNKNOWN", "UNKNOWN")
 
     @staticmethod
     def parse_device_id(pnp_device_id):
@@ -32,60 +175,14 @@ class DeviceIdentifier:
         Supports:
           - USB\\VID_xxxx&PID_yyyy\\serial
           - USBSTOR\\DISK&VEN_xxxx&PROD_yyyy...\\serial
+          - UASPSTOR\\DISK&VEN_xxxx&PROD_yyyy...\\serial
+          - SCSI\\DISK&VEN_xxxx&PROD_yyyy\\instance (UAS drives; no serial, the instance path stands in)
+        Returns a new dict each call (callers add their own keys).
         """
-        fingerprint = {
-            "VendorID": "UNKNOWN",
-            "ProductID": "UNKNOWN",
-            "SerialNumber": "UNKNOWN",
+        vendor_id, product_id, serial = DeviceIdentifier._parse_fields(pnp_device_id)
+        return {
+            "VendorID": vendor_id,
+            "ProductID": product_id,
+            "SerialNumber": serial,
             "DeviceID": pnp_device_id
         }
-        
-        try:
-            # Handle USBSTOR (Disk Drive) format
-            # Example: USBSTOR\DISK&VEN_SANDISK&PROD_DUAL_DRIVE&REV_1.00\4C531001591110115041&0
-            if pnp_device_id.startswith("USBSTOR"):
-                parts = pnp_device_id.split('\\')
-                if len(parts) >= 3:
-                     # part[1] = DISK&VEN_SANDISK&PROD_...
-                     # part[2] = 4C53...&0 (Serial)
-                     
-                     props = parts[1]
-                     serial = parts[2]
-                     
-                     # Clean serial (remove &0 suffix usually added by Windows for unique instance)
-                     if "&" in serial:
-                         serial = serial.split("&")[0]
-                     fingerprint["SerialNumber"] = serial
-                     
-                     # Extract VEN and PROD
-                     # Naive parse of "VEN_XXXX&PROD_YYYY"
-                     if "VEN_" in props:
-                         try:
-                             fingerprint["VendorID"] = props.split("VEN_")[1].split("&")[0]
-                         except: pass
-                     if "PROD_" in props:
-                         try:
-                             fingerprint["ProductID"] = props.split("PROD_")[1].split("&")[0]
-                         except: pass
-                         
-                return fingerprint
-
-            # Handle Standard USB format
-            # Example: USB\VID_0781&PID_5581\...
-            if pnp_device_id.startswith("USB"):
-                parts = pnp_device_id.split('\\')
-                if len(parts) >= 2:
-                    vid_pid = parts[1]
-                    serial = parts[2] if len(parts) > 2 else "UNKNOWN"
-                    
-                    if "VID_" in vid_pid and "PID_" in vid_pid:
-                        fingerprint["VendorID"] = vid_pid.split("VID_")[1].split("&")[0]
-                        fingerprint["ProductID"] = vid_pid.split("PID_")[1]
-                    
-                    fingerprint["SerialNumber"] = serial
-                return fingerprint
-                
-        except Exception as e:
-            logging.error(f"Error parsing Device ID {pnp_device_id}: {e}")
-        
-        return fingerprint
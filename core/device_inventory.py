@@ -0,0 +1,201 @@
+import time
+import logging
+import threading
+from types import MappingProxyType
+
+from .device_identifier import DeviceIdentifier
+
+def make_record(raw):
+    """
+    Freezes one enumerate_attached() entry, adding the snake_case fingerprint
+    fields (serial_number, vendor_id, product_id, device_name) policy code
+    and the dashboard key on.
+    """
+    record = dict(raw)
+    record.setdefault("DeviceID", record.get("device_id"))
+    record.setdefault("DeviceName", record.get("name") or "Unknown Device")
+    fingerprint = DeviceIdentifier.get_device_fingerprint(record)
+    record.update(fingerprint)
+    record["status_raw"] = record.get("status_raw") or "Unknown"
+    return MappingProxyType(record)
+
+
+class DeviceInventory:
+    """
+    Authoritative in-memory table of attached USB storage devices (enabled
+    or disabled), keyed by device_id.
+
+    A watcher thread applies the backend's arrival / status-change / removal
+    events as they happen (backend.watch_attached); a reconciliation sweep
+    re-enumerates everything every `reconcile_interval` seconds to repair
+    missed events, or every `poll_interval` when the backend has no events.
+
+    Readers never touch the backend: snapshot() returns the current tuple of
+    read-only records, rebuilt by writers on every change (copy-on-write),
+    so a read is one attribute load. Listeners hear about devices entering
+    ("add") and leaving ("remove") the table, whichever path noticed them.
+    """
+
+    def __init__(self, backend, reconcile_interval=300.0, poll_interval=5.0):
+        self.backend = backend
+        self.reconcile_interval = reconcile_interval
+        self.poll_interval = poll_interval
+        self.lock = threading.Lock()
+        self.devices = {} # device_id -> record (writers only, under lock)
+        self._snapshot = ()
+        self.version = 0 # bumped on every change; cheap "anything new?" check
+        self.ready = threading.Event() # set after the first sweep
+        self.has_events = False
+        self.running = False
+        self.wake = threading.Event()
+        self.threads = []
+        self.listeners = [] # on_change(action, record), called outside the lock
+        self.counters = {'events': 0, 'sweeps': 0, 'sweep_repairs': 0}
+
+    # --- Readers ---
+
+    def snapshot(self):
+        """Every attached device as a tuple of read-only records. Never blocks."""
+        return self._snapshot
+
+    def get(self, device_id):
+        # A single dict lookup is atomic; records themselves are never mutated
+        return self.devices.get(device_id)
+
+    def wait_ready(self, timeout=None):
+        return self.ready.wait(timeout)
+
+    # --- Writers ---
+
+    def add_listener(self, on_change):
+        """on_change("add", record) for new device_ids, on_change("remove", {"device_id"}) when they go."""
+        self.listeners.append(on_change)
+
+    def _notify(self, changes):
+        for action, record in changes:
+            for on_change in list(self.listeners):
+                try:
+                    on_change(action, record)
+                except Exception as e:
+                    logging.error(f"Device inventory listener failed: {e}")
+
+    def _publish(self):
+        # Caller holds the lock
+        self._snapshot = tuple(self.devices.values())
+        self.version += 1
+
+    def apply(self, action, raw):
+        """Applies one backend event: "add" / "change" with a record, "remove" with at least device_id."""
+        device_id = raw.get("device_id")
+        if not device_id:
+            return
+        with self.lock:
+            self.counters['events'] += 1
+            if action == "remove":
+                if self.devices.pop(device_id, None) is None:
+                    return
+                change = ("remove", {"device_id": device_id})
+            else:
+                record = make_record(raw)
+                known = self.devices.get(device_id)
+                if known == record:
+                    return
+                self.devices[device_id] = record
+                change = ("add", record) if known is None else None
+            self._publish()
+        if change:
+            self._notify([change])
+
+    def set_status(self, device_id, status):
+        """Records the outcome of our own disable/enable without waiting for the backend event."""
+        with self.lock:
+            record = self.devices.get(device_id)
+            if record is None or record["status_raw"] == status:
+                return
+            updated = dict(record)
+            updated["status_raw"] = status
+            self.devices[device_id] = MappingProxyType(updated)
+            self._publish()
+
+    def reconcile(self):
+        """Full sweep: replaces the table with a fresh enumeration. Returns the number of repairs."""
+        seen = self.version
+        fresh = {}
+        for raw in self.backend.enumerate_attached():
+            if raw.get("device_id"):
+                fresh[raw["device_id"]] = make_record(raw)
+        with self.lock:
+            self.counters['sweeps'] += 1
+            if self.ready.is_set() and self.version != seen:
+                return 0 # events landed during the enumeration and are newer than it
+            repairs = len(fresh.keys() ^ self.devices.keys()) + sum(
+                1 for k in fresh.keys() & self.devices.keys() if fresh[k] != self.devices[k])
+            # Arrivals / removals the events missed (everything, on the first sweep)
+            changes = [("add", fresh[k]) for k in fresh.keys() - self.devices.keys()]
+            changes += [("remove", {"device_id": k}) for k in self.devices.keys() - fresh.keys()]
+            if repairs or not self.ready.is_set():
+                self.devices = fresh
+                self._publish()
+            if self.ready.is_set():
+                self.counters['sweep_repairs'] += repairs
+        self.ready.set()
+        self._notify(changes)
+        return repairs
+
+    # --- Threads ---
+
+    def start(self):
+        if self.running:
+            return
+        self.running = True
+        self.has_events = True # until the backend says otherwise
+        self.wake.clear()
+        self.threads = [
+            threading.Thread(target=self._reconcile_loop, name="inventory-sweep", daemon=True),
+            threading.Thread(target=self._watch_loop, name="inventory-watch", daemon=True),
+        ]
+        for thread in self.threads:
+            thread.start()
+
+    def stop(self, timeout=2):
+        self.running = False
+        self.wake.set()
+        for thread in self.threads:
+            thread.join(timeout=timeout)
+        self.threads = []
+
+    def _watch_loop(self):
+        self.backend.thread_init()
+        try:
+            if self.backend.watch_attached(self.apply, lambda: self.running) is False:
+                self.has_events = False
+                logging.info(f"Backend '{self.backend.name}' has no device events; "
+                             f"re-enumerating attached devices every {self.poll_interval:.0f} s.")
+                self.wake.set() # let the sweep switch to the poll interval
+        except Exception as e:
+            self.has_events = False
+            logging.error(f"Device inventory watcher failed: {e}")
+            self.wake.set()
+        finally:
+            self.backend.thread_exit()
+
+    def _reconcile_loop(self):
+        self.backend.thread_init()
+        try:
+            while self.running:
+                started = time.monotonic()
+                try:
+                    repairs = self.reconcile()
+                    if repairs and self.has_events and self.counters['sweeps'] > 1:
+                        logging.info(f"Device inventory sweep repaired {repairs} entries missed by events.")
+                except Exception as e:
+                    logging.error(f"Device inventory sweep failed: {e}")
+                interval = self.reconcile_interval if self.has_events else self.poll_interval
+                self.wake.wait(max(0.0, interval - (time.monotonic() - started)))
+                self.wake.clear()
+        finally:
+            self.backend.thread_exit()
+
+    def stats(self):
+        with self.lock:
+            return dict(self.counters, devices=len(self.devices), version=self.version, has_events=self.has_events)
@@ -1,46 +1,33 @@
-import psutil
 import time
 import logging
 import threading
-import wmi
+
+from .io_accounting import create_counter_source, AdaptiveInterval
+from .handle_index import OpenHandleIndex, TARGET_APPS
+from .event_store import record_event
+from .event_bus import publish
 
 class DiskIOMonitor:
-    def __init__(self, reporter):
+    def __init__(self, reporter, backend, counter_source=None, target_apps=None):
         self.reporter = reporter
+        self.backend = backend
+        self.counter_source = counter_source or create_counter_source()
         self.monitored_drives = {} # drive_letter -> { 'physical_drive': 'PhysicalDriveX', 'last_read': 0, 'last_write': 0 }
         self.running = False
         self.thread = None
         self.lock = threading.Lock()
+        self.interval = AdaptiveInterval(fast=0.1, slow=2.0)
+        self.wake = threading.Event() # cuts the idle sleep short on new drives / stop
+        # One process/handle scan per tick, shared by every drive
+        self.handle_index = OpenHandleIndex(target_apps=target_apps or TARGET_APPS, min_interval=0.1)
+        self.burst_window = 1.0 # seconds to keep collecting file names for one transfer
+        self.bursts = {} # drive_letter -> {'started', 'bytes', 'files', 'dests'} (monitor thread only)
 
     def get_physical_drive_mapping(self, drive_letter):
         """
-        Maps a drive letter (G:) to PhysicalDriveN using WMI.
+        Maps a drive letter (G:) to the disk name the counter source uses (PhysicalDriveN / sdX).
         """
-        try:
-            c = wmi.WMI()
-            # Win32_LogicalDiskToPartition matches LogicalDisk (G:) to DiskPartition
-            drive_clean = drive_letter.rstrip('\\')
-            query = f'ASSOCIATORS OF {{Win32_LogicalDisk.DeviceID="{drive_clean}"}} WHERE AssocClass = Win32_LogicalDiskToPartition'
-            partitions = c.query(query)
-            
-            for part in partitions:
-                # Partition DeviceID is like "Disk #1, Partition #0"
-                # We need the Disk Index #1
-                # Win32_DiskDriveToDiskPartition matches Partition to DiskDrive
-                query_drive = f'ASSOCIATORS OF {{Win32_DiskPartition.DeviceID="{part.DeviceID}"}} WHERE AssocClass = Win32_DiskDriveToDiskPartition'
-                drives = c.query(query_drive)
-                for drive in drives:
-                     # drive.DeviceID is usually "\\.\PHYSICALDRIVE1"
-                     # psutil uses "PhysicalDrive1" (Case sensitive? No, usually Title Case)
-                     # Let's clean it.
-                     raw_id = drive.DeviceID # \\.\PHYSICALDRIVE1
-                     if "PHYSICALDRIVE" in raw_id.upper():
-                         index = raw_id.upper().split("PHYSICALDRIVE")[1]
-                         return f"PhysicalDrive{index}"
-            return None
-        except Exception as e:
-            logging.error(f"Error mapping {drive_letter} to physical drive: {e}")
-            return None
+        return self.backend.physical_disk(drive_letter)
 
     def start_monitoring(self, drive_letter):
         phy_drive = self.get_physical_drive_mapping(drive_letter)
@@ -48,63 +35,36 @@ class DiskIOMonitor:
             logging.warning(f"Could not map {drive_letter} to physical drive for IO monitoring.")
             return
 
-        logging.info(f"Mapping {drive_letter} -> {phy_drive} for IO Stats")
-        
-        with self.lock:
-            # Initialize baseline
-            io = psutil.disk_io_counters(perdisk=True).get(phy_drive)
-            if io:
+        logging.info(f"Mapping {drive_letter} -> {phy_drive} for IO Stats ({self.counter_source.name})")
+
+        # Initialize baseline (read outside the lock, only for this disk)
+        io = self.counter_source.read([phy_drive]).get(phy_drive)
+        if io:
+            self.handle_index.add_volume(drive_letter, self.backend.volume_root(drive_letter) or f"{drive_letter}\\")
+            with self.lock:
                 self.monitored_drives[drive_letter] = {
                     'physical_drive': phy_drive,
-                    'last_read': io.read_bytes,
-                    'last_write': io.write_bytes
+                    'last_read': io[0],
+                    'last_write': io[1]
                 }
-    
+            self.wake.set()
+
     def stop_monitoring(self, drive_letter):
         with self.lock:
-            if drive_letter in self.monitored_drives:
-                del self.monitored_drives[drive_letter]
+            data = self.monitored_drives.pop(drive_letter, None)
+            still_used = data and any(d['physical_drive'] == data['physical_drive'] for d in self.monitored_drives.values())
+        if data:
+            self.handle_index.remove_volume(drive_letter)
+        if data and not still_used:
+            self.counter_source.forget(data['physical_drive'])
 
     def find_open_files_on_drive(self, drive_letter):
         """
-        Scans likely file-transfer processes to find open file handles on the given drive.
-        Optimized: Only checks Explorer, Terminals, and common tools to avoid performance hit.
+        Returns the likely file-transfer processes holding files on the given drive.
+        Answered from the shared handle index, which rescans at most once per tick.
         """
-        procs_with_handle = {}
-        # Only scan apps likely to be copying files (User UI)
-        TARGET_APPS = ['explorer.exe', 'cmd.exe', 'powershell.exe', 'robocopy.exe', 'xcopy.exe', 'totalcmd.exe', 'python.exe']
-        
-        try:
-            # Filter by name upfront to save time
-            for proc in psutil.process_iter(['pid', 'name']):
-                try:
-                    if proc.info['name'].lower() not in TARGET_APPS:
-                        continue
-                    
-                    # Manually fetch open files safely
-                    try:
-                        flist = proc.open_files()
-                    except (psutil.AccessDenied, psutil.NoSuchProcess):
-                        continue
-                    
-                    if not flist: continue
-
-                    files_on_usb = []
-                    for f in flist:
-                        if f.path and f.path.lower().startswith(drive_letter.lower()):
-                            files_on_usb.append(f.path)
-                    
-                    if files_on_usb:
-                        procs_with_handle[proc.info['pid']] = {
-                             'name': proc.info['name'],
-                             'files': files_on_usb,
-                             'obj': proc 
-                        }
-                except Exception:
-                    continue
-        except Exception as e:
-            pass # logging.error(f"Scan Error: {e}")
-        return procs_with_handle
+        self.handle_index.refresh()
+        return self.handle_index.files_on(drive_letter)
 
     def find_destination_candidates(self, procs_data, usb_drive):
         """
@@ -112,98 +72,134 @@ class DiskIOMonitor:
         Returns a string of possible destinations.
         """
         destinations = []
-        for pid, data in procs_data.items():
-            proc = data['obj']
-            try:
-                # Re-check open files for THIS process only
-                # We want files NOT on USB drive
-                for f in proc.open_files():
-                    if not f.path.lower().startswith(usb_drive.lower()):
-                        # Heuristic: Valid destination usually on C: or D:
-                        if f.path[0].upper() in ['C', 'D', 'E']: 
-                             # Exclude system noise (dlls, prefetch, logs)
-                             ignored = ['.dll', '.nls', '.log', '.dat', '.ini', 'appdata', 'windows']
-                             if not any(x in f.path.lower() for x in ignored):
-                                 destinations.append(f.path)
-            except: pass
-        
+        ignored = ['.dll', '.nls', '.log', '.dat', '.ini', 'appdata', 'windows']
+        for pid in procs_data:
+            # We want files NOT on USB drive (from the same index snapshot)
+            for path in self.handle_index.files_off(pid, usb_drive):
+                # Heuristic: Valid destination usually on C: or D:
+                if path[0].upper() in ['C', 'D', 'E']:
+                    # Exclude system noise (dlls, prefetch, logs)
+                    if not any(x in path.lower() for x in ignored):
+                        destinations.append(path)
+
         return list(set(destinations))
 
+    def collect_burst(self, drive_letter, delta_read, now):
+        """
+        Adds one tick's read delta and the processes currently holding files on
+        the drive to the drive's open burst.
+        """
+        burst = self.bursts.get(drive_letter)
+        if burst is None:
+            burst = self.bursts[drive_letter] = {'started': now, 'bytes': 0, 'files': set(), 'dests': set()}
+        burst['bytes'] += delta_read
+
+        found_procs = self.find_open_files_on_drive(drive_letter)
+        for pid, pdata in found_procs.items():
+            burst['files'].update(pdata['files'])
+        if found_procs:
+            burst['dests'].update(self.find_destination_candidates(found_procs, drive_letter))
+        return burst
+
+    def report_transfer(self, drive_letter, burst):
+        """
+        Logs one finished transfer burst.
+        Runs without holding self.lock so start/stop_monitoring never wait on it.
+        """
+        delta_read = burst['bytes']
+        mb_read = delta_read / (1024 * 1024)
+
+        file_info_str = ""
+        if burst['files']:
+            file_info_str += f" | File(s): {', '.join(sorted(burst['files']))}"
+        else:
+            file_info_str += " | File: Unknown"
+
+        if burst['dests']:
+            dest_candidates = sorted(burst['dests'])
+            # Limit output length
+            if len(dest_candidates) > 3: dest_candidates = dest_candidates[:3] + ["..."]
+            file_info_str += f" | Possible Dest: {', '.join(dest_candidates)}"
+
+        # Log activity
+        message = f"DATA TRANSFER | {drive_letter} -> System | Amount: {mb_read:.6f} MB ({delta_read} bytes){file_info_str}"
+        logging.getLogger("file_activity").info(message)
+        publish("io", message, event_type="TRANSFER", drive=drive_letter,
+                serial=self.reporter.drive_devices.get(drive_letter), bytes=delta_read)
+
+        files, dests = sorted(burst['files']), sorted(burst['dests'])
+        record_event("TRANSFER", serial=self.reporter.drive_devices.get(drive_letter) or "", drive=drive_letter,
+                     path=files[0] if files else "", dest=dests[0] if dests else "", size=delta_read,
+                     detail=", ".join(files + dests))
+
+        # Only flag as suspicious if > 10MB
+        if delta_read > 10 * 1024 * 1024:
+             self.reporter.update_stat("suspicious_activities", drive=drive_letter)
+
+    def sample(self):
+        """
+        Reads the counters of the monitored disks once and reports transfers.
+        Returns True if any monitored disk moved bytes since the last sample.
+        """
+        # Snapshot registrations; the lock is only held for dict bookkeeping
+        with self.lock:
+            watched = {d: data['physical_drive'] for d, data in self.monitored_drives.items()}
+        if not watched and not self.bursts:
+            return False
+
+        counters = self.counter_source.read(set(watched.values()))
+        active = False
+        transfers = []
+        with self.lock:
+            for drive_letter, phy_drive in watched.items():
+                data = self.monitored_drives.get(drive_letter)
+                current = counters.get(phy_drive)
+                if data is None or current is None:
+                    continue # removed meanwhile / disk gone
+
+                # Delta
+                delta_read = current[0] - data['last_read']
+                delta_write = current[1] - data['last_write']
+                if delta_read > 0 or delta_write > 0:
+                    active = True
+
+                # Threshold: 4KB read (Cluster size typical)
+                if delta_read > 4096:
+                    transfers.append((drive_letter, delta_read))
+
+                # Update baseline
+                data['last_read'], data['last_write'] = current
+
+        # Attribution: one handle-index refresh serves every drive this tick.
+        # A burst keeps collecting file names for up to burst_window seconds
+        # (or until both source and destination are known), then is logged.
+        now = time.monotonic()
+        reading = dict(transfers)
+        for drive_letter, delta_read in transfers:
+            self.collect_burst(drive_letter, delta_read, now)
+        for drive_letter, burst in list(self.bursts.items()):
+            done = (drive_letter not in reading # drive went quiet
+                    or now - burst['started'] >= self.burst_window
+                    or (burst['files'] and burst['dests']))
+            if done:
+                del self.bursts[drive_letter]
+                self.report_transfer(drive_letter, burst)
+        return active
+
     def monitor_loop(self):
-        logging.info("Starting Disk IO Monitor Loop...")
+        logging.info(f"Starting Disk IO Monitor Loop ({self.counter_source.name})...")
         while self.running:
+            active = False
             try:
-                io_counters = psutil.disk_io_counters(perdisk=True)
-                
-                with self.lock:
-                    for drive_letter, data in list(self.monitored_drives.items()):
-                        phy_drive = data['physical_drive']
-                        if phy_drive in io_counters:
-                            current = io_counters[phy_drive]
-                            
-                            # Delta
-                            delta_read = current.read_bytes - data['last_read']
-                            if delta_read > 0:
-                                pass # print(f"DEBUG: Read Delta: {delta_read} bytes")
-                            
-                            # Threshold: 4KB read (Cluster size typical)
-                            if delta_read > 4096:
-                                mb_read = delta_read / (1024 * 1024)
-                                
-                                # Attempt to find WHICH file is being read
-                                # Burst check: Check 10 times over 1 second to catch the handle
-                                files_read = []
-                                dest_candidates = []
-                                
-                                # print(f"DEBUG: Triggering Burst Check for {delta_read} bytes...")
-                                
-                                for i in range(10):
-                                    found_procs = self.find_open_files_on_drive(drive_letter)
-                                    if found_procs:
-                                        for pid, pdata in found_procs.items():
-                                            files_read.extend(pdata['files'])
-                                            
-                                        # Check for destination
-                                        dests = self.find_destination_candidates(found_procs, drive_letter)
-                                        if dests: dest_candidates.extend(dests)
-                                        
-                                        # If we found both, likely good to go, but keep scanning a bit to be sure
-                                        if files_read and dest_candidates: break
-                                    
-                                    time.sleep(0.1)
-                                
-                                file_info_str = ""
-                                if files_read:
-                                    files_read = list(set(files_read))
-                                    file_info_str += f" | File(s): {', '.join(files_read)}"
-                                else:
-                                    file_info_str += " | File: Unknown"
-
-                                if dest_candidates:
-                                    dest_candidates = list(set(dest_candidates))
-                                    # Limit output length
-                                    if len(dest_candidates) > 3: dest_candidates = dest_candidates[:3] + ["..."]
-                                    file_info_str += f" | Possible Dest: {', '.join(dest_candidates)}"
-
-                                # print(f"DEBUG: Final Log -> {file_info_str}")
-
-                                # Log activity
-                                logging.getLogger("file_activity").info(f"DATA TRANSFER | {drive_letter} -> System | Amount: {mb_read:.6f} MB ({delta_read} bytes){file_info_str}")
-                                
-                                # Only flag as suspicious if > 10MB
-                                if delta_read > 10 * 1024 * 1024:
-                                     self.reporter.update_stat("suspicious_activities")
-                            
-                            # Update baseline
-                            data['last_read'] = current.read_bytes
-                            data['last_write'] = current.write_bytes
-                            
+                active = self.sample()
             except Exception as e:
                 logging.error(f"IO Monitor Error: {e}")
-                # import traceback
-                # traceback.print_exc()
-            
-            time.sleep(0.5) # Poll faster to catch short transfers
+
+            # Poll fast while bytes move, back off while idle
+            self.wake.wait(self.interval.update(active))
+            if self.wake.is_set():
+                self.wake.clear()
+                self.interval.update(True)
 
     def start(self):
         self.running = True
@@ -213,5 +209,7 @@ class DiskIOMonitor:
 
     def stop(self):
         self.running = False
+        self.wake.set()
         if self.thread:
             self.thread.join(timeout=1)
+        self.counter_source.close()
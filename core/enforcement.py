@@ -0,0 +1,423 @@
+import sys
+import json
+import time
+import queue
+import logging
+import threading
+import subprocess
+from abc import ABC, abstractmethod
+from collections import namedtuple
+
+# Structured outcome of one enable/disable request
+EnforcementResult = namedtuple(
+    "EnforcementResult",
+    ["instance_id", "success", "status", "reboot_required", "method", "error"]
+)
+
+# Device statuses that mean "not usable" (Disable-PnpDevice reports Error for disabled devices)
+BLOCKED_STATUSES = ("Error", "Disabled", "Degraded")
+
+
+class EnforcementBackend(ABC):
+    """
+    Enables/disables PnP device instances. Implementations take a batch of
+    instance IDs and return one EnforcementResult per ID, in order.
+    """
+
+    name = "base"
+
+    @abstractmethod
+    def disable(self, instance_ids):
+        """Disables each instance; returns one EnforcementResult per ID."""
+
+    @abstractmethod
+    def enable(self, instance_ids):
+        """Enables each instance; returns one EnforcementResult per ID."""
+
+    def warm_up(self):
+        """Pays any start-up cost ahead of the first request."""
+
+    def close(self):
+        pass
+
+
+class CfgMgrEnforcer(EnforcementBackend):
+    """
+    Direct CfgMgr32 calls via ctypes: no process start, microseconds per call.
+    CM_Disable_DevNode is vetoed while a volume is in use; callers fall back
+    to the PowerShell session for those.
+    """
+
+    name = "cfgmgr"
+
+    CR_SUCCESS = 0
+    CM_DISABLE_PERSIST = 0x8
+    DN_HAS_PROBLEM = 0x400
+    DN_NEED_RESTART = 0x100
+    CM_PROB_NEED_RESTART = 14
+
+    def __init__(self):
+        import ctypes
+        from ctypes import wintypes
+        self.ctypes = ctypes
+        self.cfgmgr = ctypes.WinDLL("cfgmgr32")
+        self.cfgmgr.CM_Locate_DevNodeW.argtypes = [ctypes.POINTER(wintypes.DWORD), wintypes.LPCWSTR, wintypes.ULONG]
+
+    def _locate(self, instance_id):
+        devinst = self.ctypes.c_ulong(0)
+        ret = self.cfgmgr.CM_Locate_DevNodeW(self.ctypes.byref(devinst), instance_id, 0)
+        return devinst.value if ret == self.CR_SUCCESS else None
+
+    def _status(self, devinst):
+        status = self.ctypes.c_ulong(0)
+        problem = self.ctypes.c_ulong(0)
+        if self.cfgmgr.CM_Get_DevNode_Status(self.ctypes.byref(status), self.ctypes.byref(problem), devinst, 0) != self.CR_SUCCESS:
+            return "Unknown", False
+        reboot = bool(status.value & self.DN_NEED_RESTART) or problem.value == self.CM_PROB_NEED_RESTART
+        return ("Error" if status.value & self.DN_HAS_PROBLEM else "OK"), reboot
+
+    def _apply(self, instance_ids, disable):
+        results = []
+        for instance_id in instance_ids:
+            devinst = self._locate(instance_id)
+            if devinst is None:
+                results.append(EnforcementResult(instance_id, False, "NotFound", False, self.name, "CM_Locate_DevNode failed"))
+                continue
+
+            if disable:
+                ret = self.cfgmgr.CM_Disable_DevNode(devinst, self.CM_DISABLE_PERSIST)
+            else:
+                ret = self.cfgmgr.CM_Enable_DevNode(devinst, 0)
+
+            status, reboot = self._status(devinst)
+            if disable:
+                success = ret == self.CR_SUCCESS or status in BLOCKED_STATUSES or reboot
+            else:
+                success = (ret == self.CR_SUCCESS and status == "OK") or reboot
+            error = "" if ret == self.CR_SUCCESS else f"CONFIGRET {ret}"
+            results.append(EnforcementResult(instance_id, success, status, reboot, self.name, error))
+        return results
+
+    def disable(self, instance_ids):
+        return self._apply(instance_ids, True)
+
+    def enable(self, instance_ids):
+        return self._apply(instance_ids, False)
+
+
+class PowerShellSession(EnforcementBackend):
+    """
+    One long-lived `powershell -Command -` host fed over stdin. Each request is
+    a single script line that processes a whole batch of IDs and prints one JSON
+    result line, so the 300-800 ms PowerShell cold start is paid once per session.
+    """
+
+    name = "powershell"
+
+    _END = "@@USB_FRAMEWORK_END@@"
+    _RESULT = "@@USB_FRAMEWORK_RESULT@@"
+
+    def __init__(self, timeout=30):
+        self.timeout = timeout
+        self.proc = None
+        self.lines = None
+        self.io_lock = threading.Lock()
+
+    @staticmethod
+    def _quote(value):
+        return "'" + value.replace("'", "''") + "'"
+
+    def _start(self):
+        flags = getattr(subprocess, "CREATE_NO_WINDOW", 0)
+        self.proc = subprocess.Popen(
+            ["powershell", "-NoLogo", "-NoProfile", "-NonInteractive", "-Command", "-"],
+            stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL,
+            text=True, bufsize=1, creationflags=flags
+        )
+        self.lines = queue.Queue()
+        threading.Thread(target=self._pump_stdout, args=(self.proc, self.lines), daemon=True).start()
+        # Importing the PnpDevice module up front keeps it out of the first block's latency
+        self._roundtrip("Import-Module PnpDevice -ErrorAction SilentlyContinue")
+
+    @staticmethod
+    def _pump_stdout(proc, lines):
+        for line in proc.stdout:
+            lines.put(line.rstrip("\r\n"))
+        lines.put(None)
+
+    def _roundtrip(self, script):
+        self.proc.stdin.write(f"{script}; Write-Output '{self._END}'\n")
+        self.proc.stdin.flush()
+
+        deadline = time.monotonic() + self.timeout
+        payload = None
+        while True:
+            line = self.lines.get(timeout=max(0.01, deadline - time.monotonic()))
+            if line is None:
+                raise RuntimeError("PowerShell host exited")
+            if line.startswith(self._RESULT):
+                payload = line[len(self._RESULT):]
+            elif line == self._END:
+                return payload
+
+    def _build_script(self, batch):
+        items = ",".join(f"@({self._quote(verb)},{self._quote(iid)})" for verb, iid in batch)
+        # ConfigManagerErrorCode 14 = CM_PROB_NEED_RESTART
+        return (
+            f"$r=@(); foreach($i in @({items},@())){{ if($i.Count -lt 2){{continue}}; "
+            "$o=[ordered]@{id=$i[1];ok=$false;status='';reboot=$false;error=''}; "
+            "try { if($i[0] -eq 'disable'){ Disable-PnpDevice -InstanceId $i[1] -Confirm:$false -ErrorAction Stop } "
+            "else { Enable-PnpDevice -InstanceId $i[1] -Confirm:$false -ErrorAction Stop }; $o.ok=$true } "
+            "catch { $o.error=$_.Exception.Message }; "
+            "try { $d=Get-PnpDevice -InstanceId $i[1] -ErrorAction Stop; $o.status=[string]$d.Status; "
+            "$o.reboot=[bool]($d.ConfigManagerErrorCode -eq 14) } catch {}; "
+            "$r+=[pscustomobject]$o }; "
+            f"Write-Output ('{self._RESULT}' + (ConvertTo-Json -Compress -InputObject @($r)))"
+        )
+
+    def _run(self, verb, instance_ids):
+        batch = [(verb, iid) for iid in instance_ids]
+        try:
+            if self.proc is None or self.proc.poll() is not None:
+                self._start()
+            payload = self._roundtrip(self._build_script(batch))
+            rows = json.loads(payload) if payload else []
+            if isinstance(rows, dict):
+                rows = [rows]
+        except Exception as e:
+            # Host is in an unknown state: kill it, next batch starts a fresh one
+            self.close()
+            rows = [{"error": f"PowerShell session failure: {e}"}] * len(batch)
+
+        results = []
+        for index, iid in enumerate(instance_ids):
+            row = rows[index] if index < len(rows) else {"error": "No result returned for device"}
+            status = row.get("status") or "Unknown"
+            reboot = bool(row.get("reboot"))
+            if verb == "disable":
+                success = bool(row.get("ok")) or status in BLOCKED_STATUSES or reboot
+            else:
+                success = (bool(row.get("ok")) and status == "OK") or reboot
+            results.append(EnforcementResult(iid, success, status, reboot, self.name, row.get("error", "")))
+        return results
+
+    def warm_up(self):
+        with self.io_lock:
+            if self.proc is None or self.proc.poll() is not None:
+                self._start()
+
+    def disable(self, instance_ids):
+        with self.io_lock:
+            return self._run("disable", list(instance_ids))
+
+    def enable(self, instance_ids):
+        with self.io_lock:
+            return self._run("enable", list(instance_ids))
+
+    def close(self):
+        proc, self.proc = self.proc, None
+        if proc is not None:
+            try:
+                proc.stdin.close()
+                proc.wait(timeout=2)
+            except Exception:
+                proc.kill()
+
+
+class CoalescingEnforcer(EnforcementBackend):
+    """
+    Group commit in front of a serial backend (one request at a time, e.g. the
+    PowerShell session): requests that arrive while a batch is in flight are
+    sent together in the next round-trip instead of queueing one by one.
+    """
+
+    def __init__(self, backend):
+        self.backend = backend
+        self.name = backend.name
+        self.io_lock = threading.Lock()
+        self.pending_lock = threading.Lock()
+        self.pending = {"disable": [], "enable": []} # verb -> [(instance_id, slot)]
+        self.batches = 0
+
+    def _submit(self, verb, instance_ids):
+        slots = [[] for _ in instance_ids]
+        with self.pending_lock:
+            self.pending[verb].extend(zip(instance_ids, slots))
+
+        # Whoever holds io_lock drains everything queued so far
+        while any(not slot for slot in slots):
+            with self.io_lock:
+                with self.pending_lock:
+                    batch, self.pending[verb] = self.pending[verb], []
+                if not batch:
+                    continue
+                try:
+                    results = getattr(self.backend, verb)([iid for iid, _ in batch])
+                except Exception as e:
+                    results = [EnforcementResult(iid, False, "Unknown", False, self.name, str(e)) for iid, _ in batch]
+                self.batches += 1
+                for index, (iid, slot) in enumerate(batch):
+                    slot.append(results[index] if index < len(results) else
+                                EnforcementResult(iid, False, "Unknown", False, self.name, "No result returned for device"))
+        return [slot[0] for slot in slots]
+
+    def warm_up(self):
+        self.backend.warm_up()
+
+    def disable(self, instance_ids):
+        return self._submit("disable", list(instance_ids))
+
+    def enable(self, instance_ids):
+        return self._submit("enable", list(instance_ids))
+
+    def close(self):
+        self.backend.close()
+
+
+class PnPUtilEnforcer(EnforcementBackend):
+    """
+    Last-resort fallback: one `pnputil` process per device. Uses the exit code
+    (3010 = ERROR_SUCCESS_REBOOT_REQUIRED) rather than scraping stdout.
+    """
+
+    name = "pnputil"
+
+    ERROR_SUCCESS_REBOOT_REQUIRED = 3010
+
+    def _apply(self, instance_ids, flag):
+        results = []
+        for instance_id in instance_ids:
+            try:
+                proc = subprocess.run(["pnputil", flag, instance_id], capture_output=True, text=True)
+                reboot = proc.returncode == self.ERROR_SUCCESS_REBOOT_REQUIRED
+                success = proc.returncode == 0 or reboot
+                results.append(EnforcementResult(instance_id, success, "Unknown", reboot, self.name,
+                                                 "" if success else proc.stdout.strip()))
+            except Exception as e:
+                results.append(EnforcementResult(instance_id, False, "Unknown", False, self.name, str(e)))
+        return results
+
+    def disable(self, instance_ids):
+        return self._apply(instance_ids, "/disable-device")
+
+    def enable(self, instance_ids):
+        return self._apply(instance_ids, "/enable-device")
+
+
+class FallbackEnforcer(EnforcementBackend):
+    """
+    Tries each backend in order; IDs that fail are retried on the next one.
+    Typical chain: CfgMgr (in-process) -> persistent PowerShell session -> pnputil.
+    """
+
+    name = "chain"
+
+    def __init__(self, backends):
+        self.backends = backends
+
+    def _apply(self, instance_ids, verb):
+        final = {}
+        remaining = list(instance_ids)
+        for backend in self.backends:
+            if not remaining:
+                break
+            try:
+                results = getattr(backend, verb)(remaining)
+            except Exception as e:
+                logging.warning(f"Enforcement backend {backend.name} failed: {e}")
+                continue
+            for result in results:
+                final[result.instance_id] = result
+            remaining = [r.instance_id for r in results if not r.success]
+
+        return [final.get(iid) or EnforcementResult(iid, False, "Unknown", False, "none", "No enforcement backend available")
+                for iid in instance_ids]
+
+    def disable(self, instance_ids):
+        return self._apply(instance_ids, "disable")
+
+    def enable(self, instance_ids):
+        return self._apply(instance_ids, "enable")
+
+    def warm_up(self):
+        for backend in self.backends:
+            try:
+                backend.warm_up()
+            except Exception as e:
+                logging.warning(f"Could not warm up enforcement backend {backend.name}: {e}")
+
+    def close(self):
+        for backend in self.backends:
+            backend.close()
+
+
+class StubEnforcer(EnforcementBackend):
+    """
+    In-memory enforcer with configurable latency, for benchmarks and simulation.
+    `round_trip` is paid once per call (per batch), `per_device` for each ID.
+    With serial=True calls run one at a time, like a single persistent host.
+    """
+
+    name = "stub"
+
+    def __init__(self, round_trip=0.0, per_device=0.0, fail_ids=(), serial=False):
+        self.round_trip = round_trip
+        self.per_device = per_device
+        self.fail_ids = set(fail_ids)
+        self.status = {}
+        self.calls = 0
+        self.lock = threading.Lock()
+        self.host_lock = threading.Lock() if serial else None
+
+    def _apply(self, instance_ids, status):
+        if self.host_lock:
+            with self.host_lock:
+                time.sleep(self.round_trip + self.per_device * len(instance_ids))
+        else:
+            time.sleep(self.round_trip + self.per_device * len(instance_ids))
+        results = []
+        with self.lock:
+            self.calls += 1
+            for iid in instance_ids:
+                ok = iid not in self.fail_ids
+                if ok:
+                    self.status[iid] = status
+                results.append(EnforcementResult(iid, ok, self.status.get(iid, "OK"), False, self.name,
+                                                 "" if ok else "stub failure"))
+        return results
+
+    def disable(self, instance_ids):
+        return self._apply(instance_ids, "Error")
+
+    def enable(self, instance_ids):
+        return self._apply(instance_ids, "OK")
+
+
+_default_enforcer = None
+_default_lock = threading.Lock()
+
+
+def get_enforcer():
+    """Process-wide enforcer, created on first use."""
+    global _default_enforcer
+    with _default_lock:
+        if _default_enforcer is None:
+            backends = []
+            if sys.platform == "win32":
+                try:
+                    backends.append(CfgMgrEnforcer())
+                except Exception as e:
+                    logging.warning(f"CfgMgr32 unavailable, using PowerShell only: {e}")
+            backends.append(CoalescingEnforcer(PowerShellSession()))
+            backends.append(PnPUtilEnforcer())
+            _default_enforcer = FallbackEnforcer(backends)
+        return _default_enforcer
+
+
+def set_enforcer(enforcer):
+    """Replaces the process-wide enforcer (e.g. with a StubEnforcer for benchmarks)."""
+    global _default_enforcer
+    with _default_lock:
+        previous, _default_enforcer = _default_enforcer, enforcer
+    if previous is not None and previous is not enforcer:
+        previous.close()
@@ -0,0 +1,117 @@
+import time
+import logging
+import threading
+from collections import deque
+
+
+class EventBus:
+    """
+    In-process publish/subscribe between the monitoring threads and the GUI.
+
+    publish() builds one event dict ({ts, topic, level, message, ...fields})
+    and calls each matching subscriber on the publishing thread, so
+    subscribers must only hand the event off (see EventQueue). The last
+    `backlog` events are kept so a subscriber that arrives late (the
+    dashboard is built after the startup scan) can replay them.
+    """
+
+    def __init__(self, backlog=500):
+        self.lock = threading.Lock()
+        self.subscribers = {} # token -> (topics or None, callback)
+        self.next_token = 0
+        self.recent = deque(maxlen=backlog)
+        self.published = 0
+
+    def subscribe(self, callback, topics=None, replay=False):
+        """Registers callback(event) for the given topics (all if None). Returns a token for unsubscribe()."""
+        topics = frozenset(topics) if topics is not None else None
+        with self.lock:
+            token = self.next_token
+            self.next_token += 1
+            self.subscribers = {**self.subscribers, token: (topics, callback)}
+            # Replayed under the lock so no live event can overtake the backlog
+            for event in (self.recent if replay else ()):
+                if topics is None or event["topic"] in topics:
+                    callback(event)
+        return token
+
+    def unsubscribe(self, token):
+        with self.lock:
+            subscribers = dict(self.subscribers)
+            subscribers.pop(token, None)
+            self.subscribers = subscribers
+
+    def publish(self, topic, message, level="INFO", **fields):
+        event = {"ts": time.time(), "topic": topic, "level": level, "message": message}
+        event.update(fields)
+        with self.lock:
+            self.recent.append(event)
+            self.published += 1
+            subscribers = self.subscribers # replaced, never mutated: safe to iterate outside the lock
+        for topics, callback in subscribers.values():
+            if topics is None or topic in topics:
+                try:
+                    callback(event)
+                except Exception as e:
+                    logging.error(f"Event bus subscriber failed: {e}")
+
+
+class EventQueue:
+    """
+    Bounded buffer between the bus and a consumer thread (the Tk loop).
+    When full the oldest events are discarded and counted in `dropped`, so a
+    burst of file activity costs the consumer at most maxlen events.
+    """
+
+    def __init__(self, bus, topics=None, maxlen=10000, replay=True):
+        self.events = deque(maxlen=maxlen)
+        self.dropped = 0 # approximate under concurrent publishers; only shown to the user
+        self.bus = bus
+        self.token = bus.subscribe(self.put, topics, replay=replay)
+
+    def put(self, event):
+        if len(self.events) == self.events.maxlen:
+            self.dropped += 1
+        self.events.append(event) # deque append/popleft are thread-safe
+
+    def drain(self, max_items):
+        """Removes and returns up to max_items events, oldest first."""
+        batch = []
+        popleft = self.events.popleft
+        try:
+            for _ in range(max_items):
+                batch.append(popleft())
+        except IndexError:
+            pass
+        return batch
+
+    def take_dropped(self):
+        dropped, self.dropped = self.dropped, 0
+        return dropped
+
+    def close(self):
+        self.bus.unsubscribe(self.token)
+
+
+_default_bus = None
+_default_lock = threading.Lock()
+
+
+def get_event_bus():
+    """Process-wide event bus, created on first use."""
+    global _default_bus
+    with _default_lock:
+        if _default_bus is None:
+            _default_bus = EventBus()
+        return _default_bus
+
+
+def set_event_bus(bus):
+    """Replaces the process-wide event bus."""
+    global _default_bus
+    with _default_lock:
+        _default_bus = bus
+
+
+def publish(topic, message, level="INFO", **fields):
+    get_event_bus().publish(topic, message, level, **fields)
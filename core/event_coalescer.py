@@ -0,0 +1,204 @@
+import os
+import time
+import fnmatch
+import logging
+import threading
+from collections import OrderedDict
+
+from watchdog.events import FileSystemEventHandler
+
+# Editor / office / browser scratch files that are never worth an audit record
+TEMP_PATTERNS = ['~$*', '*.tmp', '*.temp', '.~lock.*#', '*.swp', '*.swx', '*.swo', '*~', '4913',
+                 '.goutputstream-*', '*.crdownload', '*.part', '*.partial', '.DS_Store', 'Thumbs.db']
+
+
+class EventCoalescer(FileSystemEventHandler):
+    """
+    Sits between a watchdog observer and FileAuditHandler.log_activity.
+
+    Events for one path are merged into a single audit record until the path
+    has been quiet for `window` seconds (or a write-close arrives):
+    created + modified... -> created, modified... -> modified,
+    created ... deleted -> nothing, A->B->C -> moved A->C,
+    created X.part + X.part->X -> created X. Records whose final name is a
+    temp file are dropped. At most `max_paths` records are held; beyond that
+    the oldest is emitted early.
+
+    emit(event_type, src_path, dest_path, is_directory) is called from the
+    flush thread (or from flush_due() when driven manually).
+    """
+
+    def __init__(self, emit, window=1.0, max_age=30.0, max_paths=10000, temp_patterns=TEMP_PATTERNS):
+        super().__init__()
+        self.emit = emit
+        self.window = window
+        self.max_age = max_age # long copies still produce a record every max_age seconds
+        self.max_paths = max_paths
+        self.temp_patterns = [p.lower() for p in temp_patterns]
+        self.lock = threading.Lock()
+        self.records = OrderedDict() # current path -> record, oldest first
+        self.ready = [] # records to emit on the next flush (closed / evicted)
+        self.wake = threading.Event()
+        self.thread = None
+        self.running = False
+        self.counters = {'received': 0, 'emitted': 0, 'merged': 0, 'dropped_temp': 0,
+                         'dropped_transient': 0, 'forced_flushes': 0}
+
+    def is_temp(self, path):
+        name = os.path.basename(path).lower()
+        return any(fnmatch.fnmatchcase(name, p) for p in self.temp_patterns)
+
+    # watchdog entry point
+    def dispatch(self, event):
+        dest = getattr(event, 'dest_path', None) or None
+        self.feed(event.event_type, event.src_path, dest, event.is_directory)
+
+    def feed(self, event_type, src_path, dest_path=None, is_directory=False, now=None):
+        now = time.monotonic() if now is None else now
+        with self.lock:
+            self.counters['received'] += 1
+            if event_type in ('opened', 'closed_no_write'):
+                return
+            if is_directory:
+                # FileAuditHandler ignores directories; only keep structural changes
+                if event_type != 'modified':
+                    self.ready.append({'type': event_type, 'src': src_path, 'dest': dest_path, 'dir': True})
+                return
+
+            if event_type == 'moved':
+                self._moved(src_path, dest_path, now)
+            elif event_type == 'closed':
+                record = self.records.pop(src_path, None)
+                if record is not None:
+                    self.ready.append(record) # write finished: no need to wait out the window
+                    self.counters['merged'] += 1
+                    self.wake.set()
+            else:
+                self._merge(src_path, event_type, now)
+
+            while len(self.records) > self.max_paths:
+                self.ready.append(self.records.popitem(last=False)[1])
+                self.counters['forced_flushes'] += 1
+                self.wake.set()
+
+    def _merge(self, path, event_type, now):
+        record = self.records.get(path)
+        if record is None:
+            self.records[path] = {'type': event_type, 'src': path, 'dest': None, 'dir': False,
+                                  'started': now, 'last': now}
+            return
+
+        self.counters['merged'] += 1
+        record['last'] = now
+        self.records.move_to_end(path)
+        if event_type == 'deleted':
+            if record['type'] == 'created':
+                # Appeared and vanished inside the window: nothing left to audit
+                del self.records[path]
+                self.counters['dropped_transient'] += 1
+            elif record['type'] == 'moved':
+                # A->B then B deleted: the original file is gone
+                record.update({'type': 'deleted', 'dest': None})
+                self.ready.append(self.records.pop(path))
+            else:
+                record['type'] = 'deleted'
+        elif event_type == 'created' and record['type'] == 'deleted':
+            record['type'] = 'modified' # deleted and recreated (atomic save)
+        # modified after created/moved/modified keeps the earlier, more specific type
+
+    def _moved(self, src_path, dest_path, now):
+        record = self.records.pop(src_path, None)
+        if record is None:
+            record = {'type': 'moved', 'src': src_path, 'dest': dest_path, 'dir': False,
+                      'started': now, 'last': now}
+        else:
+            self.counters['merged'] += 1
+            record['last'] = now
+            if record['type'] == 'moved':
+                record['dest'] = dest_path # A->B->C collapses to A->C
+            elif record['type'] in ('created', 'modified'):
+                if self.is_temp(record['src']) or record['type'] == 'created':
+                    # Written under a scratch name then renamed into place
+                    record['type'] = 'created'
+                    record['src'] = dest_path
+                else:
+                    record.update({'type': 'moved', 'dest': dest_path})
+        # A record replaced by the rename target is superseded
+        if self.records.pop(dest_path, None) is not None:
+            self.counters['merged'] += 1
+        key = record['dest'] or record['src']
+        if record['type'] == 'moved' and record['dest'] == record['src']:
+            self.counters['dropped_transient'] += 1 # A->B->A
+            return
+        self.records[key] = record
+
+    def flush_due(self, now=None, force=False):
+        """Emits records that have been quiet for `window` (all of them if force). Returns count emitted."""
+        now = time.monotonic() if now is None else now
+        with self.lock:
+            due = self.ready
+            self.ready = []
+            for path in list(self.records):
+                record = self.records[path]
+                if force or now - record['last'] >= self.window or now - record['started'] >= self.max_age:
+                    due.append(self.records.pop(path))
+        return self._emit_records(due)
+
+    def flush_under(self, root):
+        """Emits every pending record under root now (its drive is going away). Returns count emitted."""
+        prefix = os.path.normcase(os.path.abspath(root)).rstrip(os.sep) + os.sep
+        under = lambda path: bool(path) and os.path.normcase(os.path.abspath(path)).startswith(prefix)
+        with self.lock:
+            due = [r for r in self.ready if under(r['src']) or under(r['dest'])]
+            if due:
+                self.ready = [r for r in self.ready if not (under(r['src']) or under(r['dest']))]
+            for path in list(self.records):
+                record = self.records[path]
+                if under(record['src']) or under(record['dest']):
+                    due.append(self.records.pop(path))
+        return self._emit_records(due)
+
+    def _emit_records(self, due):
+        emitted = 0
+        dropped = 0
+        for record in due:
+            final = record['dest'] or record['src']
+            if not record['dir'] and self.is_temp(final):
+                dropped += 1
+                continue
+            try:
+                self.emit(record['type'], record['src'], record['dest'], record['dir'])
+            except Exception as e:
+                logging.error(f"Audit emit failed for {final}: {e}")
+            emitted += 1
+        with self.lock:
+            self.counters['emitted'] += emitted
+            self.counters['dropped_temp'] += dropped
+        return emitted
+
+    def _flush_loop(self):
+        while self.running:
+            self.wake.wait(self.window / 4)
+            self.wake.clear()
+            self.flush_due()
+
+    def start(self):
+        if self.running:
+            return
+        self.running = True
+        self.thread = threading.Thread(target=self._flush_loop, name="audit-coalescer", daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        """Stops the flush thread and emits everything still pending."""
+        self.running = False
+        self.wake.set()
+        if self.thread:
+            self.thread.join(timeout=1)
+        self.flush_due(force=True)
+
+    def stats(self):
+        with self.lock:
+            stats = dict(self.counters)
+            stats['pending'] = len(self.records) + len(self.ready)
+            return stats
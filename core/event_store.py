@@ -0,0 +1,523 @@
+import os
+import sys
+import mmap
+import json
+import time
+import struct
+import bisect
+import logging
+import argparse
+import datetime
+import threading
+from array import array
+from collections import OrderedDict
+
+# One record: <I total_len> <d ts> <q size> 7 x <H field_len>, then the utf-8 fields
+_HEAD = struct.Struct("<Idq7H")
+FIELDS = ("event_type", "serial", "drive", "path", "dest", "hash", "detail")
+SEGMENT_SUFFIX = ".seg"
+INDEX_SUFFIX = ".idx"
+INDEX_MAGIC = b"USBIDX2\n"
+_INDEX_HEAD = struct.Struct("<ddQQ") # min_ts, max_ts, count, indexed segment length
+
+
+def normalize_path(path):
+    """Case-folded, forward-slash form used for path matching."""
+    return path.replace("\\", "/").lower()
+
+
+def path_key(path):
+    """Path index key: the normalized parent directory with a trailing slash ("e:/docs/")."""
+    norm = normalize_path(path)
+    return norm[:norm.rfind("/") + 1]
+
+
+def encode_record(ts, event_type, serial="", drive="", path="", dest="", size=0, file_hash="", detail=""):
+    fields = [(f or "").encode("utf-8", "surrogateescape")[:65535]
+              for f in (event_type, serial, drive, path, dest, file_hash, detail)]
+    body = b"".join(fields)
+    return _HEAD.pack(_HEAD.size + len(body), ts, size or 0, *(len(f) for f in fields)) + body
+
+
+def decode_record(buf, offset):
+    """Returns (record dict, next offset)."""
+    total, ts, size, *lengths = _HEAD.unpack_from(buf, offset)
+    record = {"ts": ts, "size": size}
+    pos = offset + _HEAD.size
+    for name, length in zip(FIELDS, lengths):
+        record[name] = bytes(buf[pos:pos + length]).decode("utf-8", "surrogateescape")
+        pos += length
+    return record, offset + total
+
+
+class _SegmentIndex:
+    """
+    Secondary indexes of the segment being written: serial -> offsets and
+    path key -> offsets, plus its time range and how many bytes of the
+    segment it covers. Saved as a .idx file when the segment is sealed.
+    """
+
+    def __init__(self):
+        self.tables = {"serial": {}, "path": {}}
+        self.min_ts = None
+        self.max_ts = None
+        self.count = 0
+        self.length = 0
+
+    def add(self, offset, ts, serial, path, dest):
+        if serial:
+            self.tables["serial"].setdefault(serial, array("Q")).append(offset)
+        by_path = self.tables["path"]
+        key = path_key(path) if path else None
+        if key is not None:
+            by_path.setdefault(key, array("Q")).append(offset)
+        if dest:
+            dest_key = path_key(dest)
+            if dest_key != key:
+                by_path.setdefault(dest_key, array("Q")).append(offset)
+        self.min_ts = ts if self.min_ts is None else min(self.min_ts, ts)
+        self.max_ts = ts if self.max_ts is None else max(self.max_ts, ts)
+        self.count += 1
+
+    def keys_with_prefix(self, table, prefix):
+        return [key for key in self.tables[table] if key.startswith(prefix)]
+
+    def offsets(self, table, key):
+        # Copy: the writer keeps appending to the live array
+        return array("Q", self.tables[table].get(key, ()))
+
+    def save(self, path):
+        """
+        Layout: magic, <ddQQ> time range, count and indexed segment
+        length, then per table a key
+        directory (<II> key count and blob length, NUL-joined keys, <QQ>
+        start/count per key), then every offset list back to back. Readers
+        load the directories and fetch one key's offsets with a single read.
+        """
+        tmp = path + ".tmp"
+        with open(tmp, "wb") as f:
+            f.write(INDEX_MAGIC)
+            f.write(_INDEX_HEAD.pack(self.min_ts or 0.0, self.max_ts or 0.0, self.count, self.length))
+            lists = []
+            start = 0
+            for table in ("serial", "path"):
+                entries = dict(sorted(self.tables[table].items())) # sorted keys allow range lookups
+                blob = "\x00".join(entries).encode("utf-8", "surrogateescape")
+                spans = array("Q")
+                for offsets in entries.values():
+                    spans.extend((start, len(offsets)))
+                    start += len(offsets)
+                    lists.append(offsets)
+                f.write(struct.pack("<II", len(entries), len(blob)))
+                f.write(blob)
+                f.write(spans.tobytes())
+            for offsets in lists:
+                f.write(offsets.tobytes())
+        os.replace(tmp, path)
+
+    @classmethod
+    def rebuild(cls, segment_path, index=None):
+        """
+        Indexes the segment from scratch (crash before sealing, missing
+        .idx), or only the records appended after `index.length` when an
+        index is given. Returns the index; its length ends at the last whole
+        record.
+        """
+        index = cls() if index is None else index
+        with open(segment_path, "rb") as f:
+            f.seek(index.length)
+            data = f.read()
+        offset = 0
+        while offset + _HEAD.size <= len(data):
+            total = _HEAD.unpack_from(data, offset)[0]
+            if total < _HEAD.size or offset + total > len(data):
+                break # torn tail, or a record still being written
+            record, next_offset = decode_record(data, offset)
+            index.add(index.length + offset, record["ts"], record["serial"], record["path"], record["dest"])
+            offset = next_offset
+        index.length += offset
+        return index
+
+
+def _index_header(f, path):
+    """(min_ts, max_ts, count, length) from the start of an open .idx file."""
+    head = f.read(len(INDEX_MAGIC) + _INDEX_HEAD.size)
+    if not head.startswith(INDEX_MAGIC) or len(head) < len(INDEX_MAGIC) + _INDEX_HEAD.size:
+        raise ValueError(f"Bad index file: {path}")
+    return _INDEX_HEAD.unpack_from(head, len(INDEX_MAGIC))
+
+
+class _SealedIndex:
+    """Read side of a .idx file: key directories in memory, offset lists read on demand."""
+
+    def __init__(self, path):
+        self.path = path
+        self.tables = {}
+        self.sorted_keys = {}
+        with open(path, "rb") as f:
+            self.min_ts, self.max_ts, self.count, self.length = _index_header(f, path)
+            for table in ("serial", "path"):
+                entries, blob_len = struct.unpack("<II", f.read(8))
+                blob = f.read(blob_len).decode("utf-8", "surrogateescape")
+                spans = array("Q")
+                spans.frombytes(f.read(16 * entries))
+                keys = blob.split("\x00") if entries else []
+                self.tables[table] = {key: (spans[2 * i], spans[2 * i + 1]) for i, key in enumerate(keys)}
+                self.sorted_keys[table] = keys
+            self.data_start = f.tell()
+
+    def keys_with_prefix(self, table, prefix):
+        keys = self.sorted_keys[table]
+        i = bisect.bisect_left(keys, prefix)
+        matches = []
+        while i < len(keys) and keys[i].startswith(prefix):
+            matches.append(keys[i])
+            i += 1
+        return matches
+
+    def offsets(self, table, key):
+        span = self.tables[table].get(key)
+        offsets = array("Q")
+        if span:
+            with open(self.path, "rb") as f:
+                f.seek(self.data_start + 8 * span[0])
+                offsets.frombytes(f.read(8 * span[1]))
+        return offsets
+
+
+class EventStore:
+    """
+    Append-only store of typed audit records.
+
+    Records go to segment files named after their time bucket
+    (`bucket_seconds`, hourly by default); when a record falls into a new
+    bucket the active segment is closed and its serial / path-prefix index
+    written next to it. query() prunes segments by time range and uses the
+    indexes for serial and path-prefix filters.
+
+    Another process (the daemon) may still be appending to the newest
+    segment while this one queries it: every index records the segment
+    length it covers, records past that are indexed from the tail in memory,
+    and a reader only saves an index for a segment that is no longer the
+    newest.
+    """
+
+    def __init__(self, directory=os.path.join("logs", "events"), bucket_seconds=3600, flush_every=256, cached_indexes=1024):
+        self.directory = directory
+        self.bucket_seconds = bucket_seconds
+        self.flush_every = flush_every
+        self.cached_indexes = cached_indexes
+        self.lock = threading.RLock()
+        self.active = None # {bucket, name, file, index, size} of the segment being written
+        self.pending = 0
+        self.ranges = {} # segment name -> (min_ts, max_ts, count, length) of its index
+        self.index_cache = OrderedDict() # segment name -> _SealedIndex or in-memory _SegmentIndex, LRU
+        os.makedirs(directory, exist_ok=True)
+
+    def _segment_name(self, bucket):
+        start = datetime.datetime.fromtimestamp(bucket * self.bucket_seconds, datetime.timezone.utc)
+        return start.strftime("%Y%m%dT%H%M%S") + f"-{self.bucket_seconds}"
+
+    def _open_bucket(self, bucket):
+        name = self._segment_name(bucket)
+        path = os.path.join(self.directory, name + SEGMENT_SUFFIX)
+        index = _SegmentIndex()
+        if os.path.exists(path):
+            # Reopened after a restart: recover the index and cut a torn tail
+            index = _SegmentIndex.rebuild(path)
+            with open(path, "r+b") as f:
+                f.truncate(index.length)
+            try:
+                os.remove(os.path.join(self.directory, name + INDEX_SUFFIX))
+            except OSError:
+                pass
+            self.ranges.pop(name, None)
+            self.index_cache.pop(name, None)
+        f = open(path, "ab")
+        self.active = {"bucket": bucket, "name": name, "file": f, "index": index, "size": index.length}
+
+    def _close_active(self):
+        if not self.active:
+            return
+        active, self.active = self.active, None
+        active["file"].flush()
+        os.fsync(active["file"].fileno())
+        active["file"].close()
+        index = active["index"]
+        index.length = active["size"]
+        index.save(os.path.join(self.directory, active["name"] + INDEX_SUFFIX))
+        self.ranges[active["name"]] = (index.min_ts, index.max_ts, index.count, index.length)
+        self.pending = 0
+
+    def append(self, event_type, serial="", drive="", path="", dest="", size=0, file_hash="", detail="", ts=None):
+        ts = time.time() if ts is None else ts
+        data = encode_record(ts, event_type, serial, drive, path, dest, size, file_hash, detail)
+        bucket = int(ts // self.bucket_seconds)
+        with self.lock:
+            # Late records for an older bucket stay in the active segment (its range widens)
+            if self.active is None or bucket > self.active["bucket"]:
+                self._close_active()
+                self._open_bucket(bucket)
+            active = self.active
+            offset = active["size"]
+            active["file"].write(data)
+            active["size"] += len(data)
+            active["index"].add(offset, ts, serial, path, dest)
+            self.pending += 1
+            if self.pending >= self.flush_every:
+                active["file"].flush()
+                self.pending = 0
+
+    def flush(self):
+        with self.lock:
+            if self.active:
+                self.active["file"].flush()
+                self.pending = 0
+
+    def close(self):
+        with self.lock:
+            self._close_active()
+
+    def _segments(self):
+        return sorted(n[:-len(SEGMENT_SUFFIX)] for n in os.listdir(self.directory) if n.endswith(SEGMENT_SUFFIX))
+
+    def _sealed(self, name, live=False):
+        """
+        Index of a segment this store is not writing. A .idx covers the
+        segment up to the length it records; when the segment has grown since
+        (`live`: the newest segment, possibly still appended to by another
+        process) the tail is indexed in memory and nothing is saved. A
+        missing, damaged or stale .idx of a sealed segment is rebuilt and saved.
+        """
+        seg_path = os.path.join(self.directory, name + SEGMENT_SUFFIX)
+        idx_path = os.path.join(self.directory, name + INDEX_SUFFIX)
+        size = os.path.getsize(seg_path)
+        index = self.index_cache.get(name)
+        if index is None:
+            try:
+                index = _SealedIndex(idx_path)
+            except (OSError, ValueError, struct.error):
+                pass
+        if isinstance(index, _SegmentIndex) and index.length <= size:
+            if index.length < size:
+                _SegmentIndex.rebuild(seg_path, index) # appended records only
+        elif index is None or index.length != size:
+            index = _SegmentIndex.rebuild(seg_path)
+            if not live:
+                index.save(idx_path)
+        self.index_cache[name] = index
+        self.index_cache.move_to_end(name)
+        self.ranges[name] = (index.min_ts, index.max_ts, index.count, index.length)
+        while len(self.index_cache) > self.cached_indexes:
+            self.index_cache.popitem(last=False)
+        return index
+
+    def _range(self, name, live=False):
+        """(min_ts, max_ts, count) of a segment, from its .idx header while that still covers the whole segment."""
+        if self.active and self.active["name"] == name:
+            index = self.active["index"]
+            return index.min_ts, index.max_ts, index.count
+        if name not in self.ranges:
+            try:
+                with open(os.path.join(self.directory, name + INDEX_SUFFIX), "rb") as f:
+                    self.ranges[name] = _index_header(f, name)
+            except (OSError, ValueError, struct.error):
+                pass
+        cached = self.ranges.get(name)
+        if cached is None or cached[3] != os.path.getsize(os.path.join(self.directory, name + SEGMENT_SUFFIX)):
+            self._sealed(name, live)
+        return self.ranges[name][:3]
+
+    @staticmethod
+    def _candidates(index, serial, norm_prefix):
+        """Sorted offsets to read from a segment, or None for a full scan."""
+        lists = []
+        if serial is not None:
+            lists.append(index.offsets("serial", serial))
+        if norm_prefix is not None:
+            # Directories under the prefix, plus the prefix's own directory
+            # when it ends part-way into a name ("e:/docs/rep")
+            keys = index.keys_with_prefix("path", norm_prefix)
+            parent = path_key(norm_prefix)
+            if parent != norm_prefix:
+                keys.append(parent)
+            if len(keys) == 1:
+                lists.append(index.offsets("path", keys[0]))
+            else:
+                merged = set()
+                for key in keys:
+                    merged.update(index.offsets("path", key))
+                lists.append(sorted(merged))
+        if not lists:
+            return None
+        if len(lists) == 1:
+            return lists[0] # offsets are recorded in file order
+        smallest = min(lists, key=len)
+        result = set(smallest)
+        for other in lists:
+            if other is not smallest:
+                result.intersection_update(other)
+        return sorted(result)
+
+    def query(self, serial=None, path_prefix=None, event_type=None, drive=None, start=None, end=None, limit=None):
+        """
+        Yields matching records (dicts with ts, size and FIELDS), segment by
+        segment in time order. start/end are epoch seconds; path_prefix
+        matches path or dest case-insensitively, with / and \\ treated alike.
+        """
+        with self.lock:
+            if self.active:
+                self.active["file"].flush()
+            names = self._segments()
+
+        norm_prefix = normalize_path(path_prefix) if path_prefix else None
+        type_raw = event_type.encode("utf-8") if event_type is not None else None
+        found = 0
+
+        for name in names:
+            live = name == names[-1]
+            with self.lock:
+                min_ts, max_ts, count = self._range(name, live)
+                if count == 0:
+                    continue
+                if (start is not None and max_ts < start) or (end is not None and min_ts > end):
+                    continue
+                is_active = self.active is not None and self.active["name"] == name
+                index = self.active["index"] if is_active else self._sealed(name, live)
+                # Records past what the index covers are left for the next query
+                size = self.active["size"] if is_active else index.length
+                offsets = self._candidates(index, serial, norm_prefix)
+            if offsets is not None and not len(offsets):
+                continue
+
+            with open(os.path.join(self.directory, name + SEGMENT_SUFFIX), "rb") as f:
+                if os.fstat(f.fileno()).st_size == 0:
+                    continue
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buf:
+                    for record in self._scan(buf, offsets, min(size, len(buf)), type_raw):
+                        if serial is not None and record["serial"] != serial:
+                            continue
+                        if drive is not None and record["drive"] != drive:
+                            continue
+                        if start is not None and record["ts"] < start:
+                            continue
+                        if end is not None and record["ts"] > end:
+                            continue
+                        if norm_prefix is not None and not (
+                                normalize_path(record["path"]).startswith(norm_prefix)
+                                or normalize_path(record["dest"]).startswith(norm_prefix)):
+                            continue
+                        yield record
+                        found += 1
+                        if limit is not None and found >= limit:
+                            return
+
+    @staticmethod
+    def _scan(buf, offsets, size, type_raw=None):
+        """Decodes records at `offsets` (all if None), skipping other event types before decoding."""
+        head_size = _HEAD.size
+        positions = offsets
+        if offsets is None:
+            positions = []
+            offset = 0
+            while offset + head_size <= size:
+                positions.append(offset)
+                offset += _HEAD.unpack_from(buf, offset)[0]
+        for offset in positions:
+            if offset >= size:
+                break
+            if type_raw is not None:
+                head = _HEAD.unpack_from(buf, offset)
+                if head[3] != len(type_raw) or buf[offset + head_size:offset + head_size + head[3]] != type_raw:
+                    continue
+            yield decode_record(buf, offset)[0]
+
+    def stats(self):
+        with self.lock:
+            names = self._segments()
+            total = sum(os.path.getsize(os.path.join(self.directory, n + SEGMENT_SUFFIX)) for n in names)
+            return {"segments": len(names), "bytes": total,
+                    "active": self.active["name"] if self.active else None}
+
+
+_default_store = None
+_default_lock = threading.Lock()
+
+
+def get_event_store():
+    """Process-wide event store, created on first use."""
+    global _default_store
+    with _default_lock:
+        if _default_store is None:
+            _default_store = EventStore()
+        return _default_store
+
+
+def set_event_store(store):
+    """Replaces the process-wide event store (e.g. with a temp-dir store for benchmarks)."""
+    global _default_store
+    with _default_lock:
+        previous, _default_store = _default_store, store
+    if previous is not None and previous is not store:
+        previous.close()
+
+
+def record_event(event_type, **fields):
+    """Appends to the process-wide store; never lets a storage error break the caller."""
+    try:
+        get_event_store().append(event_type, **fields)
+    except Exception as e:
+        logging.error(f"Event store append failed: {e}")
+
+
+def _parse_time(value):
+    if value is None:
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        return datetime.datetime.fromisoformat(value).timestamp()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m core.event_store", description="Query the structured audit event store.")
+    parser.add_argument("--dir", default=os.path.join("logs", "events"), help="event store directory")
+    sub = parser.add_subparsers(dest="command", required=True)
+    q = sub.add_parser("query", help="print matching events")
+    q.add_argument("--serial")
+    q.add_argument("--path", help="path prefix (matches source or destination)")
+    q.add_argument("--type", help="event type, e.g. INSERTION, BLOCK, CREATED, HASHED")
+    q.add_argument("--drive")
+    q.add_argument("--since", help="ISO date/time or epoch seconds")
+    q.add_argument("--until", help="ISO date/time or epoch seconds")
+    q.add_argument("--limit", type=int, default=1000)
+    q.add_argument("--json", action="store_true", help="one JSON object per line")
+    sub.add_parser("stats", help="segment count and size")
+    args = parser.parse_args(argv)
+
+    store = EventStore(args.dir)
+    if args.command == "stats":
+        print(json.dumps(store.stats(), indent=2))
+        return 0
+
+    for record in store.query(serial=args.serial, path_prefix=args.path, event_type=args.type, drive=args.drive,
+                              start=_parse_time(args.since), end=_parse_time(args.until), limit=args.limit):
+        if args.json:
+            print(json.dumps(record))
+        else:
+            when = datetime.datetime.fromtimestamp(record["ts"]).isoformat(sep=" ", timespec="seconds")
+            line = f"{when} | {record['event_type']} | {record['serial']} | {record['drive']} | {record['path']}"
+            if record["dest"]:
+                line += f" -> {record['dest']}"
+            if record["size"]:
+                line += f" | {record['size']} bytes"
+            if record["hash"]:
+                line += f" | {record['hash']}"
+            if record["detail"]:
+                line += f" | {record['detail']}"
+            print(line)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,37 +1,22 @@
 import os
-import hashlib
-import logging
 import time
-from watchdog.observers import Observer
+import logging
+import threading
 from watchdog.events import FileSystemEventHandler
 
+from .hashing_service import HashingService
+from .hash_cache import HashCache
+from .event_coalescer import EventCoalescer
+from .event_store import record_event
+from .event_bus import publish
+
 class FileAuditHandler(FileSystemEventHandler):
-    def __init__(self, reporter):
+    def __init__(self, reporter, hasher):
         self.reporter = reporter
-
-    def calculate_sha256(self, filepath):
-        """Calculate SHA256 hash of a file with usage retries."""
-        sha256_hash = hashlib.sha256()
-        
-        # Retry up to 3 times if file is locked (common during copy)
-        for attempt in range(3):
-            try:
-                # Check if file exists and is accessible
-                if not os.path.exists(filepath):
-                    return "FILE_NOT_FOUND"
-                
-                # Read in chunks
-                with open(filepath, "rb") as f:
-                    for byte_block in iter(lambda: f.read(4096), b""):
-                        sha256_hash.update(byte_block)
-                return sha256_hash.hexdigest()
-            except PermissionError:
-                # File is likely locked by the writing process
-                time.sleep(0.5)
-            except Exception as e:
-                return f"ERROR_HASHING: {str(e)}"
-        
-        return "Generic_Error_File_Locked"
+        # Hashing runs off the watchdog thread; the result is logged separately
+        self.hasher = hasher
+        # Maps a path to the audited drive it lives on (set by FileAuditor)
+        self.drive_of = lambda path: None
 
     def log_activity(self, event_type, src_path, dest_path=None, is_directory=False):
         if is_directory:
@@ -43,9 +28,14 @@ class FileAuditHandler(FileSystemEventHandler):
         target_file = src_path if event_type != "moved" else dest_path
         
         try:
+            if event_type == "deleted":
+                self.hasher.deleted(src_path)
+            elif event_type == "moved":
+                self.hasher.moved(src_path, dest_path) # hash follows the rename, no re-read
             if event_type != "deleted" and os.path.exists(target_file) and not is_directory:
                 file_size = os.path.getsize(target_file)
-                file_hash = self.calculate_sha256(target_file)
+                self.hasher.submit(target_file, event_type)
+                file_hash = "PENDING"
         except:
             pass
 
@@ -57,19 +47,37 @@ class FileAuditHandler(FileSystemEventHandler):
         logging.getLogger("file_activity").info(log_msg)
         
         # Update reporter stats
+        drive = self.drive_of(target_file)
+        serial = self.reporter.drive_devices.get(drive)
+        publish("file", log_msg, event_type=event_type.upper(), drive=drive, serial=serial, path=target_file)
+        record_event(event_type.upper(), serial=serial or "", drive=drive or "",
+                     path=src_path, dest=dest_path or "", size=file_size)
         if event_type == "created":
-            self.reporter.update_stat("files_copied")
+            self.reporter.update_stat("files_copied", drive=drive)
             # Simple check for large file transfer (e.g., > 100MB)
             if file_size > 100 * 1024 * 1024:
-                 logging.getLogger("alerts").warning(f"LARGE FILE TRANSFER DETECTED: {target_file} ({file_size} bytes)")
-                 self.reporter.update_stat("suspicious_activities")
+                 message = f"LARGE FILE TRANSFER DETECTED: {target_file} ({file_size} bytes)"
+                 logging.getLogger("alerts").warning(message)
+                 publish("file", message, "WARNING", event_type="LARGE_FILE", drive=drive, serial=serial, path=target_file)
+                 self.reporter.update_stat("suspicious_activities", drive=drive)
                  
         elif event_type == "deleted":
-            self.reporter.update_stat("files_deleted")
+            self.reporter.update_stat("files_deleted", drive=drive)
         elif event_type == "modified":
-            self.reporter.update_stat("files_modified")
+            self.reporter.update_stat("files_modified", drive=drive)
         elif event_type == "moved":
-            self.reporter.update_stat("files_copied") # Treated as copy/move
+            self.reporter.update_stat("files_copied", drive=drive) # Treated as copy/move
+
+    def log_hash(self, path, file_hash, size, elapsed, label, cached=False):
+        """Completion line for a hash requested by log_activity, attributed like the file event."""
+        source = "cache" if cached else f"{elapsed * 1000:.0f} ms"
+        message = f"Event: HASHED | Path: {path} | Size: {size} bytes | Hash: {file_hash} | Trigger: {label.upper()} | Took: {source}"
+        logging.getLogger("file_activity").info(message)
+        drive = self.drive_of(path)
+        serial = self.reporter.drive_devices.get(drive)
+        publish("file", message, event_type="HASHED", drive=drive, serial=serial, path=path)
+        record_event("HASHED", serial=serial or "", drive=drive or "", path=path, size=size,
+                     file_hash=file_hash, detail=label)
 
     def on_created(self, event):
         # print(f"DEBUG: Watchdog CREATED {event.src_path}")
@@ -90,38 +98,150 @@ class FileAuditHandler(FileSystemEventHandler):
         self.log_activity("moved", event.src_path, event.dest_path, is_directory=event.is_directory)
 
 class FileAuditor:
-    def __init__(self, reporter):
-        self.observers = {}
-        self.reporter = reporter
+    """
+    Audits file activity on allowed drives with ONE watchdog observer: each
+    drive is a watch scheduled/unscheduled on it, and every watch feeds the
+    same coalescer -> handler -> hashing pool.
+    """
 
-    def start_auditing(self, drive_letter):
-        if drive_letter in self.observers:
-            logging.info(f"Already auditing {drive_letter}")
-            return
+    def __init__(self, reporter, hasher=None, coalesce_window=1.0):
+        self.observer = None # created on the first drive, shared by all drives
+        self.watches = {} # drive_letter -> ObservedWatch
+        self.roots = {} # drive_letter -> normalised root path (for per-drive stats)
+        self.volume_keys = {} # drive_letter -> stable volume key for the hash cache
+        self.lock = threading.Lock()
+        self.reporter = reporter
+        self.handler = FileAuditHandler(self.reporter, hasher)
+        self.handler.drive_of = self.drive_for_path
+        # One hashing pool shared by every audited drive
+        self.hasher = hasher or HashingService(self.handler.log_hash, cache=HashCache(), locate=self.cache_key_for)
+        self.handler.hasher = self.hasher
+        # Merge per-path event bursts before they reach the handler
+        self.coalescer = EventCoalescer(self.handler.log_activity, window=coalesce_window)
 
-        logging.info(f"Starting file audit on {drive_letter}")
-        event_handler = FileAuditHandler(self.reporter)
-        observer = Observer()
+    def start_auditing(self, drive_letter, path=None, volume_key=None):
+        """
+        Watches a drive. volume_key identifies the volume independently of
+        where it is mounted (device serial + filesystem serial); without one,
+        the drive's hashes aren't cached.
+        """
         # Verify path exists
-        path = f"{drive_letter}\\"
+        path = path or f"{drive_letter}\\"
         if not os.path.exists(path):
             logging.error(f"Cannot start auditing: Path {path} does not exist.")
             return
 
-        observer.schedule(event_handler, path, recursive=True)
-        observer.start()
-        self.observers[drive_letter] = observer
+        with self.lock:
+            if drive_letter in self.watches:
+                logging.info(f"Already auditing {drive_letter}")
+                return
+
+            logging.info(f"Starting file audit on {drive_letter}")
+            self.hasher.start()
+            self.coalescer.start()
+            if self.observer is None:
+                # Imported on first use: the platform observer (inotify / ReadDirectoryChangesW) is the slow part of watchdog
+                from watchdog.observers import Observer
+                self.observer = Observer()
+                self.observer.daemon = True
+                self.observer.start()
+            self.watches[drive_letter] = self.observer.schedule(self.coalescer, path, recursive=True)
+            self.roots[drive_letter] = os.path.normcase(os.path.abspath(path))
+            if volume_key:
+                self.volume_keys[drive_letter] = volume_key
 
-    def stop_auditing(self, drive_letter):
-        if drive_letter in self.observers:
+    def cache_key_for(self, path):
+        """(volume key, root-relative path with "/" separators) for the hash cache, or None."""
+        full = os.path.abspath(path)
+        norm = os.path.normcase(full)
+        for drive, root in list(self.roots.items()):
+            prefix = root.rstrip(os.sep) + os.sep
+            if norm.startswith(prefix):
+                volume_key = self.volume_keys.get(drive)
+                # normcase keeps the length, so the original case is sliced off `full`
+                return (volume_key, full[len(prefix):].replace(os.sep, "/")) if volume_key else None
+        return None
+
+    def drive_for_path(self, path):
+        """The audited drive a path lives on, or None."""
+        norm = os.path.normcase(os.path.abspath(path))
+        for drive, root in list(self.roots.items()):
+            if norm == root or norm.startswith(root.rstrip(os.sep) + os.sep):
+                return drive
+        return None
+
+    @staticmethod
+    def _run_bounded(target, args, timeout, name):
+        """Runs a possibly-blocking watchdog call on a daemon thread. Returns True if it finished in time."""
+        worker = threading.Thread(target=target, args=args, name=name, daemon=True)
+        worker.start()
+        worker.join(timeout)
+        return not worker.is_alive()
+
+    def stop_auditing(self, drive_letter, timeout=1):
+        with self.lock:
+            watch = self.watches.pop(drive_letter, None)
+            root = self.roots.get(drive_letter)
+            observer = self.observer
+        if watch is not None and observer is not None:
             logging.info(f"Stopping file audit on {drive_letter}")
-            observer = self.observers[drive_letter]
-            observer.stop()
-            observer.join(timeout=1) # Don't block forever if thread is stuck
-            if observer.is_alive():
-                 logging.warning(f"Watchdog observer for {drive_letter} did not stop gracefully.")
-            del self.observers[drive_letter]
-    
-    def stop_all(self):
-        for drive in list(self.observers.keys()):
-            self.stop_auditing(drive)
+            # unschedule() joins the drive's emitter thread; don't block forever if it is stuck
+            if not self._run_bounded(self._unschedule, (observer, watch), timeout, f"unwatch-{drive_letter}"):
+                logging.warning(f"Watchdog watch for {drive_letter} did not stop gracefully.")
+        # Emit the drive's pending records while its root still maps them to the drive and serial
+        if root:
+            self.coalescer.flush_under(root)
+        with self.lock:
+            if drive_letter not in self.watches: # not re-inserted meanwhile
+                self.roots.pop(drive_letter, None)
+                self.volume_keys.pop(drive_letter, None)
+
+    @staticmethod
+    def _unschedule(observer, watch):
+        try:
+            observer.unschedule(watch)
+        except (KeyError, RuntimeError):
+            pass # already gone (observer stopped)
+
+    def get_coalescer_stats(self):
+        """Coalescing counters (events received vs. records emitted) for all audited drives."""
+        return self.coalescer.stats()
+
+    def stop_all(self, timeout=2):
+        """
+        Stops every watch in parallel, then the observer, coalescer and hashing
+        pool, all within one `timeout` deadline regardless of the drive count.
+        """
+        deadline = time.monotonic() + timeout
+        remaining = lambda: max(0.0, deadline - time.monotonic())
+
+        with self.lock:
+            observer, watches = self.observer, dict(self.watches)
+            self.observer = None
+            self.watches.clear()
+
+        if observer is not None:
+            workers = []
+            for drive, watch in watches.items():
+                logging.info(f"Stopping file audit on {drive}")
+                worker = threading.Thread(target=self._unschedule, args=(observer, watch),
+                                          name=f"unwatch-{drive}", daemon=True)
+                worker.start()
+                workers.append((drive, worker))
+            for drive, worker in workers:
+                worker.join(remaining())
+                if worker.is_alive():
+                    logging.warning(f"Watchdog watch for {drive} did not stop gracefully.")
+
+            # observer.stop() unschedules leftovers (joining their emitters) in the caller's thread
+            if not self._run_bounded(observer.stop, (), remaining(), "audit-observer-stop"):
+                logging.warning("Watchdog observer did not stop before the deadline.")
+            observer.join(remaining())
+
+        self.coalescer.stop() # emits whatever was still pending
+        with self.lock:
+            self.roots.clear()
+            self.volume_keys.clear()
+        stats = self.coalescer.stats()
+        logging.info(f"Audit events: {stats['received']} received -> {stats['emitted']} records")
+        self.hasher.stop(timeout=remaining())
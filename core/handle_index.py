@@ -0,0 +1,159 @@
+import os
+import time
+import logging
+import threading
+
+# Only scan apps likely to be copying files (User UI). Windows image names,
+# then Linux process names (file managers, shells, copy tools); settings.json
+# "transfer_apps" replaces the list
+TARGET_APPS = ['explorer.exe', 'cmd.exe', 'powershell.exe', 'robocopy.exe', 'xcopy.exe', 'totalcmd.exe', 'python.exe',
+               'nautilus', 'dolphin', 'thunar', 'nemo', 'caja', 'pcmanfm', 'mc', 'bash', 'sh',
+               'cp', 'mv', 'rsync', 'dd', 'tar', 'python', 'python3']
+
+
+class OpenHandleIndex:
+    """
+    Shared index of the files held open by likely file-transfer processes.
+
+    One refresh walks the target processes once and diffs each process's open
+    file set against the previous snapshot; the per-volume maps are patched
+    with just the added/removed paths. All monitored drives (and the
+    destination heuristic) answer from the same snapshot.
+    """
+
+    def __init__(self, target_apps=TARGET_APPS, min_interval=0.1):
+        self.target_apps = set(a.lower() for a in target_apps)
+        self.min_interval = min_interval
+        self.lock = threading.Lock()
+        self.roots = {} # volume -> normalised root prefix, ending in a separator ("e:\\", "/media/usb1/")
+        self.processes = {} # pid -> {'name', 'obj', 'files': set(paths)}
+        self.by_volume = {} # volume -> {pid: set(paths)}
+        self.off_volume = {} # pid -> set(paths) not on any registered volume
+        self.last_refresh = 0.0
+        self.refreshes = 0
+        self.skipped = 0
+
+    @staticmethod
+    def _norm(path):
+        return os.path.normcase(path)
+
+    def _volume_of(self, path):
+        norm = self._norm(path)
+        best = None
+        for volume, root in self.roots.items():
+            # Separator-bounded: /media/usb1 must not claim /media/usb10/...
+            if (norm.startswith(root) or norm + os.sep == root) and (best is None or len(root) > len(self.roots[best])):
+                best = volume
+        return best
+
+    def _index_path(self, pid, path):
+        volume = self._volume_of(path)
+        if volume is None:
+            self.off_volume.setdefault(pid, set()).add(path)
+        else:
+            self.by_volume.setdefault(volume, {}).setdefault(pid, set()).add(path)
+
+    def _unindex_path(self, pid, path):
+        volume = self._volume_of(path)
+        bucket = self.off_volume if volume is None else self.by_volume.get(volume, {})
+        paths = bucket.get(pid)
+        if paths is not None:
+            paths.discard(path)
+            if not paths:
+                del bucket[pid]
+
+    def _reindex(self):
+        self.by_volume = {}
+        self.off_volume = {}
+        for pid, proc in self.processes.items():
+            for path in proc['files']:
+                self._index_path(pid, path)
+
+    def add_volume(self, volume, root):
+        """Registers a monitored volume and the path prefix its files live under."""
+        with self.lock:
+            self.roots[volume] = self._norm(root).rstrip(os.sep) + os.sep
+            self._reindex()
+
+    def remove_volume(self, volume):
+        with self.lock:
+            if self.roots.pop(volume, None) is not None:
+                self._reindex()
+
+    def refresh(self, force=False):
+        """
+        Rescans the target processes unless the index is fresher than
+        min_interval (i.e. already refreshed this tick). Returns True if it scanned.
+        """
+        with self.lock:
+            now = time.monotonic()
+            if not force and now - self.last_refresh < self.min_interval:
+                self.skipped += 1
+                return False
+
+            import psutil # loaded on the first refresh, not at start-up
+            seen = set()
+            try:
+                for proc in psutil.process_iter(['pid', 'name']):
+                    try:
+                        name = proc.info['name']
+                        if not name or name.lower() not in self.target_apps:
+                            continue
+                        try:
+                            current = set(f.path for f in proc.open_files() if f.path)
+                        except (psutil.AccessDenied, psutil.NoSuchProcess):
+                            continue
+                    except Exception:
+                        continue
+
+                    pid = proc.info['pid']
+                    seen.add(pid)
+                    entry = self.processes.get(pid)
+                    if entry is None:
+                        entry = self.processes[pid] = {'name': name, 'obj': proc, 'files': set()}
+
+                    # Patch the volume maps with the diff only
+                    previous = entry['files']
+                    for path in current - previous:
+                        self._index_path(pid, path)
+                    for path in previous - current:
+                        self._unindex_path(pid, path)
+                    entry['files'] = current
+            except Exception as e:
+                logging.debug(f"Handle index refresh error: {e}")
+
+            # Processes that exited (or stopped being scannable)
+            for pid in [p for p in self.processes if p not in seen]:
+                for path in self.processes.pop(pid)['files']:
+                    self._unindex_path(pid, path)
+
+            self.last_refresh = time.monotonic()
+            self.refreshes += 1
+            return True
+
+    def files_on(self, volume):
+        """{pid: {'name', 'files', 'obj'}} for processes holding files on the volume."""
+        with self.lock:
+            result = {}
+            for pid, paths in self.by_volume.get(volume, {}).items():
+                proc = self.processes[pid]
+                result[pid] = {'name': proc['name'], 'files': sorted(paths), 'obj': proc['obj']}
+            return result
+
+    def files_off(self, pid, volume):
+        """Paths the process holds open anywhere except on the volume."""
+        with self.lock:
+            paths = set(self.off_volume.get(pid, ()))
+            for other, holders in self.by_volume.items():
+                if other != volume:
+                    paths.update(holders.get(pid, ()))
+            return paths
+
+    def stats(self):
+        with self.lock:
+            return {
+                'processes': len(self.processes),
+                'volumes': len(self.roots),
+                'refreshes': self.refreshes,
+                'skipped_refreshes': self.skipped
+            }
@@ -0,0 +1,205 @@
+import os
+import sqlite3
+import logging
+import threading
+
+
+class HashCache:
+    """
+    Persistent SHA256 cache for audited files, stored in SQLite.
+
+    An entry is keyed by (volume, path) and is only returned when size and
+    mtime_ns still match, so any content change is a miss. `volume` is a
+    stable volume key (device serial + filesystem serial, see
+    FileAuditor.start_auditing) and `path` is relative to the volume root
+    with "/" separators, so entries survive the stick coming back on another
+    drive letter, mount point or block node. Inode numbers aren't compared:
+    FAT-family filesystems don't keep them across mounts.
+
+    Eviction is LRU, bounded by entry count and by the approximate bytes the
+    entries occupy.
+    """
+
+    ENTRY_OVERHEAD = 96 # approx. bytes per row besides the path
+
+    def __init__(self, path=os.path.join("config", "hash_cache.db"), max_entries=200000, max_bytes=64 * 1024 * 1024):
+        self.path = path
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.lock = threading.Lock()
+        self.conn = None
+        self.entries = 0
+        self.bytes = 0
+        self.clock = 0 # LRU tick, persisted as last_used
+        self.counters = {'hits': 0, 'misses': 0, 'stores': 0, 'moves': 0, 'evictions': 0}
+
+    def _open(self):
+        """Opens the database on first use (keeps it off the startup path)."""
+        if self.conn is not None:
+            return self.conn
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        # The old table was keyed on st_dev and absolute paths, which don't survive a remount
+        conn.execute("DROP TABLE IF EXISTS hashes")
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS file_hashes ("
+            " volume TEXT NOT NULL, path TEXT NOT NULL, size INTEGER NOT NULL,"
+            " mtime_ns INTEGER NOT NULL, sha256 TEXT NOT NULL,"
+            " cost INTEGER NOT NULL, last_used INTEGER NOT NULL,"
+            " PRIMARY KEY (volume, path))"
+        )
+        conn.execute("CREATE INDEX IF NOT EXISTS file_hashes_lru ON file_hashes (last_used)")
+        count, cost, clock = conn.execute(
+            "SELECT COUNT(*), COALESCE(SUM(cost), 0), COALESCE(MAX(last_used), 0) FROM file_hashes").fetchone()
+        self.entries, self.bytes, self.clock = count, cost, clock
+        self.conn = conn
+        return conn
+
+    def _tick(self):
+        self.clock += 1
+        return self.clock
+
+    def lookup(self, volume, path, size, mtime_ns):
+        """Returns the cached hash if the file is unchanged, else None."""
+        with self.lock:
+            try:
+                conn = self._open()
+                row = conn.execute(
+                    "SELECT sha256, size, mtime_ns FROM file_hashes WHERE volume = ? AND path = ?",
+                    (volume, path)).fetchone()
+                if row is None or (row[1], row[2]) != (size, mtime_ns):
+                    self.counters['misses'] += 1
+                    return None
+                conn.execute("UPDATE file_hashes SET last_used = ? WHERE volume = ? AND path = ?",
+                             (self._tick(), volume, path))
+                self.counters['hits'] += 1
+                return row[0]
+            except sqlite3.Error as e:
+                logging.error(f"Hash cache lookup failed: {e}")
+                return None
+
+    def lookup_many(self, volume, files):
+        """
+        Cached hashes for many files of one volume in one query:
+        files is [(path, size, mtime_ns)], returns {path: sha256} for those
+        whose size and mtime still match. The LRU clock isn't bumped.
+        """
+        found = {}
+        if not files:
+            return found
+        with self.lock:
+            try:
+                conn = self._open()
+                wanted = {path: (size, mtime_ns) for path, size, mtime_ns in files}
+                paths = list(wanted)
+                for i in range(0, len(paths), 500): # SQLite host-parameter limit
+                    chunk = paths[i:i + 500]
+                    rows = conn.execute(
+                        f"SELECT path, size, mtime_ns, sha256 FROM file_hashes WHERE volume = ? AND path IN ({','.join('?' * len(chunk))})",
+                        (volume, *chunk)).fetchall()
+                    for path, size, mtime_ns, sha256 in rows:
+                        if wanted[path] == (size, mtime_ns):
+                            found[path] = sha256
+                self.counters['hits'] += len(found)
+                self.counters['misses'] += len(wanted) - len(found)
+            except sqlite3.Error as e:
+                logging.error(f"Hash cache lookup failed: {e}")
+        return found
+
+    def store(self, volume, path, size, mtime_ns, sha256):
+        with self.lock:
+            try:
+                conn = self._open()
+                cost = len(path.encode("utf-8", "surrogatepass")) + self.ENTRY_OVERHEAD
+                old = conn.execute("SELECT cost FROM file_hashes WHERE volume = ? AND path = ?", (volume, path)).fetchone()
+                conn.execute(
+                    "INSERT OR REPLACE INTO file_hashes VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    (volume, path, size, mtime_ns, sha256, cost, self._tick()))
+                if old:
+                    self.bytes -= old[0]
+                else:
+                    self.entries += 1
+                self.bytes += cost
+                self.counters['stores'] += 1
+                self._evict()
+            except sqlite3.Error as e:
+                logging.error(f"Hash cache store failed: {e}")
+
+    def move(self, volume, src_path, dest_path):
+        """Re-keys an entry after a rename so the destination is not re-read."""
+        with self.lock:
+            conn = None
+            try:
+                conn = self._open()
+                cost = len(dest_path.encode("utf-8", "surrogatepass")) + self.ENTRY_OVERHEAD
+                conn.execute("BEGIN")
+                replaced = conn.execute("SELECT cost FROM file_hashes WHERE volume = ? AND path = ?", (volume, dest_path)).fetchone()
+                source = conn.execute("SELECT cost FROM file_hashes WHERE volume = ? AND path = ?", (volume, src_path)).fetchone()
+                if source:
+                    if replaced:
+                        conn.execute("DELETE FROM file_hashes WHERE volume = ? AND path = ?", (volume, dest_path))
+                    conn.execute("UPDATE file_hashes SET path = ?, cost = ?, last_used = ? WHERE volume = ? AND path = ?",
+                                 (dest_path, cost, self._tick(), volume, src_path))
+                conn.execute("COMMIT")
+                if not source:
+                    return False
+                if replaced:
+                    self.entries -= 1
+                    self.bytes -= replaced[0]
+                self.bytes += cost - source[0]
+                self.counters['moves'] += 1
+                return True
+            except sqlite3.Error as e:
+                if conn is not None and conn.in_transaction:
+                    conn.execute("ROLLBACK")
+                logging.error(f"Hash cache move failed: {e}")
+                return False
+
+    def forget(self, volume, path):
+        with self.lock:
+            try:
+                conn = self._open()
+                row = conn.execute("SELECT cost FROM file_hashes WHERE volume = ? AND path = ?", (volume, path)).fetchone()
+                if row:
+                    conn.execute("DELETE FROM file_hashes WHERE volume = ? AND path = ?", (volume, path))
+                    self.entries -= 1
+                    self.bytes -= row[0]
+            except sqlite3.Error as e:
+                logging.error(f"Hash cache delete failed: {e}")
+
+    def _evict(self):
+        """Drops least recently used rows until both limits hold again (plus 10% headroom)."""
+        if self.entries <= self.max_entries and self.bytes <= self.max_bytes:
+            return
+        target_entries = int(self.max_entries * 0.9)
+        target_bytes = int(self.max_bytes * 0.9)
+        conn = self.conn
+        conn.execute("BEGIN")
+        while self.entries > target_entries or self.bytes > target_bytes:
+            rows = conn.execute("SELECT volume, path, cost FROM file_hashes ORDER BY last_used LIMIT 512").fetchall()
+            if not rows:
+                break
+            for volume, path, cost in rows:
+                if self.entries <= target_entries and self.bytes <= target_bytes:
+                    break
+                conn.execute("DELETE FROM file_hashes WHERE volume = ? AND path = ?", (volume, path))
+                self.entries -= 1
+                self.bytes -= cost
+                self.counters['evictions'] += 1
+        conn.execute("COMMIT")
+
+    def stats(self):
+        with self.lock:
+            stats = dict(self.counters)
+            stats.update({'entries': self.entries, 'bytes': self.bytes})
+            return stats
+
+    def close(self):
+        with self.lock:
+            if self.conn is not None:
+                self.conn.close()
+                self.conn = None
@@ -0,0 +1,302 @@
+import os
+import time
+import heapq
+import hashlib
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+
+class _Stopping(Exception):
+    """Raised inside a hash job when the service is being stopped."""
+
+
+class HashingService:
+    """
+    Background SHA256 hashing for audited files.
+
+    Requests are debounced per path: a file is hashed only once its size and
+    mtime have stayed unchanged for `quiet_period` seconds, so a file that is
+    still being copied is hashed once instead of on every modification.
+    Duplicate requests for a path coalesce into the pending one. Dispatch is
+    limited by a budget of bytes being hashed at once (a single file larger
+    than the budget still runs, alone).
+
+    With a HashCache, unchanged files (and renamed ones, via moved()) are
+    answered from the cache without reading their data again. The cache is
+    keyed by locate(path) -> (volume_key, volume-relative path), or None for
+    paths that can't be placed on a known volume (those aren't cached).
+
+    on_complete(path, file_hash, size, elapsed, label, cached) is called from
+    a worker thread for each finished hash.
+    """
+
+    def __init__(self, on_complete, workers=2, chunk_size=1024 * 1024, quiet_period=1.0,
+                 max_inflight_bytes=256 * 1024 * 1024, max_retries=3, cache=None, locate=None):
+        self.on_complete = on_complete
+        self.cache = cache
+        self.locate = locate
+        self.workers = workers
+        self.chunk_size = chunk_size
+        self.quiet_period = quiet_period
+        self.max_inflight_bytes = max_inflight_bytes
+        self.max_retries = max_retries
+
+        self.cond = threading.Condition()
+        self.pending = {} # path -> {'due', 'size', 'mtime', 'label', 'retries'}
+        self.heap = [] # (due, path); stale entries are skipped
+        self.inflight = {} # path -> size
+        self.inflight_bytes = 0
+        self.requeue = set() # paths re-requested while being hashed
+        self.executor = None
+        self.scheduler = None
+        self.running = False
+        self.stopping = threading.Event() # makes running hash jobs bail out between chunks
+        self.counters = {'requested': 0, 'coalesced': 0, 'hashed': 0, 'bytes_hashed': 0, 'cancelled': 0, 'errors': 0, 'cache_hits': 0}
+
+    def start(self):
+        with self.cond:
+            if self.running:
+                return
+            self.running = True
+            self.stopping.clear()
+            self.executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="hash")
+            self.scheduler = threading.Thread(target=self._schedule_loop, name="hash-scheduler", daemon=True)
+            self.scheduler.start()
+
+    def stop(self, timeout=2):
+        with self.cond:
+            if not self.running:
+                return
+            self.running = False
+            self.stopping.set()
+            self.counters['cancelled'] += len(self.pending)
+            self.pending.clear()
+            self.heap.clear()
+            self.requeue.clear()
+            self.cond.notify_all()
+        self.scheduler.join(timeout=timeout)
+        # Queued jobs are dropped and running ones stop at their next chunk;
+        # wait for them so none touches the cache after it is closed
+        self.executor.shutdown(wait=True, cancel_futures=True)
+        with self.cond:
+            # Cancelled jobs never ran their own bookkeeping
+            self.inflight.clear()
+            self.inflight_bytes = 0
+        if self.cache:
+            self.cache.close()
+
+    @staticmethod
+    def _stat(path):
+        try:
+            st = os.stat(path)
+            return st.st_size, st.st_mtime_ns
+        except OSError:
+            return None
+
+    def submit(self, path, label="modified"):
+        """Requests a hash of path once it is quiescent. Returns immediately."""
+        observed = self._stat(path) or (None, None)
+        with self.cond:
+            if not self.running:
+                return
+            self.counters['requested'] += 1
+            if path in self.inflight:
+                # Being hashed right now: hash again afterwards
+                self.requeue.add(path)
+                self.counters['coalesced'] += 1
+                return
+
+            due = time.monotonic() + self.quiet_period
+            entry = self.pending.get(path)
+            if entry is not None:
+                self.counters['coalesced'] += 1
+                entry['due'] = due # keeps the first label ("created" beats later "modified")
+                entry['size'], entry['mtime'] = observed
+            else:
+                self.pending[path] = {'due': due, 'size': observed[0], 'mtime': observed[1], 'label': label, 'retries': 0}
+            heapq.heappush(self.heap, (due, path))
+            self.cond.notify()
+
+    def cancel(self, path):
+        """Drops a pending request (e.g. the file was deleted)."""
+        with self.cond:
+            self.requeue.discard(path)
+            if self.pending.pop(path, None) is not None:
+                self.counters['cancelled'] += 1
+
+    def _cache_key(self, path):
+        """(volume_key, relative path) for the cache, or None if the path isn't cached."""
+        if not self.cache or self.locate is None:
+            return None
+        try:
+            return self.locate(path)
+        except Exception as e:
+            logging.debug(f"No hash cache key for {path}: {e}")
+            return None
+
+    def moved(self, src_path, dest_path):
+        """Carries a cached hash over to the new name; call before submit(dest_path)."""
+        self.cancel(src_path)
+        src, dest = self._cache_key(src_path), self._cache_key(dest_path)
+        if src and dest and src[0] == dest[0]:
+            self.cache.move(src[0], src[1], dest[1])
+
+    def deleted(self, path):
+        self.cancel(path)
+        key = self._cache_key(path)
+        if key:
+            self.cache.forget(*key)
+
+    def _schedule_loop(self):
+        with self.cond:
+            while self.running:
+                now = time.monotonic()
+                wait = None
+                while self.heap:
+                    due, path = self.heap[0]
+                    entry = self.pending.get(path)
+                    if entry is None or entry['due'] != due:
+                        heapq.heappop(self.heap) # stale
+                        continue
+                    if due > now:
+                        wait = due - now
+                        break
+                    # Stat without the lock: a slow USB volume must not hold up submit()
+                    self.cond.release()
+                    try:
+                        observed = self._stat(path)
+                    finally:
+                        self.cond.acquire()
+                    if not self.running:
+                        return
+                    if not self.heap or self.heap[0] != (due, path) \
+                            or self.pending.get(path) is not entry or entry['due'] != due:
+                        continue # re-submitted or cancelled meanwhile: look again
+                    if not self._dispatch(path, entry, now, observed):
+                        wait = None # over budget: wait for a hash to finish
+                        break
+                self.cond.wait(wait)
+
+    def _dispatch(self, path, entry, now, observed):
+        """
+        Called under cond with the due entry at the top of the heap and its
+        (size, mtime) stat()ed just before. Returns False if the byte budget is exhausted.
+        """
+        if observed is None:
+            heapq.heappop(self.heap)
+            del self.pending[path]
+            self.counters['cancelled'] += 1
+            return True
+
+        size, mtime = observed
+        if (size, mtime) != (entry['size'], entry['mtime']):
+            # Still changing: check again after another quiet period
+            heapq.heappop(self.heap)
+            entry['size'], entry['mtime'] = size, mtime
+            entry['due'] = now + self.quiet_period
+            heapq.heappush(self.heap, (entry['due'], path))
+            return True
+
+        if self.inflight and self.inflight_bytes + size > self.max_inflight_bytes:
+            return False
+
+        heapq.heappop(self.heap)
+        del self.pending[path]
+        self.inflight[path] = size
+        self.inflight_bytes += size
+        self.executor.submit(self._hash_job, path, size, entry)
+        return True
+
+    def hash_file(self, filepath):
+        """Calculate SHA256 of a file with large reads. Raises OSError on failure."""
+        sha256_hash = hashlib.sha256()
+        buf = bytearray(self.chunk_size)
+        view = memoryview(buf)
+        with open(filepath, "rb", buffering=0) as f:
+            while True:
+                if self.stopping.is_set():
+                    raise _Stopping()
+                n = f.readinto(buf)
+                if not n:
+                    break
+                sha256_hash.update(view[:n])
+        return sha256_hash.hexdigest()
+
+    def _hash_job(self, path, size, entry):
+        start = time.perf_counter()
+        file_hash = None
+        retry = False
+        ok = False
+        cached = False
+        try:
+            st = os.stat(path)
+            located = self._cache_key(path)
+            key = located + (st.st_size, st.st_mtime_ns) if located else None
+            if key:
+                file_hash = self.cache.lookup(*key)
+                cached = file_hash is not None
+            if not cached:
+                file_hash = self.hash_file(path)
+                # Only cache if the file didn't change while we read it
+                after = os.stat(path)
+                if key and (after.st_size, after.st_mtime_ns) == key[2:]:
+                    self.cache.store(*key, file_hash)
+            ok = True
+        except _Stopping:
+            pass # stop() is waiting; no result, nothing cached
+        except PermissionError:
+            # File is likely locked by the writing process; try again later
+            retry = entry['retries'] < self.max_retries
+            if not retry:
+                file_hash = "Generic_Error_File_Locked"
+        except FileNotFoundError:
+            file_hash = "FILE_NOT_FOUND"
+        except Exception as e:
+            file_hash = f"ERROR_HASHING: {str(e)}"
+        elapsed = time.perf_counter() - start
+
+        with self.cond:
+            del self.inflight[path]
+            self.inflight_bytes -= size
+            again = path in self.requeue
+            self.requeue.discard(path)
+            if ok and cached:
+                self.counters['cache_hits'] += 1
+            elif ok:
+                self.counters['hashed'] += 1
+                self.counters['bytes_hashed'] += size
+            elif file_hash is not None:
+                self.counters['errors'] += 1
+            if self.running and (retry or again):
+                due = time.monotonic() + self.quiet_period
+                self.pending[path] = {'due': due, 'size': None, 'mtime': None, 'label': entry['label'],
+                                      'retries': entry['retries'] + 1 if retry else 0}
+                heapq.heappush(self.heap, (due, path))
+            self.cond.notify_all()
+
+        if file_hash is not None and not again:
+            try:
+                self.on_complete(path, file_hash, size, elapsed, entry['label'], cached)
+            except Exception as e:
+                logging.error(f"Hash completion callback failed for {path}: {e}")
+
+    def wait_idle(self, timeout=None):
+        """Blocks until nothing is pending or being hashed. Returns True if idle."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self.cond:
+            while self.pending or self.inflight:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self.cond.wait(remaining if remaining is not None else 0.1)
+            return True
+
+    def stats(self):
+        with self.cond:
+            stats = dict(self.counters)
+            stats.update({'pending': len(self.pending), 'inflight': len(self.inflight),
+                          'inflight_bytes': self.inflight_bytes})
+        if self.cache:
+            stats['cache'] = self.cache.stats()
+        return stats
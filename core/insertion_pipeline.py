@@ -0,0 +1,244 @@
+import time
+import logging
+import threading
+from collections import deque, OrderedDict
+from contextlib import contextmanager
+
+# Win32_VolumeChangeEvent.EventType values
+EVENT_INSERT = 2
+EVENT_REMOVE = 3
+# PnP device arrival (before any volume exists); keyed by device_id, not drive
+EVENT_ARRIVAL = "arrival"
+
+STAGE_NAMES = {EVENT_INSERT: "insert", EVENT_REMOVE: "remove", EVENT_ARRIVAL: "arrival"}
+
+
+class StageMetrics:
+    """
+    Latency samples per pipeline stage (queue_wait, resolve, policy, enforce, ...).
+    Keeps running totals plus a bounded window of recent samples for percentiles.
+    """
+
+    def __init__(self, window=1024):
+        self.window = window
+        self.lock = threading.Lock()
+        self.stages = OrderedDict() # name -> {'count', 'total', 'max', 'recent'}
+
+    def record(self, stage, seconds):
+        with self.lock:
+            data = self.stages.get(stage)
+            if data is None:
+                data = {'count': 0, 'total': 0.0, 'max': 0.0, 'recent': deque(maxlen=self.window)}
+                self.stages[stage] = data
+            data['count'] += 1
+            data['total'] += seconds
+            data['max'] = max(data['max'], seconds)
+            data['recent'].append(seconds)
+
+    @contextmanager
+    def stage(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - start)
+
+    @staticmethod
+    def _percentile(sorted_samples, pct):
+        if not sorted_samples:
+            return 0.0
+        index = min(len(sorted_samples) - 1, int(round(pct / 100.0 * (len(sorted_samples) - 1))))
+        return sorted_samples[index]
+
+    def snapshot(self):
+        """Returns {stage: {count, avg_ms, p50_ms, p95_ms, max_ms}}."""
+        with self.lock:
+            result = {}
+            for name, data in self.stages.items():
+                recent = sorted(data['recent'])
+                result[name] = {
+                    'count': data['count'],
+                    'avg_ms': (data['total'] / data['count']) * 1000 if data['count'] else 0.0,
+                    'p50_ms': self._percentile(recent, 50) * 1000,
+                    'p95_ms': self._percentile(recent, 95) * 1000,
+                    'max_ms': data['max'] * 1000
+                }
+            return result
+
+
+class InsertionPipeline:
+    """
+    Bounded worker pool for volume insert/remove events (and, given
+    on_arrival, PnP device arrivals keyed by device_id).
+
+    The WMI watcher thread only calls submit(). Workers run the handlers in
+    parallel across drives, but events for the same drive letter are processed
+    strictly in arrival order (one in flight per drive), so an insert and the
+    following remove of the same letter can never be reordered.
+    """
+
+    def __init__(self, on_insert, on_remove, workers=4, max_pending=256,
+                 worker_init=None, worker_exit=None, on_arrival=None):
+        self.handlers = {EVENT_INSERT: on_insert, EVENT_REMOVE: on_remove}
+        if on_arrival:
+            self.handlers[EVENT_ARRIVAL] = on_arrival
+        # Per-thread setup/teardown hooks (e.g. COM initialisation for WMI calls)
+        self.worker_init = worker_init
+        self.worker_exit = worker_exit
+        self.workers = workers
+        self.max_pending = max_pending
+        self.metrics = StageMetrics()
+
+        self.cond = threading.Condition()
+        self.pending = {}       # drive -> deque of (event_type, drive_letter, enqueued_at)
+        self.ready = deque()    # drives with pending events and no event in flight
+        self.busy = set()       # drives with an event in flight
+        self.depth = 0
+        self.max_depth = 0
+        self.processed = 0
+        self.running = False
+        self.threads = []
+        self.local = threading.local() # enqueued_at of the event each worker is handling
+
+    @staticmethod
+    def _drive_key(drive_letter):
+        return (drive_letter or "").rstrip('\\').upper()
+
+    def start(self):
+        with self.cond:
+            if self.running:
+                return
+            self.running = True
+        self.threads = []
+        for i in range(self.workers):
+            t = threading.Thread(target=self._worker, name=f"usb-pipeline-{i}", daemon=True)
+            t.start()
+            self.threads.append(t)
+
+    def stop(self, timeout=2):
+        with self.cond:
+            self.running = False
+            dropped = self.depth
+            self.pending.clear()
+            self.ready.clear()
+            self.depth = 0
+            self.cond.notify_all()
+        if dropped:
+            logging.warning(f"Insertion pipeline stopped with {dropped} unprocessed events.")
+
+        deadline = time.monotonic() + timeout
+        for t in self.threads:
+            t.join(timeout=max(0, deadline - time.monotonic()))
+        self.threads = []
+
+    def submit(self, event_type, drive_letter, timeout=None):
+        """
+        Enqueues an event. Blocks (back-pressure on the watcher) while the pipeline
+        is full; returns False if it stayed full for `timeout` seconds or is stopped.
+        """
+        if event_type not in self.handlers:
+            return False
+
+        drive = self._drive_key(drive_letter)
+        with self.cond:
+            if not self.cond.wait_for(lambda: not self.running or self.depth < self.max_pending, timeout):
+                logging.error(f"Insertion pipeline full, dropping event {event_type} for {drive_letter}")
+                return False
+            if not self.running:
+                return False
+
+            queue = self.pending.get(drive)
+            if queue is None:
+                queue = self.pending[drive] = deque()
+            queue.append((event_type, drive_letter, time.perf_counter()))
+
+            if drive not in self.busy and len(queue) == 1:
+                self.ready.append(drive)
+
+            self.depth += 1
+            self.max_depth = max(self.max_depth, self.depth)
+            self.cond.notify_all()
+        return True
+
+    def _worker(self):
+        if self.worker_init:
+            self.worker_init()
+        try:
+            self._work()
+        finally:
+            if self.worker_exit:
+                self.worker_exit()
+
+    def _work(self):
+        while True:
+            with self.cond:
+                self.cond.wait_for(lambda: not self.running or self.ready)
+                if not self.running:
+                    return
+                drive = self.ready.popleft()
+                event_type, drive_letter, enqueued_at = self.pending[drive].popleft()
+                self.busy.add(drive)
+
+            self.metrics.record("queue_wait", time.perf_counter() - enqueued_at)
+            self.local.enqueued_at = enqueued_at
+            try:
+                with self.metrics.stage(STAGE_NAMES[event_type]):
+                    self.handlers[event_type](drive_letter)
+            except Exception as e:
+                logging.error(f"Error handling event {event_type} for {drive_letter}: {e}")
+
+            with self.cond:
+                self.busy.discard(drive)
+                self.depth = max(0, self.depth - 1)
+                self.processed += 1
+                queue = self.pending.get(drive)
+                if queue:
+                    self.ready.append(drive)
+                elif queue is not None:
+                    del self.pending[drive]
+                self.cond.notify_all()
+
+    def event_age(self):
+        """Seconds since the event the calling worker is handling was submitted (0.0 off the workers)."""
+        enqueued_at = getattr(self.local, "enqueued_at", None)
+        return time.perf_counter() - enqueued_at if enqueued_at is not None else 0.0
+
+    def join(self, timeout=None):
+        """Waits until every submitted event has been handled."""
+        with self.cond:
+            return self.cond.wait_for(lambda: self.depth == 0, timeout)
+
+    def stats(self):
+        with self.cond:
+            return {
+                'queue_depth': self.depth,
+                'max_queue_depth': self.max_depth,
+                'in_flight': len(self.busy),
+                'processed': self.processed,
+                'stages': self.metrics.snapshot()
+            }
+
+
+def pump_volume_events(watcher, pipeline, keep_running, timeout_ms=1000):
+    """
+    Reads Win32_VolumeChangeEvent objects from an SWbemEventSource-like watcher
+    (anything with NextEvent(timeout_ms) returning objects with EventType/DriveName)
+    and hands them to the pipeline. Never runs handlers itself.
+    """
+    while keep_running():
+        try:
+            # NextEvent(Timeout_ms)
+            event = watcher.NextEvent(timeout_ms)
+
+            # EventType: 2 (Insert), 3 (Remove)
+            # DriveName: "E:"
+            pipeline.submit(event.EventType, event.DriveName)
+
+        except Exception as e:
+            # -2147209215 is "Timed out"
+            if "Timed out" in str(e) or "-2147209215" in str(e):
+                continue
+
+            if keep_running():
+                logging.error(f"Error in monitor loop: {e}")
+                time.sleep(1)
@@ -0,0 +1,142 @@
+import os
+import sys
+import struct
+import logging
+from abc import ABC, abstractmethod
+
+
+class CounterSource(ABC):
+    """
+    Reads cumulative (read_bytes, write_bytes) for a set of disks.
+    Disk names are the ones the device backend reports (PhysicalDriveN / sdX).
+    """
+
+    name = "base"
+
+    @abstractmethod
+    def read(self, disks):
+        """Returns {disk: (read_bytes, write_bytes)} for the disks that could be read."""
+
+    def forget(self, disk):
+        """Drops any per-disk state once nothing monitors the disk anymore."""
+
+    def close(self):
+        pass
+
+
+class PsutilCounterSource(CounterSource):
+    """Portable fallback. psutil always collects every disk, so this is the most expensive source."""
+
+    name = "psutil"
+
+    def read(self, disks):
+        if not disks:
+            return {}
+        import psutil # only loaded when this fallback is in use
+        counters = psutil.disk_io_counters(perdisk=True) or {}
+        return {d: (counters[d].read_bytes, counters[d].write_bytes) for d in disks if d in counters}
+
+
+class SysfsCounterSource(CounterSource):
+    """Linux: reads /sys/block/<disk>/stat for the monitored disks only."""
+
+    name = "sysfs"
+    SECTOR_SIZE = 512 # /sys/block/*/stat always counts 512-byte sectors
+
+    def read(self, disks):
+        result = {}
+        for disk in disks:
+            try:
+                with open(f"/sys/block/{disk}/stat", "r") as f:
+                    fields = f.read().split()
+                # fields[2] = sectors read, fields[6] = sectors written
+                result[disk] = (int(fields[2]) * self.SECTOR_SIZE, int(fields[6]) * self.SECTOR_SIZE)
+            except (OSError, IndexError, ValueError):
+                continue
+        return result
+
+
+class DiskPerformanceCounterSource(CounterSource):
+    """
+    Windows: IOCTL_DISK_PERFORMANCE on \\\\.\\PhysicalDriveN for the monitored
+    disks only. These are the same per-disk byte counters the kernel feeds to
+    ETW/perfmon, read without setting up a trace session.
+
+    The disk is opened for each sample and closed right after: an open
+    handle on a stick's disk makes Windows veto "safely remove" for it.
+    """
+
+    name = "disk_performance"
+    IOCTL_DISK_PERFORMANCE = 0x70020
+    OPEN_EXISTING = 3
+    FILE_SHARE_READ_WRITE = 0x1 | 0x2
+
+    def __init__(self):
+        import ctypes
+        from ctypes import wintypes
+        self.ctypes = ctypes
+        self.wintypes = wintypes
+        self.kernel32 = ctypes.windll.kernel32
+        self.kernel32.CreateFileW.restype = wintypes.HANDLE
+        self.invalid_handle = wintypes.HANDLE(-1).value
+
+    def read(self, disks):
+        result = {}
+        buf = self.ctypes.create_string_buffer(88) # sizeof(DISK_PERFORMANCE)
+        returned = self.wintypes.DWORD(0)
+        for disk in disks:
+            # No access rights requested: a query-only handle, no I/O on the disk
+            handle = self.kernel32.CreateFileW(f"\\\\.\\{disk}", 0, self.FILE_SHARE_READ_WRITE,
+                                               None, self.OPEN_EXISTING, 0, None)
+            if not handle or handle == self.invalid_handle:
+                continue # disk went away
+            try:
+                if self.kernel32.DeviceIoControl(handle, self.IOCTL_DISK_PERFORMANCE, None, 0,
+                                                 buf, len(buf), self.ctypes.byref(returned), None):
+                    result[disk] = struct.unpack_from("<qq", buf.raw, 0) # BytesRead, BytesWritten
+            finally:
+                self.kernel32.CloseHandle(handle)
+        return result
+
+
+def create_counter_source(name=None):
+    """
+    Picks the cheapest counter source for this platform ("disk_performance",
+    "sysfs" or "psutil"), or the named one.
+    """
+    if not name:
+        if sys.platform == "win32":
+            name = "disk_performance"
+        elif os.path.isdir("/sys/block"):
+            name = "sysfs"
+        else:
+            name = "psutil"
+
+    try:
+        if name == "disk_performance":
+            return DiskPerformanceCounterSource()
+        if name == "sysfs":
+            return SysfsCounterSource()
+    except Exception as e:
+        logging.warning(f"IO counter source '{name}' unavailable, falling back to psutil: {e}")
+    return PsutilCounterSource()
+
+
+class AdaptiveInterval:
+    """
+    Sampling interval that drops to `fast` as soon as bytes move and backs off
+    geometrically towards `slow` while the monitored disks are idle.
+    """
+
+    def __init__(self, fast=0.1, slow=2.0, backoff=1.5):
+        self.fast = fast
+        self.slow = slow
+        self.backoff = backoff
+        self.current = fast
+
+    def update(self, active):
+        if active:
+            self.current = self.fast
+        else:
+            self.current = min(self.slow, self.current * self.backoff)
+        return self.current
@@ -0,0 +1,319 @@
+import os
+import sys
+import gzip
+import time
+import queue
+import shutil
+import atexit
+import logging
+import threading
+import logging.handlers
+
+LOG_FORMAT = '%(asctime)s - %(levelname)s - %(message)s'
+
+# Named loggers with their own file: (logger, settings keys in order of preference, default path, also goes to main log)
+SINKS = (
+    ("usb_events", ("log_usb_events", "audit_log"), os.path.join("logs", "usb_events.log"), True),
+    ("file_activity", ("log_file_activity", "file_log"), os.path.join("logs", "file_activity.log"), False),
+    ("alerts", ("log_alerts",), os.path.join("logs", "alerts.log"), True),
+)
+
+OVERFLOW_POLICIES = ("drop_oldest", "drop_new", "block")
+
+_exc_formatter = logging.Formatter()
+
+
+class BoundedQueueHandler(logging.handlers.QueueHandler):
+    """
+    Hands records to a bounded queue; the caller never touches a file.
+
+    When the queue is full the overflow policy applies: "drop_oldest"
+    discards the oldest queued record, "drop_new" discards the incoming one,
+    "block" waits up to block_timeout. WARNING and above always wait up to
+    block_timeout before anything is dropped, so alerts survive a burst of
+    file-activity lines. Dropped records are counted in `dropped` (under
+    its own lock: producers drop concurrently).
+    """
+
+    def __init__(self, log_queue, overflow="drop_oldest", block_timeout=0.5):
+        super().__init__(log_queue)
+        if overflow not in OVERFLOW_POLICIES:
+            raise ValueError(f"Unknown log overflow policy: {overflow}")
+        self.overflow = overflow
+        self.block_timeout = block_timeout
+        self.dropped = 0
+        self.drop_lock = threading.Lock() # only taken on overflow
+
+    def _count_drop(self):
+        with self.drop_lock:
+            self.dropped += 1
+
+    def prepare(self, record):
+        # Only what must happen on the calling thread: merge args and render
+        # the traceback while it still exists. Formatting is left to the sinks.
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            if not record.exc_text:
+                record.exc_text = _exc_formatter.formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+            return
+        except queue.Full:
+            pass
+
+        if self.overflow == "block" or record.levelno >= logging.WARNING:
+            try:
+                self.queue.put(record, timeout=self.block_timeout)
+                return
+            except queue.Full:
+                pass
+        elif self.overflow == "drop_oldest":
+            try:
+                self.queue.get_nowait()
+                self._count_drop()
+                self.queue.put_nowait(record)
+                return
+            except (queue.Empty, queue.Full):
+                pass
+        self._count_drop()
+
+
+class BatchingQueueListener(logging.handlers.QueueListener):
+    """
+    Drains the queue in batches of up to batch_size records and flushes the
+    sinks every flush_interval seconds instead of after every line (ERROR and
+    above are flushed straight away). Overflow drops reported by
+    `overflow_source` are logged to the sinks as a warning.
+    """
+
+    def __init__(self, log_queue, *handlers, batch_size=512, flush_interval=0.5, overflow_source=None):
+        super().__init__(log_queue, *handlers, respect_handler_level=True)
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.overflow_source = overflow_source
+        self.reported_drops = 0
+
+    def enqueue_sentinel(self):
+        self.queue.put(self._sentinel) # blocking: a full queue must not lose the stop signal
+
+    def _flush_handlers(self):
+        for handler in self.handlers:
+            try:
+                handler.flush()
+            except Exception:
+                pass
+
+    def _report_drops(self):
+        dropped = self.overflow_source.dropped if self.overflow_source else 0
+        if dropped > self.reported_drops:
+            record = logging.LogRecord("logging", logging.WARNING, __file__, 0,
+                                       f"Log queue overflow: {dropped - self.reported_drops} record(s) dropped", None, None)
+            self.reported_drops = dropped
+            self.handle(record)
+
+    def _monitor(self):
+        q = self.queue
+        has_task_done = hasattr(q, 'task_done')
+        last_flush = time.monotonic()
+        running = True
+        while running:
+            batch = []
+            try:
+                batch.append(q.get(timeout=self.flush_interval))
+                while len(batch) < self.batch_size:
+                    batch.append(q.get_nowait())
+            except queue.Empty:
+                pass
+
+            urgent = False
+            for record in batch:
+                if record is self._sentinel:
+                    running = False
+                else:
+                    self.handle(record)
+                    urgent = urgent or record.levelno >= logging.ERROR
+                if has_task_done:
+                    q.task_done()
+
+            self._report_drops()
+            now = time.monotonic()
+            if urgent or not running or now - last_flush >= self.flush_interval:
+                self._flush_handlers()
+                last_flush = now
+
+
+def _gzip_rotator(source, dest):
+    with open(source, "rb") as src, gzip.open(dest, "wb") as dst:
+        shutil.copyfileobj(src, dst)
+    os.remove(source)
+
+
+class BatchedRotatingFileHandler(logging.handlers.RotatingFileHandler):
+    """
+    Size- and time-based rotation (whichever comes first), gzip-compressing
+    rotated files. emit() only writes; flushing is left to the listener.
+    """
+
+    def __init__(self, filename, max_bytes=10 * 1024 * 1024, backup_count=5, rotate_seconds=86400, compress=True):
+        os.makedirs(os.path.dirname(filename) or ".", exist_ok=True)
+        super().__init__(filename, maxBytes=max_bytes, backupCount=max(1, backup_count), encoding="utf-8", delay=True)
+        self.rotate_seconds = rotate_seconds
+        if compress:
+            self.namer = lambda name: name + ".gz"
+            self.rotator = _gzip_rotator
+        try:
+            self.bytes_written = os.path.getsize(self.baseFilename)
+            started = os.path.getmtime(self.baseFilename) if self.bytes_written else time.time()
+        except OSError:
+            self.bytes_written = 0
+            started = time.time()
+        self.rollover_at = started + rotate_seconds if rotate_seconds else None
+
+    def shouldRollover(self, record):
+        return False # decided in emit(), where the formatted line is already at hand
+
+    def doRollover(self):
+        super().doRollover()
+        self.bytes_written = 0
+        if self.rotate_seconds:
+            self.rollover_at = time.time() + self.rotate_seconds
+
+    def emit(self, record):
+        try:
+            msg = self.format(record) + self.terminator
+            if self.bytes_written and (
+                    (self.maxBytes and self.bytes_written + len(msg) > self.maxBytes)
+                    or (self.rollover_at and time.time() >= self.rollover_at)):
+                self.doRollover()
+            if self.stream is None:
+                self.stream = self._open()
+            self.stream.write(msg)
+            self.bytes_written += len(msg)
+        except Exception:
+            self.handleError(record)
+
+
+class BatchedStreamHandler(logging.StreamHandler):
+    """Console sink that, like the file sinks, leaves flushing to the listener."""
+
+    def emit(self, record):
+        try:
+            self.stream.write(self.format(record) + self.terminator)
+        except Exception:
+            self.handleError(record)
+
+
+class _LoggerFilter(logging.Filter):
+    """Passes only records of the given loggers (and their children), or all but them if exclude."""
+
+    def __init__(self, names, exclude=False):
+        super().__init__()
+        self.names = tuple(names)
+        self.exclude = exclude
+
+    def filter(self, record):
+        matched = any(record.name == n or record.name.startswith(n + ".") for n in self.names)
+        return matched != self.exclude
+
+
+class LogPipeline:
+    """The queue handler on the root logger plus the listener thread writing the sinks."""
+
+    def __init__(self, handler, listener):
+        self.handler = handler
+        self.listener = listener
+        self.lock = threading.Lock()
+        self.started = False
+
+    def stats(self):
+        return {"queued": self.handler.queue.qsize(), "dropped": self.handler.dropped}
+
+    def start(self):
+        with self.lock:
+            if self.started:
+                return
+            self.started = True
+        self.listener.start()
+
+    def stop(self):
+        """Writes out everything still queued and closes the sinks. Safe to call twice (app + atexit)."""
+        with self.lock:
+            if not self.started:
+                return
+            self.started = False
+        self.listener.stop()
+        for handler in self.listener.handlers:
+            try:
+                handler.close()
+            except Exception:
+                pass
+        logging.getLogger().removeHandler(self.handler)
+
+
+def _setting(settings, keys, default):
+    for key in keys:
+        if settings.get(key):
+            return settings[key]
+    return default
+
+
+def configure_logging(settings):
+    """
+    Routes every logger through one bounded queue to batched sinks: the main
+    log (and console), plus separate files for usb_events, file_activity and
+    alerts as named in settings. Returns the running LogPipeline.
+    """
+    level = getattr(logging, str(settings.get("log_level", "INFO")).upper(), logging.INFO)
+    rotation = {
+        "max_bytes": int(settings.get("log_max_bytes", 10 * 1024 * 1024)),
+        "backup_count": int(settings.get("log_backup_count", 5)),
+        "rotate_seconds": float(settings.get("log_rotate_seconds", 86400)),
+        "compress": bool(settings.get("log_compress", True)),
+    }
+    formatter = logging.Formatter(LOG_FORMAT)
+
+    main_path = _setting(settings, SINKS[0][1], SINKS[0][2])
+    routes = {} # sink file -> loggers written to it (two sinks may name one file)
+    private = [] # loggers whose records stay out of the main log and console
+    for name, keys, default, shared in SINKS:
+        path = _setting(settings, keys, default)
+        if path == main_path:
+            continue # written by the main sink
+        routes.setdefault(path, []).append(name)
+        if not shared:
+            private.append(name)
+
+    main = BatchedRotatingFileHandler(main_path, **rotation)
+    main.addFilter(_LoggerFilter(private, exclude=True))
+    handlers = [main]
+    for path, names in routes.items():
+        sink = BatchedRotatingFileHandler(path, **rotation)
+        sink.addFilter(_LoggerFilter(names))
+        handlers.append(sink)
+    if sys.stdout is not None: # no console under pythonw
+        console = BatchedStreamHandler(sys.stdout)
+        console.addFilter(_LoggerFilter(private, exclude=True))
+        handlers.append(console)
+    for handler in handlers:
+        handler.setFormatter(formatter)
+
+    log_queue = queue.Queue(maxsize=int(settings.get("log_queue_size", 10000)))
+    queue_handler = BoundedQueueHandler(log_queue, overflow=settings.get("log_overflow", "drop_oldest"))
+    listener = BatchingQueueListener(log_queue, *handlers, flush_interval=float(settings.get("log_flush_interval", 0.5)),
+                                     overflow_source=queue_handler)
+
+    root = logging.getLogger()
+    for old in list(root.handlers):
+        root.removeHandler(old)
+    root.addHandler(queue_handler)
+    root.setLevel(level)
+
+    pipeline = LogPipeline(queue_handler, listener)
+    pipeline.start()
+    atexit.register(pipeline.stop)
+    return pipeline
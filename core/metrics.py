@@ -0,0 +1,239 @@
+import time
+import bisect
+import threading
+
+# Upper bounds (ms) of the latency histogram buckets; one more bucket holds the overflow
+LATENCY_BOUNDS_MS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000, 10000, 30000, 60000)
+
+
+class _Ring:
+    """Fixed number of time buckets (one per minute or hour), reused round-robin."""
+
+    __slots__ = ("width", "counts", "stamps")
+
+    def __init__(self, slots, width):
+        self.width = width
+        self.counts = [0] * slots
+        self.stamps = [-1] * slots # bucket index each slot currently holds
+
+    def add(self, now, increment):
+        bucket = int(now // self.width)
+        slot = bucket % len(self.counts)
+        if self.stamps[slot] != bucket:
+            self.stamps[slot] = bucket
+            self.counts[slot] = 0
+        self.counts[slot] += increment
+
+
+class _Histogram:
+    """Counts per LATENCY_BOUNDS_MS bucket plus exact count / sum / max."""
+
+    __slots__ = ("counts", "count", "total", "max")
+
+    def __init__(self):
+        self.counts = [0] * (len(LATENCY_BOUNDS_MS) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def add(self, ms):
+        self.counts[bisect.bisect_left(LATENCY_BOUNDS_MS, ms)] += 1
+        self.count += 1
+        self.total += ms
+        if ms > self.max:
+            self.max = ms
+
+    def merge(self, other):
+        for i, n in enumerate(other.counts):
+            self.counts[i] += n
+        self.count += other.count
+        self.total += other.total
+        self.max = max(self.max, other.max)
+
+    def percentile(self, pct):
+        """Estimate, interpolated linearly inside the bucket holding the pct-th sample (never above max)."""
+        if not self.count:
+            return 0.0
+        rank = pct / 100.0 * self.count
+        seen = 0
+        for i, n in enumerate(self.counts):
+            if n and seen + n >= rank:
+                lower = LATENCY_BOUNDS_MS[i - 1] if i else 0.0
+                upper = LATENCY_BOUNDS_MS[i] if i < len(LATENCY_BOUNDS_MS) else self.max
+                return min(lower + (upper - lower) * (rank - seen) / n, self.max)
+            seen += n
+        return self.max
+
+    def summary(self):
+        return {
+            "count": self.count,
+            "avg_ms": self.total / self.count if self.count else 0.0,
+            "p50_ms": self.percentile(50),
+            "p90_ms": self.percentile(90),
+            "p99_ms": self.percentile(99),
+            "max_ms": self.max,
+            "buckets": {(f"<={b}" if i < len(LATENCY_BOUNDS_MS) else f">{LATENCY_BOUNDS_MS[-1]}"): n
+                        for i, (b, n) in enumerate(zip(LATENCY_BOUNDS_MS + (None,), self.counts)) if n},
+        }
+
+
+class _Shard:
+    """Counters written by exactly one thread; other threads only read them."""
+
+    def __init__(self, owner, minute_slots, hour_slots):
+        self.owner = owner
+        self.minute_slots = minute_slots
+        self.hour_slots = hour_slots
+        self.totals = {} # (key, dimension, value) -> count; dimension None = overall
+        self.minutes = {} # key -> _Ring
+        self.hours = {} # key -> _Ring
+        self.latencies = {} # key -> _Histogram
+
+    def add(self, key, increment, now, device, drive):
+        totals = self.totals
+        k = (key, None, None)
+        totals[k] = totals.get(k, 0) + increment
+        if device:
+            k = (key, "device", device)
+            totals[k] = totals.get(k, 0) + increment
+        if drive:
+            k = (key, "drive", drive)
+            totals[k] = totals.get(k, 0) + increment
+
+        ring = self.minutes.get(key)
+        if ring is None:
+            ring = self.minutes[key] = _Ring(self.minute_slots, 60)
+            self.hours[key] = _Ring(self.hour_slots, 3600)
+        ring.add(now, increment)
+        self.hours[key].add(now, increment)
+
+    def observe(self, key, ms):
+        histogram = self.latencies.get(key)
+        if histogram is None:
+            histogram = self.latencies[key] = _Histogram()
+        histogram.add(ms)
+
+
+class MetricsRegistry:
+    """
+    Counters with per-device / per-drive dimensions and per-minute / per-hour
+    rollups, plus latency histograms (time to decision, time to block, ...).
+
+    Each writing thread gets its own shard, so increments never contend and
+    are never lost; readers merge the shards. Writers take no lock (only a
+    thread's very first write registers its shard), and snapshot() only
+    copies shard dicts, so reading never blocks writers.
+    """
+
+    def __init__(self, minute_slots=60, hour_slots=24):
+        self.minute_slots = minute_slots
+        self.hour_slots = hour_slots
+        self.local = threading.local()
+        self.lock = threading.Lock() # guards the shard list, not the counters
+        self.shards = []
+        self.retired = _Shard(None, minute_slots, hour_slots) # folded shards of exited threads
+
+    def _shard(self):
+        shard = getattr(self.local, "shard", None)
+        if shard is None:
+            shard = _Shard(threading.current_thread(), self.minute_slots, self.hour_slots)
+            with self.lock:
+                self.shards.append(shard)
+            self.local.shard = shard
+        return shard
+
+    def increment(self, key, increment=1, device=None, drive=None, now=None):
+        self._shard().add(key, increment, time.time() if now is None else now, device, drive)
+
+    def observe(self, key, seconds):
+        """Adds one latency sample to the `key` histogram."""
+        self._shard().observe(key, seconds * 1000)
+
+    def _retire_dead_shards(self):
+        """Folds shards of threads that have exited into `retired` (their writers are gone)."""
+        with self.lock:
+            alive, dead = [], []
+            for shard in self.shards: # one is_alive() per shard: a thread may exit meanwhile
+                (alive if shard.owner.is_alive() else dead).append(shard)
+            if not dead:
+                return
+            self.shards = alive
+            retired = self.retired
+            for shard in dead:
+                for k, v in shard.totals.items():
+                    retired.totals[k] = retired.totals.get(k, 0) + v
+                for rings, target in ((shard.minutes, retired.minutes), (shard.hours, retired.hours)):
+                    for key, ring in rings.items():
+                        into = target.get(key)
+                        if into is None:
+                            into = target[key] = _Ring(len(ring.counts), ring.width)
+                        for bucket, count in zip(ring.stamps, ring.counts):
+                            if bucket >= 0 and count:
+                                into.add(bucket * ring.width, count)
+                for key, histogram in shard.latencies.items():
+                    into = retired.latencies.get(key)
+                    if into is None:
+                        into = retired.latencies[key] = _Histogram()
+                    into.merge(histogram)
+
+    def _merged(self):
+        self._retire_dead_shards()
+        with self.lock:
+            shards = [self.retired] + list(self.shards)
+        return shards
+
+    def totals(self, dimension=None):
+        """
+        Merged counters. dimension=None -> {key: n};
+        dimension="device"/"drive" -> {value: {key: n}}.
+        """
+        result = {}
+        for shard in self._merged():
+            for (key, dim, value), count in dict(shard.totals).items(): # dict() copy is atomic
+                if dim != dimension:
+                    continue
+                if dimension is None:
+                    result[key] = result.get(key, 0) + count
+                else:
+                    per = result.setdefault(value, {})
+                    per[key] = per.get(key, 0) + count
+        return result
+
+    def series(self, key, resolution="minute", now=None):
+        """[(bucket_start_epoch, count)] for the retained buckets of one key, oldest first."""
+        now = time.time() if now is None else now
+        width = 60 if resolution == "minute" else 3600
+        slots = self.minute_slots if resolution == "minute" else self.hour_slots
+        current = int(now // width)
+        merged = {}
+        for shard in self._merged():
+            ring = (shard.minutes if resolution == "minute" else shard.hours).get(key)
+            if ring is None:
+                continue
+            for bucket, count in zip(list(ring.stamps), list(ring.counts)):
+                if current - slots < bucket <= current:
+                    merged[bucket] = merged.get(bucket, 0) + count
+        return [(b * width, merged.get(b, 0)) for b in range(current - slots + 1, current + 1)]
+
+    def latencies(self):
+        """{key: {count, avg_ms, p50_ms, p90_ms, p99_ms, max_ms, buckets}} merged across threads."""
+        merged = {}
+        for shard in self._merged():
+            for key, histogram in dict(shard.latencies).items():
+                into = merged.get(key)
+                if into is None:
+                    into = merged[key] = _Histogram()
+                into.merge(histogram)
+        return {key: histogram.summary() for key, histogram in merged.items()}
+
+    def snapshot(self, now=None):
+        """Everything the dashboard / reports need, as plain dicts."""
+        totals = self.totals()
+        return {
+            "totals": totals,
+            "by_device": self.totals("device"),
+            "by_drive": self.totals("drive"),
+            "per_minute": {key: self.series(key, "minute", now) for key in totals},
+            "per_hour": {key: self.series(key, "hour", now) for key in totals},
+            "latencies": self.latencies(),
+        }
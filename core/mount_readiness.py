@@ -0,0 +1,51 @@
+import time
+
+from .backends.base import VOLUME_PENDING
+
+
+def wait_until_ready(probe, timeout, pending=None, initial=0.002, factor=2.0, max_interval=0.05, stop_event=None):
+    """
+    Calls probe() until it returns something other than `pending`, sleeping
+    initial, initial * factor, ... (capped at max_interval) in between: a
+    volume that is ready at once costs one probe, and a slow one is still
+    picked up within max_interval of becoming ready.
+
+    Returns (result, attempts); result is `pending` if the timeout ran out
+    (or stop_event was set) first.
+    """
+    deadline = time.perf_counter() + timeout
+    interval = initial
+    attempts = 0
+    while True:
+        result = probe()
+        attempts += 1
+        if result != pending:
+            return result, attempts
+        remaining = deadline - time.perf_counter()
+        if remaining <= 0:
+            return pending, attempts
+        delay = min(interval, remaining)
+        if stop_event is not None:
+            if stop_event.wait(delay):
+                return pending, attempts
+        else:
+            time.sleep(delay)
+        interval = min(interval * factor, max_interval)
+
+
+def wait_for_device(backend, volume, stop_event=None):
+    """
+    device_id behind a new volume as soon as the backend can resolve it, or
+    None if it isn't USB storage or didn't become resolvable within the
+    backend's mount_ready_timeout. Also returns the number of probes.
+    """
+    device_id, attempts = wait_until_ready(lambda: backend.probe_volume(volume), backend.mount_ready_timeout,
+                                           pending=VOLUME_PENDING, stop_event=stop_event)
+    return (None if device_id == VOLUME_PENDING else device_id), attempts
+
+
+def wait_for_volume_root(backend, volume, stop_event=None):
+    """Mount point of a volume once it is mounted, or None after the backend's automount_timeout."""
+    root, _ = wait_until_ready(lambda: backend.volume_root(volume), backend.automount_timeout,
+                               stop_event=stop_event)
+    return root
@@ -0,0 +1,139 @@
+import logging
+import threading
+
+
+class _PolicyIndex:
+    """
+    Hash indexes over one policy list (allowlist or blocklist).
+    """
+
+    def __init__(self, entries=()):
+        self.by_serial = {}
+        self.by_vid_pid = {}   # (vendor_id, product_id) -> {serial: entry}
+        self.by_device_id = {}
+        for entry in entries:
+            self.add(entry)
+
+    @staticmethod
+    def _vid_pid(entry):
+        return (entry.get("vendor_id"), entry.get("product_id"))
+
+    def add(self, entry):
+        if not isinstance(entry, dict):
+            return
+        serial = entry.get("serial_number")
+        self.discard(serial)
+        self.by_serial[serial] = entry
+        self.by_vid_pid.setdefault(self._vid_pid(entry), {})[serial] = entry
+
+        device_id = entry.get("device_id")
+        if device_id:
+            self.by_device_id[device_id.upper()] = entry
+
+    def discard(self, serial):
+        entry = self.by_serial.pop(serial, None)
+        if entry is None:
+            return
+
+        bucket = self.by_vid_pid.get(self._vid_pid(entry))
+        if bucket is not None:
+            bucket.pop(serial, None)
+            if not bucket:
+                del self.by_vid_pid[self._vid_pid(entry)]
+
+        device_id = (entry.get("device_id") or "").upper()
+        if self.by_device_id.get(device_id) is entry:
+            del self.by_device_id[device_id]
+
+    def __len__(self):
+        return len(self.by_serial)
+
+
+class PolicyEngine:
+    """
+    In-memory, indexed view of the allowlist/blocklist held by a PolicyStore.
+
+    Indexes are built once and then kept current from the store's change
+    notifications, so a toggle never triggers a full rebuild. Hand edits to the
+    JSON files are still picked up: refresh() asks the store to compare their
+    mtime/size, and invalidate() forces a full rebuild on the next lookup.
+    Every lookup is a dict probe, so list size does not affect insertion latency.
+    """
+
+    def __init__(self, store):
+        self.store = store
+        self.lock = threading.Lock()
+        self._allowed = _PolicyIndex()
+        self._blocked = _PolicyIndex()
+        self._dirty = True
+        store.subscribe(self._on_store_change)
+
+    def _on_store_change(self, list_name, serial, entry):
+        with self.lock:
+            if list_name is None or self._dirty:
+                self._dirty = True
+                return
+
+            index = self._allowed if list_name == "allow" else self._blocked
+            if entry is None:
+                index.discard(serial)
+            else:
+                index.add(entry)
+
+    def invalidate(self):
+        """Forces the next lookup to rebuild both indexes from the store."""
+        with self.lock:
+            self._dirty = True
+
+    def refresh(self):
+        """
+        Rebuilds the indexes if they were invalidated or the JSON files changed on disk.
+        Cheap when nothing changed: two os.stat() calls.
+        """
+        self.store.check_external_changes()
+        if not self._dirty:
+            return
+
+        with self.store.lock, self.lock:
+            self._allowed = _PolicyIndex(self.store.allowed.values())
+            self._blocked = _PolicyIndex(self.store.blocked.values())
+            self._dirty = False
+        logging.debug(f"Policy indexes rebuilt: {len(self._allowed)} allowed, {len(self._blocked)} blocked.")
+
+    def evaluate(self, fingerprint):
+        """
+        Returns (allowed, reason) for a device fingerprint.
+        Blocklist wins over allowlist; unknown devices are blocked by default.
+        """
+        self.refresh()
+        serial = fingerprint.get("serial_number")
+
+        with self.lock:
+            if serial in self._blocked.by_serial:
+                return False, "BLOCKED_BY_POLICY"
+            if serial in self._allowed.by_serial:
+                return True, "ALLOWED"
+        return False, "UNKNOWN_DEVICE"
+
+    def is_blocked(self, serial):
+        self.refresh()
+        return serial in self._blocked.by_serial
+
+    def is_allowlisted(self, serial):
+        self.refresh()
+        return serial in self._allowed.by_serial
+
+    def find_by_vid_pid(self, vendor_id, product_id):
+        """Returns (allowed_entries, blocked_entries) for a VID/PID pair."""
+        self.refresh()
+        key = (vendor_id, product_id)
+        with self.lock:
+            return (list(self._allowed.by_vid_pid.get(key, {}).values()),
+                    list(self._blocked.by_vid_pid.get(key, {}).values()))
+
+    def find_by_device_id(self, device_id):
+        """Returns (allowed_entry, blocked_entry) for a PnP device ID, or None for each."""
+        self.refresh()
+        key = (device_id or "").upper()
+        with self.lock:
+            return self._allowed.by_device_id.get(key), self._blocked.by_device_id.get(key)
@@ -0,0 +1,340 @@
+import os
+import json
+import time
+import logging
+import threading
+
+
+ALLOW = "allow"
+BLOCK = "block"
+
+
+class PolicyStore:
+    """
+    Transactional store for the allowlist/blocklist.
+
+    State lives in memory (serial -> entry per list). Every mutation appends one
+    line to a change journal, so a toggle costs O(1) I/O regardless of list size.
+    Every `compact_every` changes (and on close) the state is compacted into a
+    snapshot and exported to the legacy allowlist.json/blocklist.json files.
+    All full-file writes go through a temp file + os.replace, so readers never
+    see a half-written file.
+    """
+
+    def __init__(self, config_dir="config", compact_every=500):
+        self.config_dir = config_dir
+        self.allowlist_path = os.path.join(config_dir, "allowlist.json")
+        self.blocklist_path = os.path.join(config_dir, "blocklist.json")
+        self.snapshot_path = os.path.join(config_dir, "policy_snapshot.json")
+        self.journal_path = os.path.join(config_dir, "policy_journal.jsonl")
+        self.compact_every = compact_every
+
+        self.lock = threading.RLock()
+        self.allowed = {} # serial -> entry
+        self.blocked = {} # serial -> entry
+        self.version = 0
+        self._pending_ops = 0
+        self._journal = None
+        self._legacy_sigs = {}
+        self._listeners = []
+
+        self.load()
+
+    # --- Change notification ---
+
+    def subscribe(self, callback):
+        """
+        Registers callback(list_name, serial, entry) for every change.
+        entry is None when the serial was removed from that list.
+        list_name is None (serial/entry too) when the whole state was replaced.
+        """
+        self._listeners.append(callback)
+
+    def _notify(self, list_name, serial, entry):
+        for callback in list(self._listeners):
+            try:
+                callback(list_name, serial, entry)
+            except Exception as e:
+                logging.error(f"Policy listener failed: {e}")
+
+    # --- Persistence helpers ---
+
+    @staticmethod
+    def _stat_signature(path):
+        try:
+            st = os.stat(path)
+            return [st.st_mtime_ns, st.st_size]
+        except OSError:
+            return None
+
+    @staticmethod
+    def _atomic_write_json(path, data):
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(data, f, indent=4)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+
+    @staticmethod
+    def _read_json(path, default):
+        if not os.path.exists(path):
+            return default
+        try:
+            with open(path, "r") as f:
+                return json.load(f)
+        except Exception as e:
+            logging.error(f"Error reading {path}: {e}")
+            return default
+
+    @staticmethod
+    def _index(entries):
+        indexed = {}
+        for entry in entries or []:
+            if isinstance(entry, dict):
+                indexed[entry.get("serial_number")] = entry
+        return indexed
+
+    def _open_journal(self):
+        if self._journal is None:
+            os.makedirs(self.config_dir, exist_ok=True)
+            self._journal = open(self.journal_path, "a")
+        return self._journal
+
+    def _close_journal(self):
+        if self._journal is not None:
+            try:
+                self._journal.close()
+            except Exception: pass
+            self._journal = None
+
+    # --- Load / Import / Export ---
+
+    def load(self):
+        with self.lock:
+            snapshot = self._read_json(self.snapshot_path, None)
+            if snapshot is None:
+                # First run (or snapshot lost): the legacy JSON files are the last
+                # export, any journal left over is replayed on top of them
+                self.allowed = self._index(self._read_json(self.allowlist_path, {}).get("allowed_devices"))
+                self.blocked = self._index(self._read_json(self.blocklist_path, {}).get("blocked_devices"))
+                self.version = 0
+            else:
+                self.allowed = self._index(snapshot.get("allowed_devices"))
+                self.blocked = self._index(snapshot.get("blocked_devices"))
+                self.version = snapshot.get("version", 0)
+                self._legacy_sigs = snapshot.get("legacy_signatures", {})
+            replayed = self._replay_journal()
+
+            if snapshot is None:
+                self.version += 1
+                self.compact()
+            elif self._legacy_changed():
+                logging.warning("Policy JSON files were edited outside the framework. Merging the edits.")
+                self._merge_legacy(snapshot)
+            elif replayed:
+                logging.info(f"Replayed {replayed} policy journal entries.")
+
+    def _replay_journal(self):
+        if not os.path.exists(self.journal_path):
+            return 0
+
+        replayed = 0
+        good = 0 # end of the last whole entry
+        torn = False
+        with open(self.journal_path, "rb") as f:
+            for line in f:
+                try:
+                    if not line.endswith(b"\n"):
+                        raise ValueError("no newline")
+                    record = json.loads(line)
+                except ValueError:
+                    # Torn write from a crash: everything before it is still valid
+                    logging.warning("Ignoring truncated policy journal entry.")
+                    torn = True
+                    break
+                self._apply(record.get("op"), record.get("device", {}), notify=False)
+                replayed += 1
+                good += len(line)
+
+        if torn:
+            # Cut the partial line, or the next append would be glued onto it
+            # and lost (with everything after it) on the next load
+            with open(self.journal_path, "r+b") as f:
+                f.truncate(good)
+                f.flush()
+                os.fsync(f.fileno())
+
+        self._pending_ops = replayed
+        return replayed
+
+    def _legacy_changed(self):
+        return (self._stat_signature(self.allowlist_path) != self._legacy_sigs.get("allow")
+                or self._stat_signature(self.blocklist_path) != self._legacy_sigs.get("block"))
+
+    def check_external_changes(self):
+        """
+        Re-imports allowlist.json/blocklist.json if someone edited them by hand.
+        Cheap when nothing changed: two os.stat() calls.
+        """
+        if self._legacy_changed():
+            with self.lock:
+                if not self._legacy_changed():
+                    return
+                logging.info("Policy JSON files changed on disk. Merging the edits.")
+                self._merge_legacy(self._read_json(self.snapshot_path, None))
+            self._notify(None, None, None)
+
+    def _merge_legacy(self, base):
+        """
+        Applies hand edits of allowlist.json/blocklist.json on top of the
+        current state. `base` is the snapshot the files were exported with, so
+        only what was edited since then changes; changes still in the journal
+        are kept. Without a base the files replace the state.
+        """
+        allow = self._index(self._read_json(self.allowlist_path, {}).get("allowed_devices"))
+        block = self._index(self._read_json(self.blocklist_path, {}).get("blocked_devices"))
+        if base is None:
+            self.allowed, self.blocked = allow, block
+        else:
+            for current, other, edited, exported in (
+                    (self.allowed, self.blocked, allow, self._index(base.get("allowed_devices"))),
+                    (self.blocked, self.allowed, block, self._index(base.get("blocked_devices")))):
+                for serial in exported:
+                    if serial not in edited:
+                        current.pop(serial, None)
+                for serial, entry in edited.items():
+                    if exported.get(serial) != entry:
+                        current[serial] = entry
+                        other.pop(serial, None) # the edit wins over a journaled change
+        self.version += 1
+        self.compact()
+
+    def import_legacy(self, allowlist_path=None, blocklist_path=None):
+        """
+        Replaces the current state with the contents of allowlist/blocklist JSON
+        files in the existing {"allowed_devices": [...]} / {"blocked_devices": [...]} format.
+        """
+        allow_data = self._read_json(allowlist_path or self.allowlist_path, {})
+        block_data = self._read_json(blocklist_path or self.blocklist_path, {})
+
+        with self.lock:
+            self.allowed = self._index(allow_data.get("allowed_devices"))
+            self.blocked = self._index(block_data.get("blocked_devices"))
+            self.version += 1
+            self.compact()
+
+        self._notify(None, None, None)
+
+    def export_legacy(self, allowlist_path=None, blocklist_path=None):
+        """Writes the current state in the allowlist/blocklist JSON format."""
+        with self.lock:
+            allow_data = {"allowed_devices": list(self.allowed.values())}
+            block_data = {"blocked_devices": list(self.blocked.values())}
+
+        allowlist_path = allowlist_path or self.allowlist_path
+        blocklist_path = blocklist_path or self.blocklist_path
+        os.makedirs(os.path.dirname(allowlist_path) or ".", exist_ok=True)
+        os.makedirs(os.path.dirname(blocklist_path) or ".", exist_ok=True)
+        self._atomic_write_json(allowlist_path, allow_data)
+        self._atomic_write_json(blocklist_path, block_data)
+
+    def compact(self):
+        """
+        Folds the journal into a snapshot, refreshes the legacy JSON exports
+        and truncates the journal.
+        """
+        with self.lock:
+            try:
+                os.makedirs(self.config_dir, exist_ok=True)
+                self.export_legacy()
+                self._legacy_sigs = {
+                    "allow": self._stat_signature(self.allowlist_path),
+                    "block": self._stat_signature(self.blocklist_path)
+                }
+                self._atomic_write_json(self.snapshot_path, {
+                    "version": self.version,
+                    "legacy_signatures": self._legacy_sigs,
+                    "allowed_devices": list(self.allowed.values()),
+                    "blocked_devices": list(self.blocked.values())
+                })
+                # Snapshot is durable, journal entries up to here are redundant
+                self._close_journal()
+                open(self.journal_path, "w").close()
+                self._pending_ops = 0
+            except Exception as e:
+                logging.error(f"Policy compaction failed: {e}")
+
+    def close(self):
+        with self.lock:
+            if self._pending_ops:
+                self.compact()
+            self._close_journal()
+
+    # --- Mutations ---
+
+    def _apply(self, op, device, notify=True):
+        serial = device.get("serial_number")
+        changes = []
+
+        if op == ALLOW:
+            if serial not in self.allowed:
+                changes.append((ALLOW, device))
+            self.allowed[serial] = device
+            if self.blocked.pop(serial, None) is not None:
+                changes.append((BLOCK, None))
+        elif op == BLOCK:
+            if serial not in self.blocked:
+                changes.append((BLOCK, device))
+            self.blocked[serial] = device
+            if self.allowed.pop(serial, None) is not None:
+                changes.append((ALLOW, None))
+        elif op == "remove":
+            if self.allowed.pop(serial, None) is not None:
+                changes.append((ALLOW, None))
+            if self.blocked.pop(serial, None) is not None:
+                changes.append((BLOCK, None))
+
+        if notify:
+            for list_name, entry in changes:
+                self._notify(list_name, serial, entry)
+        return changes
+
+    def _commit(self, op, device):
+        with self.lock:
+            journal = self._open_journal()
+            journal.write(json.dumps({"op": op, "ts": time.time(), "device": device}) + "\n")
+            journal.flush()
+            os.fsync(journal.fileno())
+
+            changes = self._apply(op, device)
+            self.version += 1
+            self._pending_ops += 1
+
+            if self._pending_ops >= self.compact_every:
+                self.compact()
+            return changes
+
+    def allow(self, device):
+        """Adds the device to the allowlist and removes it from the blocklist."""
+        return self._commit(ALLOW, device)
+
+    def block(self, device):
+        """Adds the device to the blocklist and removes it from the allowlist."""
+        return self._commit(BLOCK, device)
+
+    def remove(self, serial):
+        """Forgets the device in both lists."""
+        return self._commit("remove", {"serial_number": serial})
+
+    # --- Readers ---
+
+    def allowed_devices(self):
+        """Returns copies of the allowlist entries (safe for the caller to mutate)."""
+        with self.lock:
+            return [dict(e) for e in self.allowed.values()]
+
+    def blocked_devices(self):
+        """Returns copies of the blocklist entries (safe for the caller to mutate)."""
+        with self.lock:
+            return [dict(e) for e in self.blocked.values()]
@@ -1,26 +1,57 @@
 import os
 import datetime
 
+from .metrics import MetricsRegistry
+
+STAT_KEYS = (
+    "total_connections",
+    "unauthorized_attempts",
+    "blocked_devices",
+    "files_copied",
+    "files_deleted",
+    "files_modified",
+    "suspicious_activities"
+)
+
 class Reporter:
     def __init__(self, report_path):
         self.report_path = report_path
-        self.stats = {
-            "total_connections": 0,
-            "unauthorized_attempts": 0,
-            "blocked_devices": 0,
-            "files_copied": 0,
-            "files_deleted": 0,
-            "files_modified": 0,
-            "suspicious_activities": 0
-        }
+        # Thread-sharded counters; update_stat is called from many threads at once
+        self.metrics = MetricsRegistry()
+        self.drive_devices = {} # drive_letter -> device serial, for per-device attribution
         self.session_start = datetime.datetime.now()
 
-    def update_stat(self, key, increment=1):
-        if key in self.stats:
-            self.stats[key] += increment
+    @property
+    def stats(self):
+        """Lifetime totals as the old flat dict (read-only view)."""
+        totals = self.metrics.totals()
+        return {key: totals.get(key, 0) for key in STAT_KEYS}
+
+    def attach_drive(self, drive_letter, device):
+        """Stats reported for drive_letter are also counted against device until detach_drive()."""
+        self.drive_devices[drive_letter] = device
+
+    def detach_drive(self, drive_letter):
+        self.drive_devices.pop(drive_letter, None)
+
+    def update_stat(self, key, increment=1, device=None, drive=None):
+        if key in STAT_KEYS:
+            if device is None and drive is not None:
+                device = self.drive_devices.get(drive)
+            self.metrics.increment(key, increment, device=device, drive=drive)
+
+    def record_latency(self, key, seconds):
+        """One sample for the `key` latency histogram (e.g. time_to_decision)."""
+        self.metrics.observe(key, seconds)
+
+    def get_metrics_snapshot(self):
+        """Totals, per-device/per-drive breakdowns and minute/hour series (never blocks writers)."""
+        return self.metrics.snapshot()
 
     def generate_report(self):
         now = datetime.datetime.now()
+        snapshot = self.get_metrics_snapshot()
+        stats = {key: snapshot["totals"].get(key, 0) for key in STAT_KEYS}
         report_content = [
             "========================================",
             "      FINAL USB SECURITY AUDIT REPORT   ",
@@ -29,17 +60,38 @@ class Reporter:
             f"Session Start:    {self.session_start}",
             "----------------------------------------",
             "SUMMARY STATISTICS:",
-            f"Total USB Connections:    {self.stats['total_connections']}",
-            f"Unauthorized Attempts:    {self.stats['unauthorized_attempts']}",
-            f"Blocked Devices:          {self.stats['blocked_devices']}",
+            f"Total USB Connections:    {stats['total_connections']}",
+            f"Unauthorized Attempts:    {stats['unauthorized_attempts']}",
+            f"Blocked Devices:          {stats['blocked_devices']}",
             "----------------------------------------",
             "FILE ACTIVITY SUMMARY:",
-            f"Files Copied:             {self.stats['files_copied']}",
-            f"Files Deleted:            {self.stats['files_deleted']}",
-            f"Files Modified:           {self.stats['files_modified']}",
+            f"Files Copied:             {stats['files_copied']}",
+            f"Files Deleted:            {stats['files_deleted']}",
+            f"Files Modified:           {stats['files_modified']}",
             "----------------------------------------",
             "SECURITY ALERTS:",
-            f"Suspicious Activities:    {self.stats['suspicious_activities']}",
+            f"Suspicious Activities:    {stats['suspicious_activities']}",
+            "----------------------------------------",
+            "LAST HOUR (per minute, non-zero only):"
+        ]
+        for key in STAT_KEYS:
+            busy = [(ts, n) for ts, n in snapshot["per_minute"].get(key, []) if n]
+            if busy:
+                minutes = ", ".join(f"{datetime.datetime.fromtimestamp(ts):%H:%M}={n}" for ts, n in busy)
+                report_content.append(f"  {key}: {minutes}")
+        for title, breakdown in (("PER DEVICE:", snapshot["by_device"]), ("PER DRIVE:", snapshot["by_drive"])):
+            if breakdown:
+                report_content.append("----------------------------------------")
+                report_content.append(title)
+                for name, counts in sorted(breakdown.items()):
+                    report_content.append(f"  {name}: " + ", ".join(f"{k}={v}" for k, v in sorted(counts.items())))
+        if snapshot["latencies"]:
+            report_content.append("----------------------------------------")
+            report_content.append("LATENCY (ms, from volume arrival):")
+            for key, h in sorted(snapshot["latencies"].items()):
+                report_content.append(f"  {key}: n={h['count']} avg={h['avg_ms']:.0f} p50={h['p50_ms']:.0f} "
+                                      f"p90={h['p90_ms']:.0f} p99={h['p99_ms']:.0f} max={h['max_ms']:.0f}")
+        report_content += [
             "========================================",
             "End of Report"
         ]
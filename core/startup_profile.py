@@ -0,0 +1,86 @@
+import time
+import logging
+import threading
+from contextlib import contextmanager
+
+
+class StartupProfile:
+    """
+    Wall-clock breakdown of application start-up: timed phases (imports,
+    config, logging, monitor construction, startup scan, ...) and instant
+    marks (window shown, scan resolved), all relative to the moment this
+    module was first imported, which entry points do first.
+
+    Phases may overlap (the scan runs in the background while the window
+    comes up) and may be recorded from any thread.
+    """
+
+    def __init__(self, origin=None):
+        self.origin = origin if origin is not None else time.perf_counter()
+        self.lock = threading.Lock()
+        self.phases = [] # (name, start, end) in seconds since origin
+        self.marks = {} # name -> seconds since origin
+        self.reported = False
+
+    def now(self):
+        return time.perf_counter() - self.origin
+
+    @contextmanager
+    def phase(self, name):
+        start = self.now()
+        try:
+            yield
+        finally:
+            self.add_phase(name, start, self.now())
+
+    def add_phase(self, name, start, end):
+        with self.lock:
+            self.phases.append((name, start, end))
+
+    def mark(self, name):
+        """Records an instant (first occurrence wins)."""
+        with self.lock:
+            self.marks.setdefault(name, self.now())
+
+    def as_dict(self):
+        with self.lock:
+            return {
+                "phases": [{"name": n, "start_ms": s * 1000, "ms": (e - s) * 1000} for n, s, e in self.phases],
+                "marks": {n: t * 1000 for n, t in self.marks.items()},
+            }
+
+    def report(self):
+        with self.lock:
+            phases = sorted(self.phases, key=lambda p: p[1])
+            marks = sorted(self.marks.items(), key=lambda m: m[1])
+        lines = ["Startup profile (ms since start):"]
+        for name, start, end in phases:
+            lines.append(f"  {name:<28} {start * 1000:8.1f} -> {end * 1000:8.1f}  ({(end - start) * 1000:7.1f} ms)")
+        for name, at in marks:
+            lines.append(f"  * {name:<26} {at * 1000:8.1f}")
+        return "\n".join(lines)
+
+    def log_report(self):
+        """Logs the report once (call when the last phase of interest finished)."""
+        with self.lock:
+            if self.reported:
+                return
+            self.reported = True
+        logging.info(self.report())
+
+
+_default_profile = StartupProfile()
+_default_lock = threading.Lock()
+
+
+def get_startup_profile():
+    """Process-wide profile, started when this module is first imported."""
+    with _default_lock:
+        return _default_profile
+
+
+def set_startup_profile(profile):
+    """Replaces the process-wide profile."""
+    global _default_profile
+    with _default_lock:
+        _default_profile = profile
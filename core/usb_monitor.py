@@ -1,135 +1,75 @@
-import wmi
 import logging
 import time
 import threading
-import json
-import os
-import pythoncom
-import win32com.client
 from .device_identifier import DeviceIdentifier
-from .usb_blocker import USBBlocker
 from .file_auditor import FileAuditor
+from .volume_inventory import VolumeInventory
 from .reporter import Reporter
+from .policy_store import PolicyStore
+from .policy_engine import PolicyEngine
+from .backends import create_backend
+from .device_inventory import DeviceInventory
 
 from .disk_io_monitor import DiskIOMonitor
+from .io_accounting import create_counter_source
+from .insertion_pipeline import InsertionPipeline, EVENT_INSERT, EVENT_ARRIVAL
+from .device_decisions import DecisionTable, ALLOWED, BLOCKED, BLOCK_FAILED
+from .event_store import record_event, get_event_store
+from .event_bus import publish
+from .mount_readiness import wait_for_device, wait_for_volume_root
+from .startup_profile import get_startup_profile
 
 class USBMonitor:
-    def __init__(self, config, reporter):
-        # self.wmi_client removed to prevent cross-thread usage errors
+    def __init__(self, config, reporter, backend=None):
         self.config = config
         self.reporter = reporter
+        # Platform backend (WMI on Windows, udev on Linux, or a simulator)
+        with get_startup_profile().phase("monitor: load backend"):
+            self.backend = backend or create_backend(config.get("settings", {}).get("backend"))
         self.file_auditor = FileAuditor(reporter)
-        self.disk_io_monitor = DiskIOMonitor(reporter)
+        # Offline-change detection for allowed sticks (snapshots per serial)
+        self.volume_inventory = VolumeInventory(hasher=self.file_auditor.hasher)
+        self.disk_io_monitor = DiskIOMonitor(
+            reporter, self.backend,
+            create_counter_source(config.get("settings", {}).get("io_counter_source")),
+            target_apps=config.get("settings", {}).get("transfer_apps")
+        )
+        # Attached devices kept current from PnP events; readers never query the backend
+        self.inventory = DeviceInventory(
+            self.backend,
+            reconcile_interval=config.get("settings", {}).get("inventory_reconcile_seconds", 300)
+        )
         self.monitoring = False
         self.stop_event = threading.Event()
         self.monitor_thread = None
+        self.scan_thread = None
         self.active_drives = {} # drive_letter -> device_info
+        self.policy_store = PolicyStore()
+        self.policy = PolicyEngine(self.policy_store)
+        # Watcher thread only enqueues; workers resolve/enforce in parallel
+        self.pipeline = InsertionPipeline(
+            self.handle_insertion, self.handle_removal,
+            workers=config.get("settings", {}).get("insertion_workers", 4),
+            worker_init=self.backend.thread_init,
+            worker_exit=self.backend.thread_exit,
+            on_arrival=self.handle_arrival
+        )
+        # Verdicts shared by the arrival (pre-mount) and volume paths
+        self.decisions = DecisionTable()
+        self.inventory.add_listener(self.on_inventory_change)
 
     def resolve_device_id_from_drive(self, drive_letter):
         """
         Resolves a drive letter (e.g., 'E:') to a PNP Device ID.
         """
-        try:
-            # Create local WMI client for this thread
-            c = wmi.WMI()
-            
-            # Clean drive letter
-            drive_letter = drive_letter.rstrip('\\')
-            
-            # 1. Get LogicalDisk
-            logical_disks = c.query(f"SELECT * FROM Win32_LogicalDisk WHERE DeviceID='{drive_letter}'")
-            if not logical_disks:
-                return None
-            
-            disk = logical_disks[0]
-            # Check if Removable (2)
-            if disk.DriveType != 2:
-                logging.debug(f"Drive {drive_letter} is not removable (Type: {disk.DriveType}). Ignoring.")
-                return None
-
-            # 2. Map via Partitions
-            # This chain is complex in WMI. 
-            # Win32_LogicalDisk -> Win32_LogicalDiskToPartition -> Win32_DiskPartition -> Win32_DiskDriveToDiskPartition -> Win32_DiskDrive
-            
-            query = f'ASSOCIATORS OF {{Win32_LogicalDisk.DeviceID="{drive_letter}"}} WHERE AssocClass = Win32_LogicalDiskToPartition'
-            partitions = c.query(query)
-            
-            if not partitions:
-                return None
-            
-            for partition in partitions:
-                query_drive = f'ASSOCIATORS OF {{Win32_DiskPartition.DeviceID="{partition.DeviceID}"}} WHERE AssocClass = Win32_DiskDriveToDiskPartition'
-                drives = c.query(query_drive)
-                
-                for drive in drives:
-                    # We found the physical disk
-                    if "USB" in drive.InterfaceType or "USB" in drive.PNPDeviceID:
-                        return drive.PNPDeviceID
-                        
-            return None
-
-        except Exception as e:
-            logging.error(f"Error resolving device for {drive_letter}: {e}")
-            return None
+        return self.backend.resolve_volume(drive_letter)
 
     def get_full_device_details(self, pnp_device_id):
-        try:
-            c = wmi.WMI()
-            # Query Win32_PnPEntity for details
-            # Escape backslashes for WQL
-            wql_id = pnp_device_id.replace("\\", "\\\\")
-            entities = c.query(f"SELECT * FROM Win32_PnPEntity WHERE DeviceID='{wql_id}'")
-            if entities:
-                ent = entities[0]
-                return {
-                    "DeviceID": ent.DeviceID,
-                    "Name": ent.Name,
-                    "Description": ent.Description,
-                    "Service": ent.Service,
-                     # Parse IDs
-                    **DeviceIdentifier.parse_device_id(ent.DeviceID)
-                }
-        except Exception as e:
-            logging.error(f"Error fetching details for {pnp_device_id}: {e}")
-        
-        return DeviceIdentifier.parse_device_id(pnp_device_id)
+        return self.backend.get_device_details(pnp_device_id)
 
     def is_allowed(self, fingerprint):
-        # Reload config from disk to ensure we have latest GUI updates
-        try:
-             import os, json
-             # Reload Allowlist
-             allow_path = os.path.join("config", "allowlist.json")
-             if os.path.exists(allow_path):
-                 with open(allow_path, "r") as f:
-                     self.config["allowlist"] = json.load(f)
-             
-             # Reload Blocklist
-             block_path = os.path.join("config", "blocklist.json")
-             if os.path.exists(block_path):
-                 with open(block_path, "r") as f:
-                     self.config["blocklist"] = json.load(f)
-        except Exception as e:
-            logging.error(f"Error reloading config in is_allowed: {e}")
-
-        # Check against allowlist
-        allowed_list = self.config.get("allowlist", {}).get("allowed_devices", [])
-        blocked_list = self.config.get("blocklist", {}).get("blocked_devices", [])
-        
-        serial = fingerprint.get("serial_number")
-
-        # 1. Explicitly Blocked?
-        for dev in blocked_list:
-            if dev.get("serial_number") == serial:
-                return False, "BLOCKED_BY_POLICY"
-
-        # 2. Explicitly Allowed?
-        for dev in allowed_list:
-            if dev.get("serial_number") == serial:
-                return True, "ALLOWED"
-
-        # 3. Default Policy (Block Unknown)
-        return False, "UNKNOWN_DEVICE"
+        # Policy engine re-reads the JSON files only when they change on disk
+        return self.policy.evaluate(fingerprint)
 
     def update_blocklist(self, fingerprint):
         """
@@ -149,38 +89,14 @@ class USBMonitor:
     def block_device_manual(self, fingerprint):
         try:
             clean_fp = self._clean_fingerprint(fingerprint)
-            
-            # 1. Add to Blocklist
-            blocklist_path = os.path.join("config", "blocklist.json")
-            data = {"blocked_devices": []}
-            if os.path.exists(blocklist_path):
-                with open(blocklist_path, "r") as f:
-                     try: data = json.load(f)
-                     except: pass
-            
-            exists = False
-            for dev in data["blocked_devices"]:
-                if dev.get("serial_number") == clean_fp.get("serial_number"):
-                    exists = True; break
-            
-            if not exists:
-                data["blocked_devices"].append(clean_fp)
-                with open(blocklist_path, "w") as f: json.dump(data, f, indent=4)
-                logging.info(f"Added to blocklist: {clean_fp.get('serial_number')}")
-
-            # 2. Remove from Allowlist
-            allowlist_path = os.path.join("config", "allowlist.json")
-            if os.path.exists(allowlist_path):
-                with open(allowlist_path, "r") as f:
-                    adata = json.load(f)
-                
-                new_allowed = [d for d in adata.get("allowed_devices", []) 
-                               if d.get("serial_number") != clean_fp.get("serial_number")]
-                
-                if len(new_allowed) != len(adata.get("allowed_devices", [])):
-                    adata["allowed_devices"] = new_allowed
-                    with open(allowlist_path, "w") as f: json.dump(adata, f, indent=4)
-                    logging.info(f"Removed from allowlist: {clean_fp.get('serial_number')}")
+            serial = clean_fp.get("serial_number")
+
+            # One journal append: adds to blocklist and drops from allowlist
+            for list_name, entry in self.policy_store.block(clean_fp):
+                if list_name == "block":
+                    logging.info(f"Added to blocklist: {serial}")
+                elif entry is None:
+                    logging.info(f"Removed from allowlist: {serial}")
 
         except Exception as e:
             logging.error(f"Failed to update config (Block): {e}")
@@ -188,90 +104,169 @@ class USBMonitor:
     def allow_device(self, fingerprint):
         try:
             clean_fp = self._clean_fingerprint(fingerprint)
-            
-            # 1. Add to Allowlist
-            allowlist_path = os.path.join("config", "allowlist.json")
-            data = {"allowed_devices": []}
-            if os.path.exists(allowlist_path):
-                with open(allowlist_path, "r") as f:
-                     try: data = json.load(f)
-                     except: pass
-            
-            exists = False
-            for dev in data["allowed_devices"]:
-                if dev.get("serial_number") == clean_fp.get("serial_number"):
-                    exists = True; break
-            
-            if not exists:
-                data["allowed_devices"].append(clean_fp)
-                with open(allowlist_path, "w") as f: json.dump(data, f, indent=4)
-                logging.info(f"Added to allowlist: {clean_fp.get('serial_number')}")
-
-            # 2. Remove from Blocklist
-            blocklist_path = os.path.join("config", "blocklist.json")
-            if os.path.exists(blocklist_path):
-                with open(blocklist_path, "r") as f:
-                    bdata = json.load(f)
-                
-                new_blocked = [d for d in bdata.get("blocked_devices", []) 
-                               if d.get("serial_number") != clean_fp.get("serial_number")]
-                               
-                if len(new_blocked) != len(bdata.get("blocked_devices", [])):
-                    bdata["blocked_devices"] = new_blocked
-                    with open(blocklist_path, "w") as f: json.dump(bdata, f, indent=4)
-                    logging.info(f"Removed from blocklist: {clean_fp.get('serial_number')}")
+            serial = clean_fp.get("serial_number")
+
+            # One journal append: adds to allowlist and drops from blocklist
+            for list_name, entry in self.policy_store.allow(clean_fp):
+                if list_name == "allow":
+                    logging.info(f"Added to allowlist: {serial}")
+                elif entry is None:
+                    logging.info(f"Removed from blocklist: {serial}")
 
         except Exception as e:
             logging.error(f"Failed to update config (Allow): {e}")
 
-    def handle_insertion(self, drive_letter):
-        logging.info(f"USB Storage Detected on {drive_letter}")
-        
-        # Give Windows a moment to stabilize the mount
-        time.sleep(1)
-        
-        pnp_id = self.resolve_device_id_from_drive(drive_letter)
-        
-        if not pnp_id:
-            logging.warning(f"Could not resolve PnP ID for {drive_letter}. Might not be a USB mass storage.")
-            return
+    def on_inventory_change(self, action, record):
+        """Inventory listener: new devices are enforced before any volume shows up."""
+        device_id = record.get("device_id")
+        if action == "add":
+            self.pipeline.submit(EVENT_ARRIVAL, device_id, timeout=5)
+        elif action == "remove":
+            self.decisions.forget(device_id)
 
-        device_info = self.get_full_device_details(pnp_id)
-        fingerprint = DeviceIdentifier.get_device_fingerprint(device_info)
-        
-        logging.getLogger("usb_events").info(f"INSERTION | Drive: {drive_letter} | Device: {fingerprint}")
-        self.reporter.update_stat("total_connections")
+    def handle_arrival(self, pnp_id):
+        """
+        Pre-mount enforcement: decides a USB storage device as soon as its
+        PnP entity appears (formatted or not, any number of LUNs), from the
+        parsed device ID alone, and disables it before Windows / udisks
+        exposes a volume.
+        """
+        record = self.inventory.get(pnp_id)
+        if record is None:
+            return # already gone
+        owner, _ = self.decisions.claim(pnp_id)
+        if not owner:
+            return # the volume path got there first
+        logging.info(f"USB Storage Device Arrived: {pnp_id}")
+        self._decide(pnp_id, DeviceIdentifier.get_device_fingerprint(record), None)
 
-        allowed, reason = self.is_allowed(fingerprint)
-        
-        if not allowed:
-            logging.getLogger("alerts").warning(f"UNAUTHORIZED DEVICE DETECTED: {fingerprint} | Reason: {reason}")
-            logging.info(f"Blocking device {drive_letter} ({pnp_id})...")
-            
-            success = USBBlocker.block_device(pnp_id)
+    def _decide(self, pnp_id, fingerprint, drive_letter):
+        """
+        Counts the connection, evaluates policy and disables unauthorized
+        devices. The caller holds the device's claim; this settles it.
+        Returns True if the device is allowed.
+        """
+        metrics = self.pipeline.metrics
+        serial = fingerprint.serial_number
+        where = f"Drive: {drive_letter}" if drive_letter else "Before mount"
+        verdict = BLOCK_FAILED
+        try:
+            message = f"INSERTION | {where} | Device: {fingerprint}"
+            logging.getLogger("usb_events").info(message)
+            publish("usb", message, event_type="INSERTION", drive=drive_letter, serial=serial)
+            self.reporter.update_stat("total_connections", device=serial, drive=drive_letter)
+            record_event("INSERTION", serial=serial or "", drive=drive_letter or "", detail=pnp_id)
+
+            with metrics.stage("policy"):
+                allowed, reason = self.is_allowed(fingerprint)
+            self.reporter.record_latency("time_to_decision", self.pipeline.event_age())
+
+            if allowed:
+                verdict = ALLOWED
+                logging.info(f"Device Allowed: {fingerprint}")
+                publish("usb", f"Device Allowed: {fingerprint}", event_type="ALLOWED", drive=drive_letter, serial=serial)
+                return True
+
+            message = f"UNAUTHORIZED DEVICE DETECTED: {fingerprint} | Reason: {reason}"
+            logging.getLogger("alerts").warning(message)
+            publish("usb", message, "WARNING", event_type="UNAUTHORIZED", drive=drive_letter, serial=serial)
+            logging.info(f"Blocking device {drive_letter or '(no volume yet)'} ({pnp_id})...")
+
+            with metrics.stage("enforce"):
+                success = self.disable_device(pnp_id)
             if success:
-                self.reporter.update_stat("blocked_devices")
-                self.reporter.update_stat("unauthorized_attempts")
-                logging.getLogger("usb_events").info(f"BLOCK | Device {pnp_id} was blocked.")
-                
+                verdict = BLOCKED
+                self.reporter.record_latency("time_to_block", self.pipeline.event_age())
+                self.reporter.update_stat("blocked_devices", device=serial, drive=drive_letter)
+                self.reporter.update_stat("unauthorized_attempts", device=serial, drive=drive_letter)
+                message = f"BLOCK | Device {pnp_id} was blocked."
+                logging.getLogger("usb_events").info(message)
+                publish("usb", message, event_type="BLOCK", drive=drive_letter, serial=serial)
+                record_event("BLOCK", serial=serial or "", drive=drive_letter or "", detail=reason)
+
                 # Auto-add to blocklist for future reference
                 self.update_blocklist(fingerprint)
             else:
                  logging.error(f"Failed to block device {pnp_id}")
+                 publish("usb", f"Failed to block device {pnp_id}", "ERROR", event_type="BLOCK_FAILED", drive=drive_letter,
+                         serial=serial)
+            return False
+        finally:
+            self.decisions.settle(pnp_id, verdict, fingerprint)
+
+    def _still_enabled(self, pnp_id):
+        record = self.inventory.get(pnp_id)
+        return record is None or record["status_raw"] != "Error"
+
+    def handle_insertion(self, drive_letter):
+        """
+        Volume mount. Devices are normally decided on arrival already, so this
+        only attaches auditing; it falls back to deciding here when the
+        arrival was missed (no device events) or the block failed.
+        """
+        logging.info(f"USB Storage Detected on {drive_letter}")
+        metrics = self.pipeline.metrics
+        
+        # Probe the volume -> device mapping with backoff instead of sleeping
+        # through the mount: enforcement starts the moment it resolves
+        with metrics.stage("resolve"):
+            pnp_id, probes = wait_for_device(self.backend, drive_letter, self.stop_event)
+        
+        if not pnp_id:
+            logging.warning(f"Could not resolve PnP ID for {drive_letter} after {probes} probe(s). "
+                            f"Might not be a USB mass storage.")
+            return
+
+        owner, decision = self.decisions.claim(pnp_id)
+        if not owner and decision[0] == BLOCKED and self._still_enabled(pnp_id):
+            # A volume of a device we disabled: it was re-plugged between two
+            # PnP polls and came back enabled, so decide it again
+            self.decisions.forget(pnp_id)
+            owner, decision = self.decisions.claim(pnp_id)
+        if owner:
+            with metrics.stage("details"):
+                device_info = self.get_full_device_details(pnp_id)
+            fingerprint = DeviceIdentifier.get_device_fingerprint(device_info)
+            if not self._decide(pnp_id, fingerprint, drive_letter):
+                return
         else:
-            logging.info(f"Device Allowed: {fingerprint}")
-            self.active_drives[drive_letter] = fingerprint
-            self.file_auditor.start_auditing(drive_letter)
+            verdict, fingerprint = decision
+            if verdict != ALLOWED:
+                logging.info(f"Ignoring volume {drive_letter} of blocked device {pnp_id}")
+                return
+
+        self.active_drives[drive_letter] = fingerprint
+        self.reporter.attach_drive(drive_letter, fingerprint.serial_number)
+        with metrics.stage("audit_start"):
+            # Auditing needs the filesystem mounted, enforcement didn't
+            root = wait_for_volume_root(self.backend, drive_letter, self.stop_event)
+            if root:
+                serial = fingerprint.serial_number
+                known = serial and serial != "UNKNOWN"
+                # Hash cache key: the stick and its filesystem, not where it is mounted
+                volume_key = None
+                if known:
+                    volume_id = self.backend.volume_identity(drive_letter)
+                    volume_key = f"{serial}/{volume_id}" if volume_id else serial
+                self.file_auditor.start_auditing(drive_letter, root, volume_key)
+                if known:
+                    self.volume_inventory.scan_async(serial, root, drive_letter, volume_key)
             self.disk_io_monitor.start_monitoring(drive_letter)
 
     def handle_removal(self, drive_letter):
         logging.info(f"USB Removed: {drive_letter}")
         logging.getLogger("usb_events").info(f"REMOVAL | Drive: {drive_letter}")
+        publish("usb", f"REMOVAL | Drive: {drive_letter}", event_type="REMOVAL", drive=drive_letter,
+                serial=self.reporter.drive_devices.get(drive_letter))
+        record_event("REMOVAL", serial=self.reporter.drive_devices.get(drive_letter) or "", drive=drive_letter)
         
         try:
             if drive_letter in self.active_drives:
                 del self.active_drives[drive_letter]
         except: pass
+
+        self.backend.invalidate_volume(drive_letter)
+        self.volume_inventory.cancel(drive_letter)
             
         try:
             self.file_auditor.stop_auditing(drive_letter)
@@ -280,105 +275,75 @@ class USBMonitor:
         finally:
             # Ensure IO monitor is stopped regardless of file auditor issues
             self.disk_io_monitor.stop_monitoring(drive_letter)
+            # After the audit flush: its records still need the drive's serial
+            self.reporter.detach_drive(drive_letter)
 
 
     def monitor_loop(self):
-        logging.info("Starting USB Monitor Loop (Direct COM)...")
-        
-        import pythoncom
-        import win32com.client
-        
-        # Initialize COM for this thread
-        pythoncom.CoInitialize()
-        
-        try:
-            # Connect to WMI directly via win32com
-            objWMIService = win32com.client.Dispatch("WbemScripting.SWbemLocator")
-            objSWbemServices = objWMIService.ConnectServer(".", r"root\cimv2")
-            
-            # Create the event watcher
-            # usage: ExecNotificationQuery(Query, [Flags=0], [Context=None])
-            watcher = objSWbemServices.ExecNotificationQuery("SELECT * FROM Win32_VolumeChangeEvent")
-            
-            while self.monitoring:
-                try:
-                    # NextEvent(Timeout_ms)
-                    event = watcher.NextEvent(1000)
-                    
-                    # EventType: 2 (Insert), 3 (Remove)
-                    # DriveName: "E:"
-                    e_type = event.EventType
-                    drive_name = event.DriveName
-                    
-                    if e_type == 2:
-                        self.handle_insertion(drive_name)
-                    elif e_type == 3:
-                        self.handle_removal(drive_name)
-                        
-                except Exception as e:
-                    # Check for timeout error (0x_something ending in 40960 or similar, but just catching any)
-                    # -2147209215 is "Timed out"
-                    if "Timed out" in str(e) or "-2147209215" in str(e):
-                        continue
-                        
-                    if self.monitoring:
-                        logging.error(f"Error in monitor loop: {e}")
-                        time.sleep(1)
-                        
-        except Exception as e:
-             logging.error(f"Fatal COM Error in thread: {e}")
-        finally:
-            pythoncom.CoUninitialize()
+        # Only enqueue here: resolution and enforcement run on the worker pool
+        self.backend.run_event_loop(self.pipeline.submit, lambda: self.monitoring)
+
+    def get_pipeline_stats(self):
+        """Queue depth and per-stage latency of the insertion pipeline."""
+        return self.pipeline.stats()
 
     def get_all_attached_devices(self):
         """
-        Returns a list of all physically attached USB storage devices,
-        regardless of whether they are enabled (mounted) or disabled (blocked).
+        Returns all physically attached USB storage devices, regardless of
+        whether they are enabled (mounted) or disabled (blocked), as an
+        immutable snapshot of the device inventory (no backend query).
         """
-        attached = []
-        try:
-            # Create local WMI client (thread-safe)
-            import wmi
-            c = wmi.WMI()
-            
-            # Query all USB Storage devices (Service='USBSTOR')
-            # This catches devices even if the driver is disabled (Blocked)
-            entities = c.query("SELECT * FROM Win32_PnPEntity WHERE Service='USBSTOR'")
-            
-            for ent in entities:
-                 # Parse details
-                 try:
-                     details = DeviceIdentifier.parse_device_id(ent.DeviceID)
-                     details["status_raw"] = ent.Status # OK, Error, Degraded
-                     details["device_id"] = ent.DeviceID
-                     details["description"] = ent.Description
-                     details["name"] = ent.Name
-                     attached.append(details)
-                 except: continue
-                 
-        except Exception as e:
-            logging.error(f"Error scanning attached devices: {e}")
-            
-        return attached
+        return self.inventory.snapshot()
 
-    def scan_existing_drives(self):
+    def disable_device(self, pnp_id):
+        """Blocks the device and records its new status in the inventory."""
+        success = self.backend.disable_device(pnp_id)
+        if success:
+            self.inventory.set_status(pnp_id, "Error")
+        return success
+
+    def enable_device(self, pnp_id):
+        success = self.backend.enable_device(pnp_id)
+        if success:
+            self.inventory.set_status(pnp_id, "OK")
+            # Unblocked by hand: its volume is evaluated (and audited) afresh
+            self.decisions.forget(pnp_id)
+        return success
+
+    def scan_existing_drives(self, timeout=120):
         """
         Scans for USB devices that are already connected at startup.
+        Runs on its own thread (start() does not wait for it). Each volume is
+        announced on the event bus as soon as it is found and then resolves
+        through the insertion pipeline like a live insertion, so the
+        dashboard fills in device by device.
         """
+        profile = get_startup_profile()
         logging.info("Scanning for existing USB devices...")
-        import pythoncom
-        pythoncom.CoInitialize()
+        self.backend.thread_init()
         try:
-            c = wmi.WMI()
-            # Find all removable drives (Type 2)
-            drives = c.query("SELECT * FROM Win32_LogicalDisk WHERE DriveType=2")
-            for drive in drives:
-                logging.info(f"Found existing drive: {drive.DeviceID}")
-                self.handle_insertion(drive.DeviceID)
+            with profile.phase("scan: enumerate volumes"):
+                volumes = self.backend.enumerate_volumes()
+            started = profile.now()
+            for volume in volumes:
+                logging.info(f"Found existing drive: {volume}")
+                publish("usb", f"SCAN | Found existing drive: {volume}", event_type="SCAN", drive=volume)
+                self.pipeline.submit(EVENT_INSERT, volume)
+
+            # Until the workers have resolved them (or stop() / timeout)
+            deadline = time.monotonic() + timeout
+            while self.monitoring and time.monotonic() < deadline:
+                stats = self.pipeline.stats()
+                if not stats['queue_depth'] and not stats['in_flight']:
+                    break
+                self.stop_event.wait(0.02)
+            profile.add_phase(f"scan: resolve {len(volumes)} drive(s)", started, profile.now())
+            profile.mark("startup scan complete")
         except Exception as e:
             logging.error(f"Error during initial scan: {e}")
         finally:
-            pythoncom.CoUninitialize()
+            self.backend.thread_exit()
+            profile.log_report()
 
     def start(self):
         if self.monitoring:
@@ -387,12 +352,13 @@ class USBMonitor:
 
         self.monitoring = True
         self.stop_event.clear()
+        self.pipeline.start()
+        self.inventory.start()
+        threading.Thread(target=self.backend.warm_up, daemon=True).start()
         
-        # Initial Scan
-        try:
-             self.scan_existing_drives()
-        except Exception as e:
-             logging.error(f"Scan failed: {e}")
+        # Initial Scan, in the background: start() (and the window) doesn't wait for it
+        self.scan_thread = threading.Thread(target=self.scan_existing_drives, name="startup-scan", daemon=True)
+        self.scan_thread.start()
         
         # Start Threads
         self.monitor_thread = threading.Thread(target=self.monitor_loop, daemon=True)
@@ -411,7 +377,18 @@ class USBMonitor:
             # We can't interrupt wmi easily, but wait briefly
             self.monitor_thread.join(timeout=2)
             self.monitor_thread = None
+
+        if self.scan_thread:
+            self.scan_thread.join(timeout=2)
+            self.scan_thread = None
+
+        # Stop insertion workers (drops anything still queued)
+        self.pipeline.stop()
+        self.inventory.stop()
             
+        # Abandon running inventory scans (stored snapshots stay as they were)
+        self.volume_inventory.stop()
+
         # Stop File Auditors
         if self.file_auditor:
             self.file_auditor.stop_all()
@@ -419,3 +396,9 @@ class USBMonitor:
         # Stop Disk IO Monitor
         if self.disk_io_monitor:
             self.disk_io_monitor.stop()
+
+        # Fold the policy journal into the JSON files
+        self.policy_store.close()
+
+        # Seal the active event segment and write its index
+        get_event_store().close()
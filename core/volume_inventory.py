@@ -0,0 +1,337 @@
+import os
+import re
+import zlib
+import stat
+import time
+import struct
+import logging
+import threading
+from array import array
+from concurrent.futures import ThreadPoolExecutor
+
+from .event_store import record_event
+
+MAGIC = b"USBINV1\n"
+BLOCK_RECORDS = 4096
+NO_HASH = b"\x00" * 32
+
+
+def sort_key(rel_path):
+    """
+    Order shared by the walker and the snapshot files: plain string order
+    with the separator sorting below every other character, which is exactly
+    a depth-first walk with each directory's entries sorted by name.
+    """
+    return rel_path.replace("/", "\x00")
+
+
+class InventoryWriter:
+    """
+    Streams (path, size, mtime_ns, sha256) records into a block file. Each
+    block holds up to BLOCK_RECORDS entries stored column by column (paths,
+    sizes, mtimes, hashes) and zlib-compressed.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.tmp_path = path + ".tmp"
+        self.f = open(self.tmp_path, "wb")
+        self.f.write(MAGIC)
+        self.count = 0
+        self._reset()
+
+    def _reset(self):
+        self.paths = []
+        self.sizes = array("q")
+        self.mtimes = array("q")
+        self.hashes = []
+
+    def add(self, rel_path, size, mtime_ns, sha256=None):
+        self.paths.append(rel_path)
+        self.sizes.append(size)
+        self.mtimes.append(mtime_ns)
+        self.hashes.append(bytes.fromhex(sha256) if sha256 else NO_HASH)
+        if len(self.paths) >= BLOCK_RECORDS:
+            self._flush_block()
+
+    def _flush_block(self):
+        if not self.paths:
+            return
+        names = "\x00".join(self.paths).encode("utf-8", "surrogateescape")
+        payload = b"".join([struct.pack("<I", len(names)), names, self.sizes.tobytes(),
+                            self.mtimes.tobytes(), b"".join(self.hashes)])
+        data = zlib.compress(payload, 1)
+        self.f.write(struct.pack("<II", len(self.paths), len(data)))
+        self.f.write(data)
+        self.count += len(self.paths)
+        self._reset()
+
+    def commit(self):
+        """Finishes the file and atomically replaces the previous snapshot."""
+        self._flush_block()
+        self.f.flush()
+        os.fsync(self.f.fileno())
+        self.f.close()
+        os.replace(self.tmp_path, self.path)
+
+    def abort(self):
+        self.f.close()
+        try:
+            os.remove(self.tmp_path)
+        except OSError:
+            pass
+
+
+def read_inventory(path):
+    """Yields (path, size, mtime_ns, sha256_or_None) from a snapshot, one block in memory at a time."""
+    with open(path, "rb") as f:
+        if f.read(len(MAGIC)) != MAGIC:
+            raise ValueError(f"Not an inventory snapshot: {path}")
+        while True:
+            header = f.read(8)
+            if len(header) < 8:
+                return
+            count, length = struct.unpack("<II", header)
+            payload = zlib.decompress(f.read(length))
+            names_len = struct.unpack_from("<I", payload, 0)[0]
+            offset = 4
+            paths = payload[offset:offset + names_len].decode("utf-8", "surrogateescape").split("\x00")
+            offset += names_len
+            sizes = array("q")
+            sizes.frombytes(payload[offset:offset + 8 * count])
+            offset += 8 * count
+            mtimes = array("q")
+            mtimes.frombytes(payload[offset:offset + 8 * count])
+            offset += 8 * count
+            for i in range(count):
+                digest = payload[offset + 32 * i:offset + 32 * (i + 1)]
+                yield paths[i], sizes[i], mtimes[i], (None if digest == NO_HASH else digest.hex())
+
+
+def _list_dir(root, rel):
+    """One directory, sorted: [(name, is_dir, size, mtime_ns)]."""
+    entries = []
+    try:
+        with os.scandir(os.path.join(root, rel) if rel else root) as it:
+            for entry in it:
+                try:
+                    st = entry.stat(follow_symlinks=False)
+                except OSError:
+                    continue
+                if stat.S_ISDIR(st.st_mode):
+                    entries.append((entry.name, True, 0, 0))
+                elif stat.S_ISREG(st.st_mode):
+                    entries.append((entry.name, False, st.st_size, st.st_mtime_ns))
+    except OSError:
+        pass # unreadable directory (System Volume Information, permissions)
+    entries.sort(key=lambda e: e[0])
+    return entries
+
+
+def walk_volume(root, pool, max_prefetch=256, cancelled=None):
+    """
+    Yields (rel_path, size, mtime_ns) for every regular file under root in
+    sort_key order. Directory listings run on `pool` ahead of the consumer,
+    at most max_prefetch at a time, so memory is bounded by the walk
+    frontier rather than the tree size.
+    """
+    futures = {"": pool.submit(_list_dir, root, "")}
+    stack = [("", iter(futures.pop("").result()))] # (dir rel path, iterator over its sorted entries)
+    while stack:
+        if cancelled is not None and cancelled.is_set():
+            return
+        rel_dir, entries = stack[-1]
+        entry = next(entries, None)
+        if entry is None:
+            stack.pop()
+            continue
+        name, is_dir, size, mtime_ns = entry
+        rel = f"{rel_dir}/{name}" if rel_dir else name
+        if not is_dir:
+            yield rel, size, mtime_ns
+            continue
+
+        # Prefetch this directory's later sibling directories while we descend
+        listing = futures.pop(rel, None)
+        if listing is None:
+            listing = pool.submit(_list_dir, root, rel)
+        children = listing.result()
+        for child, child_is_dir, _, _ in children:
+            if child_is_dir and len(futures) < max_prefetch:
+                child_rel = f"{rel}/{child}"
+                futures[child_rel] = pool.submit(_list_dir, root, child_rel)
+        stack.append((rel, iter(children)))
+
+
+def diff_streams(old, new):
+    """
+    Merges two sort_key-ordered record streams. Yields ("added", new_rec),
+    ("removed", old_rec), ("changed", old_rec, new_rec) and ("same", old_rec, new_rec).
+    """
+    old_rec = next(old, None)
+    new_rec = next(new, None)
+    while old_rec is not None and new_rec is not None:
+        if old_rec[0] == new_rec[0]: # the common case on reconnect
+            changed = old_rec[1] != new_rec[1] or old_rec[2] != new_rec[2]
+            yield ("changed" if changed else "same", old_rec, new_rec)
+            old_rec = next(old, None)
+            new_rec = next(new, None)
+        elif sort_key(old_rec[0]) < sort_key(new_rec[0]):
+            yield ("removed", old_rec)
+            old_rec = next(old, None)
+        else:
+            yield ("added", new_rec)
+            new_rec = next(new, None)
+    while old_rec is not None:
+        yield ("removed", old_rec)
+        old_rec = next(old, None)
+    while new_rec is not None:
+        yield ("added", new_rec)
+        new_rec = next(new, None)
+
+
+class VolumeInventory:
+    """
+    Keeps one inventory snapshot per device serial under config_dir. When an
+    allowed stick is inserted, the volume is walked in parallel and diffed
+    against the stored snapshot while the new snapshot is written, so
+    changes made on other machines are reported. Hashes are carried over for
+    unchanged files. Files without one are looked up in the hashing
+    service's cache and, on a miss, handed to the service (computed lazily,
+    in the background); its results reach the snapshot through the cache on
+    the next scan.
+    """
+
+    HASH_BATCH = 512 # records held back to resolve their hashes in one cache query
+
+    def __init__(self, config_dir=os.path.join("config", "inventory"), workers=8, hasher=None, max_logged_changes=1000):
+        self.config_dir = config_dir
+        self.workers = workers
+        self.hasher = hasher
+        self.max_logged_changes = max_logged_changes
+        self.lock = threading.Lock()
+        self.scans = {} # drive_letter -> (thread, cancel Event)
+
+    def snapshot_path(self, serial):
+        safe = re.sub(r"[^A-Za-z0-9_.-]", "_", serial)
+        return os.path.join(self.config_dir, f"{safe}.inv")
+
+    def scan(self, serial, root, drive_letter=None, cancelled=None, volume_key=None):
+        """
+        Walks root, diffs against the stored snapshot of `serial`, writes the
+        new snapshot and returns {'files', 'added', 'removed', 'changed', 'seconds', 'baseline'}.
+        Returns None if cancelled (the stored snapshot is left untouched).
+        volume_key is the hash cache key of the volume (see FileAuditor.start_auditing).
+        """
+        os.makedirs(self.config_dir, exist_ok=True)
+        path = self.snapshot_path(serial)
+        baseline = not os.path.exists(path)
+        label = drive_letter or root
+        file_log = logging.getLogger("file_activity")
+        counts = {'files': 0, 'added': 0, 'removed': 0, 'changed': 0}
+        logged = 0
+        start = time.perf_counter()
+
+        writer = InventoryWriter(path)
+        batch = [] # (rel, size, mtime_ns, sha256 or None, hash label)
+        cache = getattr(self.hasher, "cache", None) if volume_key else None
+
+        def write_batch():
+            # The cache is keyed by volume-relative paths; full paths only to hash misses
+            known = {}
+            missing = [(rel, size, mtime_ns) for rel, size, mtime_ns, digest, _ in batch if digest is None]
+            if cache is not None and missing:
+                known = cache.lookup_many(volume_key, missing)
+            for rel, size, mtime_ns, digest, hash_label in batch:
+                if digest is None:
+                    digest = known.get(rel)
+                    if digest is None and self.hasher:
+                        self.hasher.submit(os.path.join(root, *rel.split("/")), hash_label)
+                writer.add(rel, size, mtime_ns, digest)
+            batch.clear()
+
+        try:
+            with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="inventory") as pool:
+                new = walk_volume(root, pool, cancelled=cancelled)
+                old = iter(()) if baseline else read_inventory(path)
+                for change in diff_streams(old, (rec + (None,) for rec in new)):
+                    if cancelled is not None and cancelled.is_set():
+                        break # the walk stopped early; the rest would look "removed"
+                    kind = change[0]
+                    if kind == "removed":
+                        counts['removed'] += 1
+                        rel = change[1][0]
+                    else:
+                        rec = change[-1]
+                        rel, size, mtime_ns = rec[0], rec[1], rec[2]
+                        # Unchanged files keep their known hash; others are resolved in write_batch
+                        digest = change[1][3] if kind == "same" else None
+                        hash_label = f"offline_{kind}" if kind != "same" and not baseline else "inventory"
+                        batch.append((rel, size, mtime_ns, digest, hash_label))
+                        if len(batch) >= self.HASH_BATCH:
+                            write_batch()
+                        counts['files'] += 1
+                        if kind != "same":
+                            counts[kind] += 1
+                    if kind != "same" and not baseline:
+                        record_event(f"OFFLINE_{kind.upper()}", serial=serial, drive=drive_letter or "",
+                                     path=os.path.join(root, *rel.split("/")), size=0 if kind == "removed" else size)
+                    if kind != "same" and not baseline and logged < self.max_logged_changes:
+                        logged += 1
+                        file_log.info(f"OFFLINE CHANGE | {kind.upper()} | {label} | Path: {rel}")
+                if cancelled is not None and cancelled.is_set():
+                    writer.abort()
+                    return None
+            write_batch()
+            writer.commit()
+        except Exception:
+            writer.abort()
+            raise
+
+        counts['seconds'] = time.perf_counter() - start
+        counts['baseline'] = baseline
+        if baseline:
+            file_log.info(f"INVENTORY BASELINE | {label} | Serial: {serial} | Files: {counts['files']} | Took: {counts['seconds']:.2f}s")
+        else:
+            file_log.info(f"INVENTORY DIFF | {label} | Serial: {serial} | Files: {counts['files']} | "
+                          f"Added: {counts['added']} | Removed: {counts['removed']} | Changed: {counts['changed']} | "
+                          f"Took: {counts['seconds']:.2f}s")
+        return counts
+
+    def scan_async(self, serial, root, drive_letter, volume_key=None):
+        """Runs scan() on a background thread so insertion handling isn't held up."""
+        cancel = threading.Event()
+
+        def run():
+            try:
+                self.scan(serial, root, drive_letter, cancelled=cancel, volume_key=volume_key)
+            except Exception as e:
+                logging.error(f"Inventory scan of {drive_letter} failed: {e}")
+            finally:
+                with self.lock:
+                    if self.scans.get(drive_letter, (None, None))[1] is cancel:
+                        del self.scans[drive_letter]
+
+        with self.lock:
+            if drive_letter in self.scans:
+                return
+            thread = threading.Thread(target=run, name=f"inventory-{drive_letter}", daemon=True)
+            self.scans[drive_letter] = (thread, cancel)
+        thread.start()
+
+    def cancel(self, drive_letter):
+        """Abandons a running scan (drive removed); the previous snapshot is kept."""
+        with self.lock:
+            scan = self.scans.pop(drive_letter, None)
+        if scan:
+            scan[1].set()
+
+    def stop(self, timeout=2):
+        with self.lock:
+            scans = list(self.scans.values())
+            self.scans.clear()
+        for thread, cancel in scans:
+            cancel.set()
+        deadline = time.monotonic() + timeout
+        for thread, cancel in scans:
+            thread.join(max(0.0, deadline - time.monotonic()))
@@ -2,12 +2,26 @@ import customtkinter as ctk
 import tkinter as tk
 from tkinter import ttk
 import logging
+import time
 import os
 
+from core.event_bus import get_event_bus, EventQueue
+from gui.log_view import LogView
+from gui.device_list import DeviceListView
+
+# Per-frame budget of the Tk thread for live events
+DRAIN_INTERVAL_MS = 50
+MAX_EVENTS_PER_FRAME = 200
+LOG_VIEW_MAX_LINES = 100000 # per tab; settings.json "log_view_max_lines" overrides
+DEVICE_REFRESH_MS = 10000 # safety-net refresh; USB events trigger one sooner
+MIN_DEVICE_REFRESH_S = 1.0 # a burst of USB events re-queries the device list at most this often
+
 class Dashboard(ctk.CTkFrame):
-    def __init__(self, master, monitor):
+    def __init__(self, master, monitor, settings=None):
         super().__init__(master)
+        # monitor may be None until the embedded backend has loaded (see attach_monitor)
         self.monitor = monitor
+        self.settings = settings if settings is not None else (monitor.config.get("settings", {}) if monitor else {})
         
         # Configure grid expansion
         self.grid_columnconfigure(0, weight=1)
@@ -27,8 +41,13 @@ class Dashboard(ctk.CTkFrame):
         self.setup_files_tab()
         self.setup_controls_tab()
         
-        # Start Polling
-        self.start_log_polling()
+        # Live events pushed by the monitor threads
+        self.events = EventQueue(get_event_bus(), topics=("usb", "file", "io"))
+        self.devices_dirty = False
+        self.last_device_refresh = 0.0
+        self.refresh_devices_ui()
+        self.after(DRAIN_INTERVAL_MS, self.drain_events)
+        self.after(DEVICE_REFRESH_MS, self.periodic_device_refresh)
 
     def setup_devices_tab(self):
         # Configure Grid
@@ -39,10 +58,10 @@ class Dashboard(ctk.CTkFrame):
         header = ctk.CTkLabel(self.tab_devices, text="Connected USB Mass Storage Devices", font=ctk.CTkFont(size=18, weight="bold"))
         header.grid(row=0, column=0, padx=20, pady=10, sticky="w")
         
-        # Scrollable Device List
-        self.device_list_frame = ctk.CTkScrollableFrame(self.tab_devices, label_text="Devices")
-        self.device_list_frame.grid(row=1, column=0, padx=20, pady=10, sticky="nsew")
-        self.device_list_frame.columnconfigure(0, weight=1)
+        # Paginated Device List (fetched off the UI thread, diffed by serial)
+        self.device_list = DeviceListView(self.tab_devices, self.monitor, self.block_device_action,
+                                          self.unblock_device_action, fg_color="transparent")
+        self.device_list.grid(row=1, column=0, padx=20, pady=10, sticky="nsew")
         
         # Refresh Button
         refresh_btn = ctk.CTkButton(self.tab_devices, text="Refresh List", command=self.refresh_devices_ui)
@@ -52,77 +71,57 @@ class Dashboard(ctk.CTkFrame):
         self.tab_logs.columnconfigure(0, weight=1)
         self.tab_logs.rowconfigure(0, weight=1)
         
-        # wrap="none" to prevent ugly breaking. 
-        self.log_textbox = ctk.CTkTextbox(self.tab_logs, font=ctk.CTkFont(family="Consolas", size=12), wrap="none")
-        self.log_textbox.grid(row=0, column=0, padx=10, pady=10, sticky="nsew")
-        
-        # Configure tags for basic coloring
-        # Note: CTkTextbox uses underlying tkinter Text widget for tags
-        self.log_textbox.tag_config("INFO", foreground="white")
-        self.log_textbox.tag_config("WARNING", foreground="orange")
-        self.log_textbox.tag_config("ERROR", foreground="#FF5555")
-        
-        # Read initial logs
-        self.last_log_pos = 0
-        self.current_log_file = os.path.join("logs", "usb_events.log")
+        # Virtualized: only the visible rows are in the widget
+        self.log_view = LogView(self.tab_logs, max_lines=self.log_view_max_lines())
+        self.log_view.grid(row=0, column=0, padx=10, pady=10, sticky="nsew")
 
     def setup_files_tab(self):
         self.tab_files.columnconfigure(0, weight=1)
         self.tab_files.rowconfigure(0, weight=1)
         
-        self.file_log_textbox = ctk.CTkTextbox(self.tab_files, font=ctk.CTkFont(family="Consolas", size=12), wrap="none")
-        self.file_log_textbox.grid(row=0, column=0, padx=10, pady=10, sticky="nsew")
-        
-        self.file_log_textbox.tag_config("INFO", foreground="white")
-        self.file_log_textbox.tag_config("WARNING", foreground="orange")
-        self.file_log_textbox.tag_config("ERROR", foreground="#FF5555")
-        
-        self.last_file_log_pos = 0
-        self.current_file_log = os.path.join("logs", "file_activity.log")
+        self.file_log_view = LogView(self.tab_files, max_lines=self.log_view_max_lines())
+        self.file_log_view.grid(row=0, column=0, padx=10, pady=10, sticky="nsew")
 
-    def _append_colored_logs(self, textbox, new_text):
-        if not new_text: return
-        
-        # We need to unlock state if it was disabled (default is normal though)
-        # Split lines to apply tags per line
-        lines = new_text.splitlines()
-        for line in lines:
-            tag = "INFO"
-            if "WARNING" in line: tag = "WARNING"
-            elif "ERROR" in line or "CRITICAL" in line: tag = "ERROR"
-            
-            textbox.insert("end", line + "\n", tag)
-            
-        textbox.see("end")
+    def log_view_max_lines(self):
+        try:
+            return int(self.settings.get("log_view_max_lines", LOG_VIEW_MAX_LINES))
+        except Exception:
+            return LOG_VIEW_MAX_LINES
+
+    def attach_monitor(self, monitor):
+        """Hands over the monitor once it has started in the background."""
+        self.monitor = monitor
+        self.device_list.attach(monitor)
+        self.refresh_devices_ui()
 
-    def update_logs(self):
-        # Poll log files
+    def drain_events(self):
+        """Moves at most MAX_EVENTS_PER_FRAME events into the log views, however fast they arrive."""
         try:
-            # 1. USB Events
-            if os.path.exists(self.current_log_file):
-                with open(self.current_log_file, "r") as f:
-                    f.seek(self.last_log_pos)
-                    new_lines = f.read()
-                    if new_lines:
-                        self.last_log_pos = f.tell()
-                        self._append_colored_logs(self.log_textbox, new_lines)
-            
-            # 2. File Activity
-            if os.path.exists(self.current_file_log):
-                with open(self.current_file_log, "r") as f:
-                    f.seek(self.last_file_log_pos)
-                    new_lines = f.read()
-                    if new_lines:
-                        self.last_file_log_pos = f.tell()
-                        self._append_colored_logs(self.file_log_textbox, new_lines)
-                        
+            dropped = self.events.take_dropped()
+            if dropped:
+                self.file_log_view.append(time.time(), "WARNING",
+                                          f"... {dropped} events skipped (arriving faster than they can be shown) ...")
+            batch = self.events.drain(MAX_EVENTS_PER_FRAME)
+            for event in batch:
+                view = self.log_view if event["topic"] == "usb" else self.file_log_view
+                view.append(event["ts"], event["level"], event["message"],
+                            event.get("drive"), event.get("serial"), event.get("event_type"))
+                if event["topic"] == "usb":
+                    self.devices_dirty = True
+            if batch or dropped:
+                self.log_view.refresh()
+                self.file_log_view.refresh()
+
+            if self.devices_dirty and time.monotonic() - self.last_device_refresh >= MIN_DEVICE_REFRESH_S:
+                self.devices_dirty = False
+                self.refresh_devices_ui()
         except Exception as e:
-            pass
-            
-    def start_log_polling(self):
-        self.refresh_devices_ui()
-        self.update_logs()
-        self.after(2000, self.start_log_polling) # Poll every 2s
+            logging.error(f"Error showing live events: {e}")
+        self.after(DRAIN_INTERVAL_MS, self.drain_events)
+
+    def periodic_device_refresh(self):
+        self.devices_dirty = True
+        self.after(DEVICE_REFRESH_MS, self.periodic_device_refresh)
 
     def setup_controls_tab(self):
         self.tab_controls.columnconfigure(0, weight=1)
@@ -173,12 +172,11 @@ class Dashboard(ctk.CTkFrame):
                 tk.messagebox.showerror("Error", "Failed to generate report.")
 
     def block_device_action(self, info):
-        pnp_id = info.get('pnp_id')
+        pnp_id = info.get('device_id') or info.get('pnp_id')
         if not pnp_id: return
-        from core.usb_blocker import USBBlocker
         
         # Block via Backend
-        if USBBlocker.block_device(pnp_id):
+        if self.master.monitor.disable_device(pnp_id):
              tk.messagebox.showinfo("Success", f"Device {pnp_id} Blocked.")
              self.master.monitor.block_device_manual(info)
              self.refresh_devices_ui()
@@ -186,178 +184,21 @@ class Dashboard(ctk.CTkFrame):
              tk.messagebox.showerror("Error", "Failed to block device. Check logs.")
 
     def unblock_device_action(self, info):
-        pnp_id = info.get('pnp_id')
+        pnp_id = info.get('device_id') or info.get('pnp_id')
         if not pnp_id: return
-        from core.usb_blocker import USBBlocker
         
         # 1. Update allowlist & Remove from blocklist FIRST
         # This prevents the monitor loop from auto-blocking it again immediately after we enable the driver
         self.master.monitor.allow_device(info)
         
         # 2. Unblock via Backend (Enable Hardware)
-        if USBBlocker.unblock_device(pnp_id):
+        if self.master.monitor.enable_device(pnp_id):
              tk.messagebox.showinfo("Success", f"Device Unblocked.\n\nIt is now Allowed.")
              self.refresh_devices_ui()
         else:
              tk.messagebox.showerror("Error", "Failed to unblock device driver.")
 
     def refresh_devices_ui(self):
-        # Clear existing
-        try:
-            for widget in self.device_list_frame.winfo_children():
-                widget.destroy()
-        except: pass
-            
-        # Get data sources
-        if not self.monitor: return
-
-        # 1. Active (Mounted) Drives
-        active_drives = self.monitor.active_drives.copy()
-        
-        # 2. Blocklist
-        blocked_data = []
-        try:
-             import json
-             with open(os.path.join("config", "blocklist.json"), "r") as f:
-                 blocked_data = json.load(f).get("blocked_devices", [])
-        except: pass
-
-        # 3. Allowlist
-        allowed_data = []
-        try:
-             with open(os.path.join("config", "allowlist.json"), "r") as f:
-                 allowed_data = json.load(f).get("allowed_devices", [])
-        except: pass
-
-        # 4. Physically Attached Devices
-        attached_devices = self.monitor.get_all_attached_devices()
-        attached_serials = set(d['serial_number'] for d in attached_devices if d.get('serial_number'))
-
-        devices = []
-        processed_serials = set()
-
-        # Combine Sources
-        
-        # A. Blocked Devices
-        for b in blocked_data:
-            serial = b.get('serial_number')
-            if not serial: continue
-            
-            processed_serials.add(serial)
-            is_online = serial in attached_serials
-            
-            b['status_ui'] = "Blocked (Online)" if is_online else "Blocked (Offline)"
-            b['color'] = "red"
-            b['drive'] = 'N/A'
-            b['pnp_id'] = b.get('device_id')
-            b['is_blocked'] = True
-            devices.append(b)
-            
-        # B. Active Drives (Allowed & Online)
-        for drive, info in active_drives.items():
-            serial = info.get('serial_number')
-            if serial: 
-                if serial in processed_serials: continue
-                processed_serials.add(serial)
-            
-            info['status_ui'] = "Allowed (Online)"
-            info['color'] = "green"
-            info['drive'] = drive
-            info['pnp_id'] = info.get('device_id')
-            info['is_blocked'] = False
-            devices.append(info)
-            
-        # C. Allowlist (Allowed & Offline)
-        for a in allowed_data:
-            serial = a.get('serial_number')
-            if not serial: continue
-            if serial in processed_serials: continue # Already handled (either Active or Blocked)
-            
-            # If it's here, it's not active, and not blocked.
-            # Check if it's attached but maybe not mounted? Unlikely if not in Active, but possible.
-            # Usually implies disconnected.
-            is_online = serial in attached_serials
-            
-            status_str = "Allowed (Online)" if is_online else "Allowed (Offline)"
-            
-            a['status_ui'] = status_str
-            a['color'] = "green" if is_online else "gray" # Gray for offline allowed
-            a['drive'] = 'N/A'
-            a['pnp_id'] = a.get('device_id')
-            a['is_blocked'] = False
-            devices.append(a)
-
-        if not devices:
-            try:
-                lbl = ctk.CTkLabel(self.device_list_frame, text="No USB Devices Found", text_color="gray")
-                lbl.pack(pady=10)
-            except: pass
-            return
-
-        # Render Cards
-        for info in devices:
-            try:
-                card = ctk.CTkFrame(self.device_list_frame, fg_color="#2b2b2b", corner_radius=10)
-                card.pack(fill="x", padx=10, pady=5)
-                
-                # Left Info
-                info_frame = ctk.CTkFrame(card, fg_color="transparent")
-                info_frame.pack(side="left", padx=10, pady=10)
-                
-                name = info.get('device_name', 'Unknown Device')
-                ctk.CTkLabel(info_frame, text=name, font=("Arial", 14, "bold")).pack(anchor="w")
-                
-                sub_text = f"Serial: {info.get('serial_number')}"
-                if info.get('drive') != 'N/A':
-                    sub_text += f" | Drive: {info.get('drive')}"
-                ctk.CTkLabel(info_frame, text=sub_text, font=("Arial", 11)).pack(anchor="w")
-                
-                status_ui = info.get('status_ui', 'Unknown')
-                color = info.get('color', 'gray')
-                
-                status_text = f"Status: {status_ui}"
-                ctk.CTkLabel(info_frame, text=status_text, text_color=color, font=("Arial", 12, "bold")).pack(anchor="w", pady=(5,0))
-
-                # Right Controls
-                ctrl_frame = ctk.CTkFrame(card, fg_color="transparent")
-                ctrl_frame.pack(side="right", padx=10)
-                
-                if info.get('is_blocked'):
-                    ctk.CTkButton(ctrl_frame, text="Unblock", width=80, fg_color="green", hover_color="darkgreen",
-                                  command=lambda i=info: self.unblock_device_action(i)).pack()
-                else:
-                    ctk.CTkButton(ctrl_frame, text="Block", width=80, fg_color="darkred", hover_color="red",
-                                  command=lambda i=info: self.block_device_action(i)).pack()
-            except Exception as e:
-                logging.error(f"Error rendering device card: {e}")
-
-    def update_logs(self):
-        # Poll log files
-        try:
-            # 1. USB Events
-            if os.path.exists(self.current_log_file):
-                with open(self.current_log_file, "r") as f:
-                    f.seek(self.last_log_pos)
-                    new_lines = f.read()
-                    if new_lines:
-                        self.last_log_pos = f.tell()
-                        self.log_textbox.insert("end", new_lines)
-                        self.log_textbox.see("end")
-            
-            # 2. File Activity
-            if os.path.exists(self.current_file_log):
-                with open(self.current_file_log, "r") as f:
-                    f.seek(self.last_file_log_pos)
-                    new_lines = f.read()
-                    if new_lines:
-                        self.last_file_log_pos = f.tell()
-                        self.file_log_textbox.insert("end", new_lines)
-                        self.file_log_textbox.see("end")
-                        
-        except Exception as e:
-            pass
-
-    def start_log_polling(self):
-        self.refresh_devices_ui()
-        self.update_logs()
-        self.after(2000, self.start_log_polling) # Poll every 2s
+        """Asks for a new device list; the list view applies only what changed when it arrives."""
+        self.last_device_refresh = time.monotonic()
+        self.device_list.request_refresh()
@@ -0,0 +1,163 @@
+import logging
+import customtkinter as ctk
+
+from gui.device_model import DeviceListModel
+
+PAGE_SIZE = 25 # cards alive at once, whatever the size of the allowlist
+POLL_MS = 100
+
+
+class DeviceCard(ctk.CTkFrame):
+    """One device row. set_row() only reconfigures the widgets whose field changed."""
+
+    def __init__(self, master, row, on_block, on_unblock):
+        super().__init__(master, fg_color="#2b2b2b", corner_radius=10)
+        self.on_block = on_block
+        self.on_unblock = on_unblock
+        self.row = None
+
+        # Left Info
+        info_frame = ctk.CTkFrame(self, fg_color="transparent")
+        info_frame.pack(side="left", padx=10, pady=10)
+        self.name_label = ctk.CTkLabel(info_frame, text="", font=("Arial", 14, "bold"))
+        self.name_label.pack(anchor="w")
+        self.sub_label = ctk.CTkLabel(info_frame, text="", font=("Arial", 11))
+        self.sub_label.pack(anchor="w")
+        self.status_label = ctk.CTkLabel(info_frame, text="", font=("Arial", 12, "bold"))
+        self.status_label.pack(anchor="w", pady=(5, 0))
+
+        # Right Controls
+        ctrl_frame = ctk.CTkFrame(self, fg_color="transparent")
+        ctrl_frame.pack(side="right", padx=10)
+        self.button = ctk.CTkButton(ctrl_frame, text="", width=80, command=self.on_button)
+        self.button.pack()
+        self.set_row(row)
+
+    def on_button(self):
+        # Always acts on the latest info, not the one the card was created with
+        if self.row['is_blocked']:
+            self.on_unblock(self.row['info'])
+        else:
+            self.on_block(self.row['info'])
+
+    def set_row(self, row):
+        old = self.row or {}
+        self.row = row
+        if row['name'] != old.get('name'):
+            self.name_label.configure(text=row['name'])
+        if row['serial'] != old.get('serial') or row['drive'] != old.get('drive'):
+            sub_text = f"Serial: {row['serial']}"
+            if row['drive'] != 'N/A':
+                sub_text += f" | Drive: {row['drive']}"
+            self.sub_label.configure(text=sub_text)
+        if row['status_ui'] != old.get('status_ui') or row['color'] != old.get('color'):
+            self.status_label.configure(text=f"Status: {row['status_ui']}", text_color=row['color'])
+        if row['is_blocked'] != old.get('is_blocked'):
+            if row['is_blocked']:
+                self.button.configure(text="Unblock", fg_color="green", hover_color="darkgreen")
+            else:
+                self.button.configure(text="Block", fg_color="darkred", hover_color="red")
+
+
+class DeviceListView(ctk.CTkFrame):
+    """
+    Paginated device list fed by a DeviceListModel. Only the current page
+    has cards; on each result the cards whose serial left the page are
+    destroyed, new ones created, changed ones updated in place and the rest
+    left alone. Cards are re-packed only when the order on the page changed.
+    """
+
+    def __init__(self, master, monitor, on_block, on_unblock, page_size=PAGE_SIZE, **kwargs):
+        super().__init__(master, **kwargs)
+        self.on_block = on_block
+        self.on_unblock = on_unblock
+        self.page_size = page_size
+        self.page = 0
+        self.rows = []
+        self.cards = {} # key -> DeviceCard on the current page
+        self.order = [] # keys in packing order
+
+        self.grid_columnconfigure(0, weight=1)
+        self.grid_rowconfigure(0, weight=1)
+        self.list_frame = ctk.CTkScrollableFrame(self, label_text="Devices")
+        self.list_frame.grid(row=0, column=0, columnspan=3, sticky="nsew")
+        self.list_frame.columnconfigure(0, weight=1)
+        self.empty_label = ctk.CTkLabel(self.list_frame, text="No USB Devices Found", text_color="gray")
+
+        # Pager
+        self.prev_btn = ctk.CTkButton(self, text="< Prev", width=70, command=lambda: self.show_page(self.page - 1))
+        self.prev_btn.grid(row=1, column=0, padx=5, pady=(5, 0), sticky="w")
+        self.page_label = ctk.CTkLabel(self, text="")
+        self.page_label.grid(row=1, column=1, padx=5, pady=(5, 0))
+        self.next_btn = ctk.CTkButton(self, text="Next >", width=70, command=lambda: self.show_page(self.page + 1))
+        self.next_btn.grid(row=1, column=2, padx=5, pady=(5, 0), sticky="e")
+
+        self.model = None
+        self.attach(monitor)
+        self.after(POLL_MS, self.poll)
+
+    def attach(self, monitor):
+        """Starts fetching from monitor (None until the embedded backend has loaded)."""
+        if self.model:
+            self.model.stop()
+        self.model = DeviceListModel(monitor) if monitor else None
+        self.request_refresh()
+
+    def request_refresh(self):
+        """Non-blocking: the query runs on the model's thread and lands in poll()."""
+        if self.model:
+            self.model.request_refresh()
+
+    def poll(self):
+        try:
+            result = self.model.poll() if self.model else None
+            if result is not None:
+                self.rows = result[0]
+                self.render()
+        except Exception as e:
+            logging.error(f"Error updating device list: {e}")
+        self.after(POLL_MS, self.poll)
+
+    def page_count(self):
+        return max(1, -(-len(self.rows) // self.page_size))
+
+    def show_page(self, page):
+        page = min(max(0, page), self.page_count() - 1)
+        if page != self.page:
+            self.page = page
+            self.render()
+
+    def render(self):
+        self.page = min(self.page, self.page_count() - 1)
+        start = self.page * self.page_size
+        page_rows = self.rows[start:start + self.page_size]
+        wanted = [r['key'] for r in page_rows]
+
+        for key in set(self.cards) - set(wanted):
+            self.cards.pop(key).destroy()
+        for row in page_rows:
+            card = self.cards.get(row['key'])
+            if card is None:
+                self.cards[row['key']] = DeviceCard(self.list_frame, row, self.on_block, self.on_unblock)
+            else:
+                card.set_row(row) # no-op for fields that did not change
+
+        if wanted != self.order:
+            for key in self.order:
+                if key in self.cards:
+                    self.cards[key].pack_forget()
+            for key in wanted:
+                self.cards[key].pack(fill="x", padx=10, pady=5)
+            self.order = wanted
+
+        if self.rows:
+            self.empty_label.pack_forget()
+        else:
+            self.empty_label.pack(pady=10)
+        self.page_label.configure(text=f"Page {self.page + 1} of {self.page_count()} ({len(self.rows)} devices)")
+        self.prev_btn.configure(state="normal" if self.page > 0 else "disabled")
+        self.next_btn.configure(state="normal" if self.page < self.page_count() - 1 else "disabled")
+
+    def stop(self):
+        if self.model:
+            self.model.stop()
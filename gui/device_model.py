@@ -0,0 +1,135 @@
+import queue
+import logging
+import threading
+
+# Fields of a row that a card displays; a change in any of them updates the card
+ROW_FIELDS = ("name", "serial", "drive", "status_ui", "color", "is_blocked", "pnp_id")
+
+
+def build_device_rows(active_drives, blocked_data, allowed_data, attached_devices):
+    """
+    Merges the sources into display rows, blocked first, then mounted
+    (allowed and online), then the rest of the allowlist. A serial appears
+    once. Each row has ROW_FIELDS, a 'key' and the 'info' the block/unblock
+    actions take: the device's Fingerprint or policy entry itself, shared
+    read-only (display state lives on the row). Inputs are not modified.
+    """
+    attached_serials = set(d['serial_number'] for d in attached_devices if d.get('serial_number'))
+    rows = []
+    processed_serials = set()
+
+    def row(info, key, drive, status_ui, color, is_blocked):
+        return {'key': key, 'name': info.get('device_name', 'Unknown Device'), 'serial': info.get('serial_number'),
+                'drive': drive, 'status_ui': status_ui, 'color': color, 'is_blocked': is_blocked,
+                'pnp_id': info.get('device_id'), 'info': info}
+
+    # A. Blocked Devices
+    for b in blocked_data:
+        serial = b.get('serial_number')
+        if not serial: continue
+        processed_serials.add(serial)
+        status = "Blocked (Online)" if serial in attached_serials else "Blocked (Offline)"
+        rows.append(row(b, serial, 'N/A', status, "red", True))
+
+    # B. Active Drives (Allowed & Online)
+    for drive, info in active_drives.items():
+        serial = info.get('serial_number')
+        if serial:
+            if serial in processed_serials: continue
+            processed_serials.add(serial)
+        rows.append(row(info, serial or f"drive:{drive}", drive, "Allowed (Online)", "green", False))
+
+    # C. Allowlist (Allowed & Offline, or attached but not mounted)
+    for a in allowed_data:
+        serial = a.get('serial_number')
+        if not serial or serial in processed_serials: continue
+        processed_serials.add(serial)
+        is_online = serial in attached_serials
+        rows.append(row(a, serial, 'N/A', "Allowed (Online)" if is_online else "Allowed (Offline)",
+                        "green" if is_online else "gray", False))
+    return rows
+
+
+def diff_rows(old, new):
+    """
+    Compares two row lists keyed by 'key'. Returns (added, changed, removed)
+    as sets of keys; a row is changed when any ROW_FIELDS value differs.
+    """
+    old_by_key = {r['key']: r for r in old}
+    new_by_key = {r['key']: r for r in new}
+    added = new_by_key.keys() - old_by_key.keys()
+    removed = old_by_key.keys() - new_by_key.keys()
+    changed = {k for k in new_by_key.keys() & old_by_key.keys()
+               if any(new_by_key[k][f] != old_by_key[k][f] for f in ROW_FIELDS)}
+    return set(added), changed, set(removed)
+
+
+class DeviceListModel:
+    """
+    Gathers the device list off the UI thread. request_refresh() only sets a
+    flag; a worker thread (initialised for the backend, e.g. COM for WMI)
+    runs the attached-device query and policy reads, builds the rows and
+    diffs them against the previous result. The UI thread picks results up
+    with poll(). Requests made while a refresh runs fold into one more.
+    """
+
+    def __init__(self, monitor):
+        self.monitor = monitor
+        self.rows = []
+        self.wanted = threading.Event()
+        self.results = queue.SimpleQueue()
+        self.running = True
+        self.thread = threading.Thread(target=self._run, name="device-list", daemon=True)
+        self.thread.start()
+
+    def request_refresh(self):
+        self.wanted.set()
+
+    def _collect(self):
+        monitor = self.monitor
+        return build_device_rows(
+            monitor.active_drives.copy(),
+            monitor.policy_store.blocked_devices(),
+            monitor.policy_store.allowed_devices(),
+            monitor.get_all_attached_devices(),
+        )
+
+    def _run(self):
+        backend = self.monitor.backend
+        backend.thread_init()
+        try:
+            while self.running:
+                self.wanted.wait()
+                self.wanted.clear()
+                if not self.running:
+                    break
+                try:
+                    rows = self._collect()
+                except Exception as e:
+                    logging.error(f"Device list refresh failed: {e}")
+                    continue
+                added, changed, removed = diff_rows(self.rows, rows)
+                order_changed = [r['key'] for r in rows] != [r['key'] for r in self.rows]
+                self.rows = rows
+                if added or changed or removed or order_changed:
+                    self.results.put((rows, added, changed, removed))
+        finally:
+            backend.thread_exit()
+
+    def poll(self):
+        """Latest (rows, added, changed, removed) since the last poll, merged, or None."""
+        latest = None
+        while True:
+            try:
+                result = self.results.get_nowait()
+            except queue.Empty:
+                return latest
+            if latest is None:
+                latest = result
+            else:
+                # Fold consecutive diffs: keys are re-checked against the final rows anyway
+                latest = (result[0], latest[1] | result[1], latest[2] | result[2], latest[3] | result[3])
+
+    def stop(self):
+        self.running = False
+        self.wanted.set()
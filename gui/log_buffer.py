@@ -0,0 +1,130 @@
+import sys
+import threading
+from collections import deque
+
+# Fields a LogFilter can select on exactly (served from the index)
+INDEXED_FIELDS = ("drive", "serial", "event_type")
+
+
+class LogEntry:
+    __slots__ = ("seq", "ts", "level", "message", "lowered", "drive", "serial", "event_type")
+
+    def __init__(self, seq, ts, level, message, drive, serial, event_type):
+        self.seq = seq
+        self.ts = ts
+        self.level = level
+        self.message = message
+        self.lowered = None # lower-cased message, filled in by the first text search
+        self.drive = drive
+        self.serial = serial
+        self.event_type = event_type
+
+
+class LogFilter:
+    """Text (case-insensitive substring) plus exact drive / serial / event type; empty parts match all."""
+
+    def __init__(self, text="", drive="", serial="", event_type=""):
+        self.text = text.strip().lower()
+        self.fields = {f: v.strip() for f, v in (("drive", drive), ("serial", serial), ("event_type", event_type)) if v.strip()}
+        if "event_type" in self.fields:
+            self.fields["event_type"] = self.fields["event_type"].upper()
+
+    def is_empty(self):
+        return not self.text and not self.fields
+
+    def matches(self, entry):
+        for field, value in self.fields.items():
+            if getattr(entry, field) != value:
+                return False
+        if self.text:
+            if entry.lowered is None:
+                entry.lowered = entry.message.lower()
+            return self.text in entry.lowered
+        return True
+
+
+class LogBuffer:
+    """
+    Ring buffer of the last `max_lines` log lines, addressed by a growing
+    sequence number, with an index of drive / serial / event type -> seqs
+    kept exact as lines are evicted.
+
+    append() is called on the UI thread; search() may run on any thread and
+    only holds the lock while taking its snapshot.
+    """
+
+    def __init__(self, max_lines=100000):
+        self.max_lines = max_lines
+        self.slots = [None] * max_lines
+        self.next_seq = 0
+        self.lock = threading.Lock()
+        self.index = {field: {} for field in INDEXED_FIELDS} # field -> value -> deque of seqs
+
+    @property
+    def first_seq(self):
+        return max(0, self.next_seq - self.max_lines)
+
+    def __len__(self):
+        return self.next_seq - self.first_seq
+
+    def append(self, ts, level, message, drive=None, serial=None, event_type=None):
+        with self.lock:
+            seq = self.next_seq
+            slot = seq % self.max_lines
+            evicted = self.slots[slot]
+            if evicted is not None:
+                # The evicted line is the oldest, so it heads each of its index lists
+                for field in INDEXED_FIELDS:
+                    value = getattr(evicted, field)
+                    if value:
+                        seqs = self.index[field][value]
+                        seqs.popleft()
+                        if not seqs:
+                            del self.index[field][value]
+            # Field values repeat across thousands of lines: keep one copy of each
+            entry = LogEntry(seq, ts, level, message, drive and sys.intern(drive),
+                             serial and sys.intern(serial), event_type and sys.intern(event_type))
+            self.slots[slot] = entry
+            for field in INDEXED_FIELDS:
+                value = getattr(entry, field)
+                if value:
+                    self.index[field].setdefault(value, deque()).append(seq)
+            self.next_seq = seq + 1
+            return entry
+
+    def get(self, seq):
+        """Entry for seq, or None once it has been evicted."""
+        if seq < self.first_seq or seq >= self.next_seq:
+            return None
+        return self.slots[seq % self.max_lines]
+
+    def search(self, log_filter, cancelled=None):
+        """
+        Seqs of matching lines, oldest first, and the seq the search covered
+        up to (exclusive); lines appended later are for the caller to match.
+        Indexed fields narrow the candidates first; the text test only sees those.
+        """
+        with self.lock:
+            upto = self.next_seq
+            first = self.first_seq
+            candidates = None
+            for field, value in log_filter.fields.items():
+                seqs = self.index[field].get(value)
+                if not seqs:
+                    return [], upto
+                if candidates is None or len(seqs) < len(candidates):
+                    candidates = list(seqs) # copied under the lock: the deque keeps changing
+            if candidates is None:
+                candidates = range(first, upto)
+            slots = self.slots
+            max_lines = self.max_lines
+
+        matches = []
+        for n, seq in enumerate(candidates):
+            if cancelled is not None and n % 4096 == 0 and cancelled():
+                return None, upto
+            entry = slots[seq % max_lines]
+            # A slot reused after the snapshot holds a newer seq: that line was evicted
+            if entry is not None and entry.seq == seq and log_filter.matches(entry):
+                matches.append(seq)
+        return matches, upto
@@ -0,0 +1,232 @@
+import queue
+import bisect
+import threading
+import time
+import tkinter as tk
+import tkinter.font as tkfont
+import customtkinter as ctk
+
+from gui.log_buffer import LogBuffer, LogFilter
+
+SEARCH_DEBOUNCE_MS = 250
+RESULT_POLL_MS = 50
+WHEEL_LINES = 3
+LEVEL_TAGS = {"WARNING": "WARNING", "ERROR": "ERROR", "CRITICAL": "ERROR"}
+
+
+class LogView(ctk.CTkFrame):
+    """
+    Virtualized log viewer. Lines live in a LogBuffer ring (at most
+    max_lines); the Text widget only ever holds the rows currently visible,
+    so memory and redraw cost do not grow with the log. A filter bar narrows
+    by text, drive, serial and event type; searches run on a worker thread
+    over the buffer's index and lines arriving meanwhile are matched when
+    the result is installed.
+    """
+
+    def __init__(self, master, max_lines=100000, **kwargs):
+        super().__init__(master, **kwargs)
+        self.buffer = LogBuffer(max_lines)
+        self.filter = LogFilter()
+        self.matches = None # seqs matching self.filter, oldest first; None = unfiltered
+        self.top_seq = 0 # first visible line, kept by seq so eviction doesn't shift the view
+        self.follow = True # stick to the newest line
+        self.render_pending = False
+        self.search_gen = 0
+        self.search_job = None # worker thread of the search in progress
+        self.search_after = None # pending debounce
+        self.polling = False
+        self.results = queue.SimpleQueue()
+
+        self.grid_columnconfigure(0, weight=1)
+        self.grid_rowconfigure(1, weight=1)
+
+        # Filter bar
+        bar = ctk.CTkFrame(self, fg_color="transparent")
+        bar.grid(row=0, column=0, columnspan=2, padx=5, pady=(5, 0), sticky="ew")
+        bar.grid_columnconfigure(0, weight=1)
+        self.search_entry = ctk.CTkEntry(bar, placeholder_text="Search")
+        self.search_entry.grid(row=0, column=0, padx=(0, 5), sticky="ew")
+        self.drive_entry = ctk.CTkEntry(bar, placeholder_text="Drive", width=70)
+        self.drive_entry.grid(row=0, column=1, padx=5)
+        self.serial_entry = ctk.CTkEntry(bar, placeholder_text="Serial", width=140)
+        self.serial_entry.grid(row=0, column=2, padx=5)
+        self.type_entry = ctk.CTkEntry(bar, placeholder_text="Event type", width=110)
+        self.type_entry.grid(row=0, column=3, padx=5)
+        ctk.CTkButton(bar, text="Clear", width=60, command=self.clear_filter).grid(row=0, column=4, padx=5)
+        self.status_label = ctk.CTkLabel(bar, text="0 lines", width=140, anchor="e")
+        self.status_label.grid(row=0, column=5, padx=(5, 0))
+        for entry in (self.search_entry, self.drive_entry, self.serial_entry, self.type_entry):
+            entry.bind("<KeyRelease>", lambda e: self.schedule_search())
+
+        # Visible window
+        self.text = tk.Text(self, wrap="none", font=("Consolas", 12), bg="#1d1e1e", fg="white",
+                            borderwidth=0, highlightthickness=0, state="disabled", cursor="arrow")
+        self.text.grid(row=1, column=0, padx=(10, 0), pady=10, sticky="nsew")
+        self.text.tag_config("INFO", foreground="white")
+        self.text.tag_config("WARNING", foreground="orange")
+        self.text.tag_config("ERROR", foreground="#FF5555")
+        self.scrollbar = ctk.CTkScrollbar(self, command=self.yview)
+        self.scrollbar.grid(row=1, column=1, padx=(0, 5), pady=10, sticky="ns")
+        self.line_height = max(1, tkfont.Font(font=self.text.cget("font")).metrics("linespace"))
+
+        self.text.bind("<Configure>", lambda e: self.refresh())
+        self.text.bind("<MouseWheel>", lambda e: self.scroll_lines(-WHEEL_LINES if e.delta > 0 else WHEEL_LINES))
+        self.text.bind("<Button-4>", lambda e: self.scroll_lines(-WHEEL_LINES))
+        self.text.bind("<Button-5>", lambda e: self.scroll_lines(WHEEL_LINES))
+
+    # --- Data ---
+    def append(self, ts, level, message, drive=None, serial=None, event_type=None):
+        """Adds one line; call refresh() once after a batch."""
+        entry = self.buffer.append(ts, level, message, drive, serial, event_type)
+        if self.matches is not None and self.search_job is None and self.filter.matches(entry):
+            self.matches.append(entry.seq)
+
+    def refresh(self):
+        if not self.render_pending:
+            self.render_pending = True
+            self.after_idle(self.render)
+
+    # --- Rows of the current view (all lines, or the matches) ---
+    def _match_start(self):
+        """Index of the first match still in the buffer; drops expired matches now and then."""
+        start = bisect.bisect_left(self.matches, self.buffer.first_seq)
+        if start > 4096:
+            del self.matches[:start]
+            start = 0
+        return start
+
+    def _rows(self):
+        if self.matches is None:
+            return self.buffer.first_seq, len(self.buffer)
+        start = self._match_start()
+        return start, len(self.matches) - start
+
+    def _seq_at(self, start, row):
+        return start + row if self.matches is None else self.matches[start + row]
+
+    def _row_of(self, start, seq):
+        if self.matches is None:
+            return seq - start
+        return bisect.bisect_left(self.matches, seq) - start
+
+    def visible_rows(self):
+        return max(1, self.text.winfo_height() // self.line_height)
+
+    def render(self):
+        self.render_pending = False
+        height = self.visible_rows()
+        start, total = self._rows()
+        last_top = max(0, total - height)
+        top = last_top if self.follow else min(max(0, self._row_of(start, self.top_seq)), last_top)
+        if total:
+            self.top_seq = self._seq_at(start, top)
+
+        runs = []
+        for row in range(top, min(total, top + height)):
+            entry = self.buffer.get(self._seq_at(start, row))
+            if entry is None:
+                continue
+            stamp = time.strftime("%H:%M:%S", time.localtime(entry.ts))
+            tag = LEVEL_TAGS.get(entry.level, "INFO")
+            line = f"{stamp} - {entry.level} - {entry.message}\n"
+            if runs and runs[-1][0] == tag:
+                runs[-1][1].append(line)
+            else:
+                runs.append((tag, [line]))
+
+        self.text.configure(state="normal")
+        self.text.delete("1.0", "end")
+        for tag, lines in runs:
+            self.text.insert("end", "".join(lines), tag)
+        self.text.configure(state="disabled")
+
+        if total:
+            self.scrollbar.set(top / total, min(1.0, (top + height) / total))
+        else:
+            self.scrollbar.set(0.0, 1.0)
+        if self.search_job is not None:
+            status = "Searching..."
+        elif self.matches is None:
+            status = f"{total:,} lines"
+        else:
+            status = f"{total:,} of {len(self.buffer):,}"
+        self.status_label.configure(text=status)
+
+    # --- Scrolling ---
+    def _scroll_to(self, top):
+        height = self.visible_rows()
+        start, total = self._rows()
+        top = min(max(0, top), max(0, total - height))
+        self.follow = top >= total - height
+        if total:
+            self.top_seq = self._seq_at(start, top)
+        self.refresh()
+
+    def scroll_lines(self, delta):
+        start, _ = self._rows()
+        self._scroll_to(self._row_of(start, self.top_seq) + delta)
+
+    def yview(self, *args):
+        """Scrollbar command: ("moveto", fraction) or ("scroll", n, "units" | "pages")."""
+        start, total = self._rows()
+        if args[0] == "moveto":
+            self._scroll_to(int(float(args[1]) * total))
+        elif args[0] == "scroll":
+            step = self.visible_rows() if args[2] == "pages" else 1
+            self._scroll_to(self._row_of(start, self.top_seq) + int(args[1]) * step)
+
+    # --- Filtering ---
+    def schedule_search(self):
+        if self.search_after:
+            self.after_cancel(self.search_after)
+        self.search_after = self.after(SEARCH_DEBOUNCE_MS, self.start_search)
+
+    def clear_filter(self):
+        for entry in (self.search_entry, self.drive_entry, self.serial_entry, self.type_entry):
+            entry.delete(0, "end")
+        self.start_search()
+
+    def start_search(self):
+        self.search_after = None
+        log_filter = LogFilter(self.search_entry.get(), self.drive_entry.get(),
+                               self.serial_entry.get(), self.type_entry.get())
+        self.search_gen += 1
+        gen = self.search_gen
+        self.follow = True
+        if log_filter.is_empty():
+            self.search_job = None
+            self.filter, self.matches = log_filter, None
+            self.refresh()
+            return
+
+        def run():
+            matches, upto = self.buffer.search(log_filter, cancelled=lambda: gen != self.search_gen)
+            self.results.put((gen, log_filter, matches, upto))
+
+        self.search_job = threading.Thread(target=run, name="log-search", daemon=True)
+        self.search_job.start()
+        self.refresh()
+        if not self.polling:
+            self.polling = True
+            self.after(RESULT_POLL_MS, self._poll_results)
+
+    def _poll_results(self):
+        while True:
+            try:
+                gen, log_filter, matches, upto = self.results.get_nowait()
+            except queue.Empty:
+                break
+            if gen != self.search_gen or matches is None:
+                continue # superseded by a newer search
+            # Lines appended while the worker ran
+            for seq in range(max(upto, self.buffer.first_seq), self.buffer.next_seq):
+                entry = self.buffer.get(seq)
+                if entry is not None and log_filter.matches(entry):
+                    matches.append(seq)
+            self.filter, self.matches = log_filter, matches
+            self.search_job = None
+            self.refresh()
+        self.polling = self.search_job is not None
+        if self.polling:
+            self.after(RESULT_POLL_MS, self._poll_results)